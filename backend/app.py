@@ -1,45 +1,474 @@
-from flask import Flask, request, jsonify
+import time
+# Measured from here: the interpreter itself has started by the time this module runs
+STARTUP_STARTED = time.perf_counter()
+
+from flask import Flask, request, jsonify, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import sqlite3
-import pymysql
 import os
+import sys
 import json
+import pathlib
 import logging
-from datetime import datetime
+import importlib
+import importlib.util
+from datetime import datetime, date, timedelta, timezone
 import uuid
 import traceback
+import base64
+import threading
+import queue
+import random
+import re
+import zlib
+import heapq
+import math
+import functools
+import socket
+import signal
+import tempfile
+import contextlib
+import hashlib
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from decimal import Decimal
+
+STARTUP_IMPORTS_MS = (time.perf_counter() - STARTUP_STARTED) * 1000
+
+# Database drivers and optional accelerators are imported on first use (see DriverRegistry),
+# so a SQLite-only session never pays for loading them: name -> (module to import, pip package)
+OPTIONAL_MODULES = {
+    'pymysql': ('pymysql.cursors', 'PyMySQL'),
+    'psycopg2': ('psycopg2', 'psycopg2-binary'),
+    'pymongo': ('pymongo', 'pymongo'),
+    'bson': ('bson', 'pymongo'),
+    'pyodbc': ('pyodbc', 'pyodbc'),
+    'zstandard': ('zstandard', 'zstandard'),
+    'msgpack': ('msgpack', 'msgpack'),
+    'pyarrow': ('pyarrow.ipc', 'pyarrow'),
+    'numpy': ('numpy', 'numpy'),
+}
+
+# The desktop app sets DBONLY_DEBUG=0: no debugger and no reloader process re-importing everything
+BACKEND_DEBUG = os.environ.get('DBONLY_DEBUG', '1') != '0'
 
-# Optional imports for additional database support
-try:
-    import psycopg2
-    PSYCOPG2_AVAILABLE = True
-except ImportError:
-    PSYCOPG2_AVAILABLE = False
-    psycopg2 = None
-
-try:
-    import pymongo
-    PYMONGO_AVAILABLE = True
-except ImportError:
-    PYMONGO_AVAILABLE = False
-    pymongo = None
-
-try:
-    import pyodbc
-    PYODBC_AVAILABLE = True
-except ImportError:
-    PYODBC_AVAILABLE = False
-    pyodbc = None
+# DBONLY_WORKERS > 1 pre-forks that many server processes; they share connection profiles
+# through a local SQLite registry file and re-open a connection the first time they see its id
+BACKEND_WORKERS = max(1, int(os.environ.get('DBONLY_WORKERS', 1)))
+REGISTRY_PATH = os.environ.get('DBONLY_REGISTRY_PATH')
+REGISTRY_SYNC_INTERVAL = 1.0
+
+# A successful /api/test-connection parks its driver handle for the create-connection that
+# usually follows; unclaimed handles are closed after HANDOFF_TTL seconds
+HANDOFF_TTL = float(os.environ.get('DBONLY_HANDOFF_TTL', 30))
+HANDOFF_MAX_ENTRIES = 8
+HANDOFF_PROFILE_KEYS = ('type', 'host', 'port', 'username', 'password', 'database', 'sqlite_profile', 'sqlite_options')
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Cell-Type', 'X-Cell-Length', 'X-Queue-Wait-Ms', 'Retry-After', 'X-Trace-Id', 'Server-Timing',
+                          'X-Memory-Bytes', 'X-Memory-Retained'])
+
+# SQLite tuning presets selectable per connection profile via "sqlite_profile".
+# "default" leaves the file exactly as SQLite opens it.
+SQLITE_PROFILES = {
+    'default': {},
+    'browse': {
+        'read_only': True,
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'bulk_load': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -262144,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16384,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 10000,
+    },
+}
+
+SQLITE_PRAGMA_CHOICES = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY'),
+}
+SQLITE_PRAGMA_INTEGERS = ('cache_size', 'mmap_size', 'busy_timeout')
+
+# Sample rows returned alongside table schemas
+SAMPLE_DEFAULT_ROWS = 5
+SAMPLE_MAX_ROWS = 100
+SAMPLE_MAX_CELL_SIZE = 256
+
+# Result cells larger than this (characters for text, bytes for blobs) are
+# replaced with truncation markers; 0 disables the cap. Full values are
+# fetched on demand through /api/cell-value.
+MAX_CELL_SIZE = int(os.environ.get('DBONLY_MAX_CELL_SIZE', 65536))
+CELL_STREAM_CHUNK_SIZE = 65536
+
+# Result-size guardrails for ad-hoc queries: unbounded SELECTs get a dialect-specific row
+# limit and fetching stops at whichever cap is hit first; 0 disables a cap
+QUERY_MAX_ROWS = int(os.environ.get('DBONLY_QUERY_MAX_ROWS', 10000))
+QUERY_MAX_BYTES = int(os.environ.get('DBONLY_QUERY_MAX_BYTES', 64 * 1024 * 1024))
+QUERY_FETCH_BATCH = 1000
+# Aggregates that make a SELECT list return one row per group; such lists are kept when counting
+COUNT_AGGREGATE_PATTERN = re.compile(
+    r'\b(COUNT|COUNT_BIG|SUM|AVG|MIN|MAX|TOTAL|GROUP_CONCAT|STRING_AGG|LISTAGG|\w*_AGG|JSON_ARRAYAGG|'
+    r'JSON_OBJECTAGG|JSON_GROUP_ARRAY|JSON_GROUP_OBJECT|STDDEV\w*|STDEV\w*|VAR\w*|BIT_AND|BIT_OR|'
+    r'BIT_XOR|BOOL_AND|BOOL_OR|EVERY|CHECKSUM_AGG|PERCENTILE_\w+|MODE)\s*\(')
+
+# Response compression
+COMPRESSION_MIN_SIZE = int(os.environ.get('DBONLY_COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = 5
+COMPRESSION_ZSTD_LEVEL = 3
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/', 'application/x-msgpack', 'application/vnd.apache.arrow.stream',
+                          'application/x-ndjson')
+
+# Binary result formats selectable through the Accept header
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Server-side filtering for CRUD selects and table data
+FILTER_OPERATORS = {
+    'eq': '=', '=': '=', 'ne': '<>', '!=': '<>', '<>': '<>',
+    'lt': '<', '<': '<', 'le': '<=', '<=': '<=', 'gt': '>', '>': '>', 'ge': '>=', '>=': '>=',
+    'like': 'LIKE', 'not_like': 'NOT LIKE',
+    'in': 'IN', 'not_in': 'NOT IN',
+    'is_null': 'IS NULL', 'not_null': 'IS NOT NULL',
+    'between': 'BETWEEN',
+}
+FILTER_MAX_PREDICATES = 200
+
+# Column profiling (/api/table-profile)
+PROFILE_DEFAULT_SAMPLE = 10000
+PROFILE_MAX_SAMPLE = 200000
+PROFILE_TOP_VALUES = 10
+PROFILE_HISTOGRAM_BINS = 10
+PROFILE_MAX_WORKERS = 8
+PROFILE_NUMERIC_FAMILIES = ('integer', 'decimal', 'real')
+PROFILE_CACHE_MAX_ENTRIES = 32
+# Samples are drawn from this many random key ranges (SQLite/MySQL) ...
+PROFILE_SAMPLE_RANGES = 64
+# ... or block samples of this many times the wanted fraction (PostgreSQL/MSSQL), cut down to size
+PROFILE_OVERSAMPLE = 1.25
+
+# Query results kept for regrouping without re-running them (/api/result/analyze)
+RESULT_CACHE_MAX_ENTRIES = 16
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('DBONLY_RESULT_CACHE_BYTES', 128 * 1024 * 1024))
+ANALYZE_AGGREGATES = ('count', 'count_distinct', 'sum', 'avg', 'min', 'max')
+ANALYZE_MAX_GROUPS = 10000
+ANALYZE_MAX_PIVOT_COLUMNS = 200
+
+# MongoDB collections browsed through find/aggregate JSON specs
+MONGO_SERVER_SELECTION_TIMEOUT_MS = 5000
+MONGO_DEFAULT_BATCH_SIZE = 500
+MONGO_MAX_BATCH_SIZE = 10000
+MONGO_DEFAULT_LIMIT = 1000
+MONGO_SCHEMA_SAMPLE = 100
+MONGO_FILTER_OPERATORS = {
+    'eq': '$eq', '=': '$eq', 'ne': '$ne', '!=': '$ne', '<>': '$ne',
+    'lt': '$lt', '<': '$lt', 'le': '$lte', '<=': '$lte', 'gt': '$gt', '>': '$gt', 'ge': '$gte', '>=': '$gte',
+    'in': '$in', 'not_in': '$nin',
+}
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Per-connection request scheduling: lower classes run first, one request at a time per connection
+SCHEDULER_PRIORITIES = {'interactive': 0, 'normal': 1, 'bulk': 2}
+SCHEDULER_SLOTS = 1
+SCHEDULER_MAX_QUEUE_DEPTH = int(os.environ.get('DBONLY_MAX_QUEUE_DEPTH', 16))
+SCHEDULER_MAX_WAIT = float(os.environ.get('DBONLY_MAX_QUEUE_WAIT', 30))
+
+# Per-request tracing of /api/* calls. Every response carries X-Trace-Id and a Server-Timing
+# summary; with DBONLY_TRACE_FILE set, spans are appended there as Chrome trace events
+# (open in chrome://tracing or ui.perfetto.dev)
+TRACE_HEADER = 'X-Trace-Id'
+TRACE_FILE = os.environ.get('DBONLY_TRACE_FILE')
+TRACE_MAX_SPANS = 512
+
+# Estimated bytes that requests may hold in fetched rows and serialized bodies at once.
+# A request that would go over waits for others to finish (only before it holds anything)
+# or is rejected with 503; DBONLY_MEMORY_TRACKING=1 adds tracemalloc figures per request
+MEMORY_BUDGET = int(os.environ.get('DBONLY_MEMORY_BUDGET', 512 * 1024 * 1024))
+MEMORY_BUDGET_WAIT = float(os.environ.get('DBONLY_MEMORY_BUDGET_WAIT', 10))
+MEMORY_TRACKING = os.environ.get('DBONLY_MEMORY_TRACKING', '0') == '1'
+
+# Change detection for table-data refreshes (SQLite "<table>__changes" logs)
+CHANGE_LOG_SUFFIX = '__changes'
+CHANGE_LOG_MAX_ROWS = 100000
+
+# On-demand SQLite full-text search indexes ("<table>__fts")
+FTS_SUFFIX = '__fts'
+FTS_DEFAULT_LIMIT = 50
+
+# Local SQLite snapshots of remote tables or queries, served to table-data and select
+SNAPSHOT_DIR = os.environ.get('DBONLY_SNAPSHOT_DIR') or os.path.join(tempfile.gettempdir(), 'dbonly-snapshots')
+SNAPSHOT_MAX_BYTES = int(os.environ.get('DBONLY_SNAPSHOT_MAX_BYTES', 1024 * 1024 * 1024))
+SNAPSHOT_DIR_MAX_BYTES = int(os.environ.get('DBONLY_SNAPSHOT_DIR_MAX_BYTES', 4 * 1024 * 1024 * 1024))
+SNAPSHOT_STALE_AFTER = float(os.environ.get('DBONLY_SNAPSHOT_STALE_AFTER', 300))
+SNAPSHOT_BATCH_SIZE = 1000
+SNAPSHOT_META_TABLE = '_dbonly_snapshot'
+
+# Index advisor: predicate and ORDER BY columns recorded from executed statements
+WORKLOAD_MAX_PATTERNS = 256
+ADVISOR_MIN_EXECUTIONS = int(os.environ.get('DBONLY_ADVISOR_MIN_EXECUTIONS', 3))
+ADVISOR_MAX_INDEX_COLUMNS = 4
+ADVISOR_MAX_RECOMMENDATIONS = 20
+ADVISOR_EQUALITY_OPS = ('=', 'IN', 'IS NULL')
+ADVISOR_RANGE_OPS = ('<', '<=', '>', '>=', 'BETWEEN', 'LIKE')
+
+# Read-replica routing for MySQL/PostgreSQL profiles
+REPLICA_DB_TYPES = ('mysql', 'postgresql')
+REPLICA_STRATEGIES = ('round_robin', 'least_latency')
+REPLICA_HEALTH_INTERVAL = float(os.environ.get('DBONLY_REPLICA_HEALTH_INTERVAL', 10))
+REPLICA_READ_YOUR_WRITES_WINDOW = float(os.environ.get('DBONLY_READ_YOUR_WRITES_WINDOW', 5))
+
+# Cross-connection table copy
+COPY_BATCH_SIZE = 1000
+COPY_QUEUE_DEPTH = 8
+COPY_MAX_WORKERS = 8
+
+# Fan-out queries across many connections
+FAN_OUT_MAX_WORKERS = 32
+FAN_OUT_DEFAULT_TIMEOUT = 30.0
+
+# Parallel primary-key range scans
+SCAN_MAX_WORKERS = 8
+SCAN_CHUNKS_PER_WORKER = 4
+SCAN_MAX_CHUNKS = SCAN_MAX_WORKERS * SCAN_CHUNKS_PER_WORKER * 8
+
+# Column type per portable type family, used when creating copy targets
+COPY_TYPE_MAP = {
+    'sqlite': {'integer': 'INTEGER', 'real': 'REAL', 'decimal': 'NUMERIC', 'text': 'TEXT', 'blob': 'BLOB',
+               'datetime': 'TIMESTAMP', 'date': 'DATE', 'time': 'TIME', 'boolean': 'BOOLEAN', 'any': ''},
+    'mysql': {'integer': 'BIGINT', 'real': 'DOUBLE', 'decimal': 'DECIMAL', 'text': 'LONGTEXT', 'blob': 'LONGBLOB',
+              'datetime': 'DATETIME', 'date': 'DATE', 'time': 'TIME', 'boolean': 'BOOLEAN', 'any': 'LONGTEXT'},
+    'postgresql': {'integer': 'BIGINT', 'real': 'DOUBLE PRECISION', 'decimal': 'NUMERIC', 'text': 'TEXT', 'blob': 'BYTEA',
+                   'datetime': 'TIMESTAMP', 'date': 'DATE', 'time': 'TIME', 'boolean': 'BOOLEAN', 'any': 'TEXT'},
+    'mssql': {'integer': 'BIGINT', 'real': 'FLOAT', 'decimal': 'DECIMAL', 'text': 'NVARCHAR(MAX)', 'blob': 'VARBINARY(MAX)',
+              'datetime': 'DATETIME2', 'date': 'DATE', 'time': 'TIME', 'boolean': 'BIT', 'any': 'NVARCHAR(MAX)'},
+}
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after, queue_depth):
+        super().__init__("Too many requests queued for this connection")
+        self.retry_after = retry_after
+        self.queue_depth = queue_depth
+
+class MemoryBudgetError(Exception):
+    def __init__(self, requested, in_flight, budget, retry_after=1):
+        super().__init__(f"Memory budget exceeded: {requested} more bytes requested with {in_flight} of "
+                         f"{budget} bytes in flight")
+        self.requested = requested
+        self.in_flight = in_flight
+        self.budget = budget
+        self.retry_after = retry_after
+
+class MemoryLease:
+    """What one request has charged against the memory budget"""
+    def __init__(self):
+        self.charged = 0
+        self.wait_ms = 0.0
+        self.traced_start = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+    
+    def retained(self):
+        """Traced bytes allocated since the request began and still alive (other requests add noise)"""
+        if self.traced_start is None or not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.get_traced_memory()[0] - self.traced_start
+
+class MemoryBudget:
+    """Process-wide cap on estimated bytes materialized by in-flight requests
+    
+    Each worker process has its own; serve_workers gives every worker an equal share.
+    """
+    def __init__(self, budget=MEMORY_BUDGET, max_wait=MEMORY_BUDGET_WAIT):
+        self.budget = budget
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.reserved = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+    
+    @property
+    def current(self):
+        return getattr(self._local, 'lease', None)
+    
+    def begin(self):
+        self._local.lease = MemoryLease()
+        return self._local.lease
+    
+    @contextlib.contextmanager
+    def attach(self, lease):
+        """Charge a helper thread's fetches to the request that started it"""
+        previous = self.current
+        self._local.lease = lease
+        try:
+            yield
+        finally:
+            self._local.lease = previous
+    
+    def charge(self, nbytes, enforce=True):
+        """Account for nbytes more held by the current request; no-op outside a request
+        
+        With enforce=False the bytes are only counted: used for bodies that already exist,
+        where refusing them would free nothing.
+        """
+        lease = self.current
+        if lease is None or nbytes <= 0:
+            return
+        with self._cond:
+            if enforce and self.budget and self.in_flight + nbytes > self.budget:
+                # Waiting while holding memory could deadlock two large requests, so only
+                # a request that holds nothing yet queues
+                if lease.charged or nbytes > self.budget:
+                    raise MemoryBudgetError(nbytes, self.in_flight, self.budget)
+                start_time = time.perf_counter()
+                deadline = start_time + self.max_wait
+                while self.in_flight + nbytes > self.budget:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        raise MemoryBudgetError(nbytes, self.in_flight, self.budget, math.ceil(self.max_wait))
+                    self._cond.wait(remaining)
+                lease.wait_ms += (time.perf_counter() - start_time) * 1000
+            self.in_flight += nbytes
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            lease.charged += nbytes
+    
+    def release(self, nbytes):
+        """Give back bytes the current request no longer holds (copy batches once written)"""
+        lease = self.current
+        if lease is None or nbytes <= 0:
+            return
+        with self._cond:
+            nbytes = min(nbytes, lease.charged)
+            lease.charged -= nbytes
+            self.in_flight -= nbytes
+            self._cond.notify_all()
+    
+    def reserve(self, nbytes):
+        """Hold bytes beyond any request (cached results); False when they don't fit"""
+        with self._cond:
+            if self.budget and self.in_flight + nbytes > self.budget:
+                return False
+            self.in_flight += nbytes
+            self.reserved += nbytes
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return True
+    
+    def unreserve(self, nbytes):
+        if nbytes <= 0:
+            return
+        with self._cond:
+            self.in_flight -= nbytes
+            self.reserved -= nbytes
+            self._cond.notify_all()
+    
+    def end(self):
+        lease = self.current
+        if lease is None:
+            return None
+        self._local.lease = None
+        with self._cond:
+            self.in_flight -= lease.charged
+            self._cond.notify_all()
+        return lease
+    
+    def status(self):
+        with self._cond:
+            report = {"budget_bytes": self.budget, "in_flight_bytes": self.in_flight,
+                      "peak_in_flight_bytes": self.peak_in_flight, "reserved_bytes": self.reserved}
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report.update(traced_bytes=current, traced_peak_bytes=peak)
+        return report
+
+class ConnectionScheduler:
+    """Priority queue in front of a connection's driver handle"""
+    def __init__(self, slots=SCHEDULER_SLOTS, max_depth=SCHEDULER_MAX_QUEUE_DEPTH):
+        self.slots = slots
+        self.max_depth = max_depth
+        self.avg_service_ms = 0.0
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = 0
+        self._running = 0
+        self._side_busy = False
+    
+    def acquire(self, priority, timeout=SCHEDULER_MAX_WAIT):
+        """Wait for a slot; returns the time spent queued in ms"""
+        with self._cond:
+            if len(self._waiting) >= self.max_depth:
+                raise QueueFullError(self.retry_after(), len(self._waiting))
+            # Sequence numbers keep requests of the same class in arrival order
+            ticket = (priority, self._sequence)
+            self._sequence += 1
+            heapq.heappush(self._waiting, ticket)
+            start_time = time.perf_counter()
+            deadline = start_time + timeout
+            
+            while self._running >= self.slots or self._waiting[0] != ticket:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                    raise QueueFullError(self.retry_after(), len(self._waiting))
+                self._cond.wait(remaining)
+            
+            heapq.heappop(self._waiting)
+            self._running += 1
+            return (time.perf_counter() - start_time) * 1000
+    
+    def release(self, service_ms):
+        with self._cond:
+            self._running -= 1
+            # Moving average of time per request, used for Retry-After hints
+            self.avg_service_ms = service_ms if not self.avg_service_ms else 0.8 * self.avg_service_ms + 0.2 * service_ms
+            self._cond.notify_all()
+    
+    def claim_side_lane(self):
+        """Take the side lane when the driver handle is busy or spoken for; False means queue as usual"""
+        with self._cond:
+            if self._side_busy or (self._running < self.slots and not self._waiting):
+                return False
+            self._side_busy = True
+            return True
+    
+    def release_side_lane(self):
+        with self._cond:
+            self._side_busy = False
+    
+    def retry_after(self):
+        """Seconds until the requests ahead are likely to have run"""
+        return max(1, math.ceil((len(self._waiting) + self._running) * self.avg_service_ms / 1000 / self.slots))
+    
+    def status(self):
+        with self._cond:
+            return {
+                "queued": len(self._waiting),
+                "running": self._running,
+                "side_lane_busy": self._side_busy,
+                "max_depth": self.max_depth,
+                "avg_service_ms": self.avg_service_ms
+            }
 
 class DatabaseConnection:
     def __init__(self, connection_id, connection_info, connection_obj, db_type):
+        self._handle_override = threading.local()
         self.connection_id = connection_id
         self.connection_info = connection_info
         self.connection_obj = connection_obj
@@ -47,25 +476,756 @@ class DatabaseConnection:
         self.created_at = datetime.now()
         self.last_used = datetime.now()
         self.is_active = True
+        self.profile = None
+        self.schema_cache = {}
+        self.profile_cache = ProfileCache()
+        self.table_versions = {}
+        self.write_epoch = 0
+        self.replicas = []
+        self.replica_strategy = 'round_robin'
+        self.read_your_writes = True
+        self.last_write_at = None
+        self._replica_cursor = 0
+        self._replica_lock = threading.Lock()
+        self.replica_timer = None
+        self.scheduler = ConnectionScheduler()
+        self.snapshots = {}
+        self.workload = WorkloadLog()
+        self.side_handle = None
+        self.side_lock = threading.Lock()
+    
+    @property
+    def connection_obj(self):
+        """The driver handle, or the side handle while this thread runs a request on it"""
+        override = getattr(self._handle_override, 'conn', None)
+        return override if override is not None else self._connection_obj
+    
+    @connection_obj.setter
+    def connection_obj(self, conn):
+        self._connection_obj = conn
+    
+    @contextlib.contextmanager
+    def using_handle(self, conn):
+        self._handle_override.conn = conn
+        try:
+            yield
+        finally:
+            self._handle_override.conn = None
+
+class WorkloadLog:
+    """Predicate and ORDER BY column patterns per table, with how often and how long they ran"""
+    def __init__(self, max_patterns=WORKLOAD_MAX_PATTERNS):
+        self.max_patterns = max_patterns
+        self.patterns = {}
+        self.writes = {}
+        self._lock = threading.Lock()
+    
+    def record(self, table_name, equality=(), ranges=(), order_by=(), elapsed_ms=0.0, rows=0, statement=None):
+        """Count one execution; order_by is (column, descending) pairs, statement the (sql, params) to EXPLAIN"""
+        equality = tuple(sorted(set(equality)))
+        ranges = tuple(sorted(set(ranges) - set(equality)))
+        order_by = tuple(order_by)
+        if not table_name or not (equality or ranges or order_by):
+            return
+        key = (table_name, equality, ranges, order_by)
+        with self._lock:
+            entry = self.patterns.get(key)
+            if entry is None:
+                if len(self.patterns) >= self.max_patterns:
+                    # The least used pattern makes room
+                    del self.patterns[min(self.patterns, key=lambda k: (self.patterns[k]['count'], self.patterns[k]['last_seen']))]
+                entry = self.patterns[key] = {
+                    "table": table_name, "equality": list(equality), "ranges": list(ranges),
+                    "order_by": [{"column": col, "direction": "desc" if desc else "asc"} for col, desc in order_by],
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "last_seen": None, "statement": None
+                }
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += rows
+            entry['last_seen'] = datetime.now().isoformat()
+            if statement is not None:
+                entry['statement'] = statement
+    
+    def record_write(self, table_name):
+        if table_name:
+            with self._lock:
+                self.writes[table_name] = self.writes.get(table_name, 0) + 1
+    
+    def entries(self, table_name=None):
+        with self._lock:
+            return [dict(entry) for entry in self.patterns.values()
+                    if table_name is None or entry['table'].lower() == table_name.lower()]
+    
+    def write_count(self, table_name):
+        with self._lock:
+            return sum(count for name, count in self.writes.items() if name.lower() == table_name.lower())
+    
+    def clear(self, table_name=None):
+        with self._lock:
+            for key in [key for key in self.patterns if table_name is None or key[0].lower() == table_name.lower()]:
+                del self.patterns[key]
+            for name in [name for name in self.writes if table_name is None or name.lower() == table_name.lower()]:
+                del self.writes[name]
+
+class TableSnapshot:
+    """A local SQLite copy of a remote table or query result
+    
+    The dirty flag lives in the file's metadata, so workers that share the file see
+    each other's writes; the inode tells when another worker has swapped in a rebuild.
+    """
+    def __init__(self, path, meta, db_conn):
+        self.path = path
+        self.meta = meta
+        self.db_conn = db_conn
+        self.inode = os.stat(path).st_ino
+        self.lock = threading.Lock()
+    
+    @property
+    def name(self):
+        return self.meta['name']
+    
+    @property
+    def dirty(self):
+        return bool(self.meta.get('written_since_refresh'))
+    
+    def save_meta(self):
+        conn = self.db_conn.connection_obj
+        conn.execute(f"UPDATE {SNAPSHOT_META_TABLE} SET value = ? WHERE key = 'meta'", [json.dumps(self.meta)])
+        conn.commit()
+    
+    def reload_meta(self):
+        row = self.db_conn.connection_obj.execute(f"SELECT value FROM {SNAPSHOT_META_TABLE} WHERE key = 'meta'").fetchone()
+        self.meta = json.loads(row[0])
+    
+    def mark_dirty(self):
+        with self.lock:
+            if not self.dirty:
+                self.meta['written_since_refresh'] = True
+                self.save_meta()
+    
+    def status(self):
+        age = (datetime.now() - datetime.fromisoformat(self.meta['refreshed_at'])).total_seconds()
+        return {
+            "name": self.name,
+            "source_table": self.meta.get('source_table'),
+            "query": self.meta.get('query'),
+            "key_columns": self.meta.get('key_columns'),
+            "change_column": self.meta.get('change_column'),
+            "watermark": self.meta.get('watermark'),
+            "rows": self.meta.get('rows'),
+            "size_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "created_at": self.meta['created_at'],
+            "refreshed_at": self.meta['refreshed_at'],
+            "last_refresh_mode": self.meta.get('last_refresh_mode'),
+            "age_seconds": round(age, 1),
+            # Writes made through the app since the refresh are not in the copy yet
+            "written_since_refresh": self.dirty,
+            "stale": self.dirty or age > SNAPSHOT_STALE_AFTER
+        }
+
+class ReplicaConnection:
+    def __init__(self, profile, connection_obj=None, error=None):
+        self.profile = profile
+        self.host = profile['host']
+        self.port = profile['port']
+        self.connection_obj = connection_obj
+        self.healthy = connection_obj is not None
+        self.latency_ms = None
+        self.last_checked = None
+        self.last_error = error
+        self.failures = 0 if connection_obj is not None else 1
+        # Held while a query or a health check uses the handle
+        self.lock = threading.Lock()
+    
+    def status(self):
+        return {
+            "host": self.host,
+            "port": self.port,
+            "healthy": self.healthy,
+            "latency_ms": self.latency_ms,
+            "failures": self.failures,
+            "last_error": self.last_error
+        }
+
+class MetricsRegistry:
+    """Thread-safe counters grouped by section, exposed through /api/metrics"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sections = {}
+    
+    def add(self, section, **values):
+        with self._lock:
+            counters = self._sections.setdefault(section, {})
+            for name, value in values.items():
+                counters[name] = counters.get(name, 0) + value
+    
+    def snapshot(self):
+        with self._lock:
+            return {section: dict(counters) for section, counters in self._sections.items()}
+
+class Trace:
+    """Spans recorded while serving one request"""
+    def __init__(self, trace_id, name):
+        self.trace_id = trace_id
+        self.name = name
+        self.breakdown = False
+        self.spans = []
+        self.depth = 0
+        self.dropped = 0
+    
+    def begin(self, name, **attrs):
+        span = {"name": name, "start": time.perf_counter(), "wall": time.time(), "end": None,
+                "depth": self.depth, "attrs": attrs}
+        self.depth += 1
+        if len(self.spans) < TRACE_MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        return span
+    
+    def end(self, span, **attrs):
+        span['end'] = time.perf_counter()
+        span['attrs'].update(attrs)
+        self.depth -= 1
+    
+    def phases(self):
+        """Milliseconds per span name over the spans finished so far"""
+        totals = {}
+        for span in self.spans:
+            if span['end'] is not None and span['depth'] > 0:
+                totals[span['name']] = totals.get(span['name'], 0.0) + (span['end'] - span['start']) * 1000
+        return {name: round(ms, 3) for name, ms in totals.items()}
+
+class Tracer:
+    """Hands out spans for the request being served on the current thread
+    
+    Work moved to other threads (parallel scans, fan-out) is not traced; span() is
+    a no-op wherever no request is active.
+    """
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+        self._local = threading.local()
+    
+    @property
+    def current(self):
+        return getattr(self._local, 'trace', None)
+    
+    def start(self, name, trace_id=None):
+        trace = Trace(trace_id or uuid.uuid4().hex, name)
+        self._local.trace = trace
+        return trace
+    
+    def finish(self, trace):
+        if self.current is trace:
+            self._local.trace = None
+        if self.exporter is not None:
+            try:
+                self.exporter.export(trace)
+            except Exception as e:
+                logger.error(f"Trace export error: {str(e)}")
+    
+    @contextlib.contextmanager
+    def span(self, name, **attrs):
+        trace = self.current
+        if trace is None:
+            yield None
+            return
+        span = trace.begin(name, **attrs)
+        try:
+            yield span
+        finally:
+            trace.end(span)
+
+class ChromeTraceExporter:
+    """Appends spans to a file in the Chrome trace event format (JSON array, no closing bracket)
+    
+    The file is opened once, before workers fork, with O_APPEND; each request's events go out
+    in a single os.write, so events from several workers never interleave or reorder the header.
+    """
+    def __init__(self, path):
+        self.path = path
+        try:
+            self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o644)
+            os.write(self._fd, b"[\n")
+        except FileExistsError:
+            self._fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+            if os.fstat(self._fd).st_size == 0:
+                os.write(self._fd, b"[\n")
+    
+    def export(self, trace):
+        pid = os.getpid()
+        tid = threading.get_ident() % 2 ** 31
+        lines = []
+        for span in trace.spans:
+            if span['end'] is None:
+                continue
+            event = {
+                "name": span['name'], "cat": "dbonly", "ph": "X", "pid": pid, "tid": tid,
+                "ts": round(span['wall'] * 1e6), "dur": round((span['end'] - span['start']) * 1e6, 1),
+                "args": {"trace_id": trace.trace_id, **span['attrs']}
+            }
+            lines.append(json.dumps(event, default=str) + ",\n")
+        if lines:
+            os.write(self._fd, ''.join(lines).encode('utf-8'))
+
+class TracingMiddleware:
+    """WSGI wrapper that opens a trace per /api/* request and times writing the body out"""
+    def __init__(self, wsgi_app, tracer):
+        self.wsgi_app = wsgi_app
+        self.tracer = tracer
+    
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if not path.startswith('/api/'):
+            return self.wsgi_app(environ, start_response)
+        
+        # A caller-supplied id lets client and server spans be joined up
+        trace_id = environ.get('HTTP_X_TRACE_ID', '')
+        if not re.fullmatch(r'[0-9A-Za-z-]{8,64}', trace_id):
+            trace_id = None
+        trace = self.tracer.start(f"{environ.get('REQUEST_METHOD')} {path}", trace_id)
+        environ['dbonly.trace'] = trace
+        root = trace.begin('http.request', method=environ.get('REQUEST_METHOD'), path=path)
+        try:
+            dispatch = trace.begin('flask.dispatch')
+            body = self.wsgi_app(environ, start_response)
+            trace.end(dispatch)
+        except BaseException:
+            trace.end(root)
+            self.tracer.finish(trace)
+            raise
+        return self._write(trace, root, body)
+    
+    def _write(self, trace, root, body):
+        # Time between handing a chunk to the server and being asked for the next is the write
+        write = trace.begin('http.write')
+        sent = 0
+        try:
+            for chunk in body:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+            trace.end(write, bytes=sent)
+            trace.end(root)
+            self.tracer.finish(trace)
+
+class DriverRegistry:
+    """Optional modules imported on first use, with the import time of each kept for /api/startup"""
+    def __init__(self, modules):
+        self.modules = modules
+        self._loaded = {}
+        self._import_ms = {}
+        self._lock = threading.Lock()
+    
+    def get(self, name):
+        """The imported module, or None when it is not installed"""
+        if name not in self._loaded:
+            with self._lock:
+                if name not in self._loaded:
+                    import_path, _ = self.modules[name]
+                    start_time = time.perf_counter()
+                    try:
+                        importlib.import_module(import_path)
+                        module = importlib.import_module(name)
+                    except ImportError:
+                        module = None
+                    self._import_ms[name] = (time.perf_counter() - start_time) * 1000
+                    self._loaded[name] = module
+        return self._loaded[name]
+    
+    def available(self, name):
+        return self.get(name) is not None
+    
+    def status(self):
+        """Per-module report that does not import anything not yet loaded"""
+        report = {}
+        for name, (import_path, package) in self.modules.items():
+            if name in self._loaded:
+                installed = self._loaded[name] is not None
+            else:
+                installed = importlib.util.find_spec(name) is not None
+            report[name] = {
+                "installed": installed,
+                "loaded": installed and name in self._loaded,
+                "import_ms": self._import_ms.get(name),
+                "package": package
+            }
+        return report
+
+class ConnectionRegistry:
+    """Connection profiles shared by worker processes through a local SQLite file"""
+    def __init__(self, path):
+        self.path = path
+        # Profiles include passwords: the file is created owner-only before SQLite opens it, and SQLite
+        # gives the -wal and -shm files the database file's permissions
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS connections (connection_id TEXT PRIMARY KEY, profile TEXT NOT NULL, "
+                "connection_info TEXT NOT NULL, worker_pid INTEGER NOT NULL, shareable INTEGER NOT NULL, created_at TEXT NOT NULL)")
+            conn.commit()
+            for suffix in ('-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.chmod(path + suffix, 0o600)
+        finally:
+            conn.close()
+    
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+    
+    def register(self, connection_id, profile, connection_info):
+        # In-memory SQLite databases exist only inside the process that opened them
+        shareable = not (profile['type'].lower() == 'sqlite' and profile.get('database') == ':memory:')
+        conn = self._connect()
+        try:
+            conn.execute("INSERT INTO connections VALUES (?, ?, ?, ?, ?, ?)",
+                         [connection_id, json.dumps(profile), json.dumps(connection_info, default=str),
+                          os.getpid(), int(shareable), datetime.now().isoformat()])
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def lookup(self, connection_id):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT profile, connection_info, worker_pid, shareable FROM connections WHERE connection_id = ?",
+                               [connection_id]).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {"profile": json.loads(row[0]), "connection_info": json.loads(row[1]),
+                "worker_pid": row[2], "shareable": bool(row[3])}
+    
+    def remove(self, connection_id):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM connections WHERE connection_id = ?", [connection_id])
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def ids(self):
+        conn = self._connect()
+        try:
+            return {row[0] for row in conn.execute("SELECT connection_id FROM connections")}
+        finally:
+            conn.close()
+
+class HandoffCache:
+    """Live connect results from connection tests, waiting to be adopted by create_connection"""
+    def __init__(self, ttl=HANDOFF_TTL, max_entries=HANDOFF_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._timer = None
+    
+    def fingerprint(self, profile):
+        """Hash of the fields that decide what a connection opens; names and colours don't count"""
+        fields = {key: profile.get(key) for key in HANDOFF_PROFILE_KEYS if profile.get(key) not in (None, '')}
+        fields['type'] = str(fields.get('type', '')).lower()
+        if 'port' in fields:
+            fields['port'] = str(fields['port'])
+        return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    
+    def park(self, profile, result):
+        if self.ttl <= 0:
+            self._close(result)
+            return
+        key = self.fingerprint(profile)
+        with self._lock:
+            replaced = self._entries.pop(key, None)
+            self._entries[key] = (result, time.monotonic())
+            # Oldest first out once the cache is full
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.pop(next(iter(self._entries)))[0])
+            self._schedule_sweep()
+        for stale in ([replaced[0]] if replaced else []) + evicted:
+            self._close(stale)
+        metrics.add('handoff', parked=1, evicted=len(evicted))
+    
+    def claim(self, profile):
+        """The parked connect result for this profile, or None when there is no fresh one"""
+        with self._lock:
+            entry = self._entries.pop(self.fingerprint(profile), None)
+        if entry is None:
+            return None
+        result, parked_at = entry
+        if time.monotonic() - parked_at > self.ttl:
+            self._close(result)
+            metrics.add('handoff', expired=1)
+            return None
+        metrics.add('handoff', adopted=1)
+        return result
+    
+    def sweep(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, parked_at) in self._entries.items() if now - parked_at > self.ttl]
+            results = [self._entries.pop(key)[0] for key in expired]
+            self._timer = None
+            self._schedule_sweep()
+        for result in results:
+            self._close(result)
+        if results:
+            metrics.add('handoff', expired=len(results))
+    
+    def _schedule_sweep(self):
+        # Caller holds the lock; the timer only runs while something is parked
+        if self._timer is None and self._entries:
+            oldest = min(parked_at for _, parked_at in self._entries.values())
+            delay = max(oldest + self.ttl - time.monotonic(), 0) + 0.05
+            self._timer = threading.Timer(delay, self.sweep)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _close(self, result):
+        try:
+            if hasattr(result['connection'], 'close'):
+                result['connection'].close()
+        except Exception as e:
+            logger.warning(f"Closing parked connection failed: {str(e)}")
+
+class CachedResult:
+    """A fetched result stored column by column, with derived arrays built on first use
+    
+    truncated_by is set when the query's row or byte cap cut the result short, so
+    analyses of it only cover the rows that were fetched.
+    """
+    def __init__(self, result_id, connection_id, query, columns, rows, size, truncated_by=None):
+        self.result_id = result_id
+        self.connection_id = connection_id
+        self.query = query
+        self.columns = list(columns)
+        self.values = {col: [row.get(col) for row in rows] for col in self.columns}
+        self.row_count = len(rows)
+        self.size = size
+        self.truncated_by = truncated_by
+        self.created_at = datetime.now()
+        self.derived = {}
+        self._lock = threading.Lock()
+    
+    def derive(self, key, build):
+        """Memoized per-result computation such as a column's codes or float array"""
+        with self._lock:
+            if key not in self.derived:
+                self.derived[key] = build()
+            return self.derived[key]
+    
+    def info(self):
+        return {"result_id": self.result_id, "connection_id": self.connection_id, "columns": self.columns,
+                "row_count": self.row_count, "truncated_by": self.truncated_by,
+                "created_at": self.created_at.isoformat()}
+
+class ProfileCache:
+    """Least-recently-used table profiles of one connection, keyed by (table, options...)"""
+    def __init__(self, max_entries=PROFILE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+            return entry
+    
+    def put(self, key, entry):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+    
+    def drop(self, table_name=None):
+        with self._lock:
+            for key in [key for key in self._entries if table_name is None or key[0] == table_name]:
+                del self._entries[key]
+
+class ResultCache:
+    """Least-recently-used results, bounded by count and estimated size
+    
+    Entries live in the process that ran the query, and their bytes stay reserved
+    against the memory budget until they are evicted or dropped.
+    """
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def put(self, entry):
+        if entry.size > self.max_bytes:
+            return False
+        with self._lock:
+            # Room is made first so older entries don't count against the new one's reservation
+            freed = 0
+            while self._entries and (len(self._entries) >= self.max_entries or self.size + entry.size > self.max_bytes):
+                oldest = self._entries.pop(next(iter(self._entries)))
+                self.size -= oldest.size
+                freed += oldest.size
+            memory_budget.unreserve(freed)
+            if not memory_budget.reserve(entry.size):
+                return False
+            self._entries[entry.result_id] = entry
+            self.size += entry.size
+        return True
+    
+    def get(self, result_id):
+        with self._lock:
+            entry = self._entries.pop(result_id, None)
+            if entry is not None:
+                # Re-inserted so dict order stays least recently used first
+                self._entries[result_id] = entry
+            return entry
+    
+    def drop(self, result_id=None, connection_id=None):
+        with self._lock:
+            doomed = [key for key, entry in self._entries.items()
+                      if key == result_id or (connection_id is not None and entry.connection_id == connection_id)]
+            freed = sum(self._entries.pop(key).size for key in doomed)
+            self.size -= freed
+            memory_budget.unreserve(freed)
+            return len(doomed)
 
 class DatabaseManager:
     def __init__(self):
         self.connections = {}
+        self.registry = None
+        self.handoff = HandoffCache()
+        self.result_cache = ResultCache()
+        self._open_lock = threading.Lock()
+        self._registry_synced_at = 0.0
+    
+    def _get_connection(self, connection_id):
+        """The connection for an id; with workers, re-opened here from the registry if another worker created it"""
+        with tracer.span('connection.checkout'):
+            return self._checkout_connection(connection_id)
+    
+    def _checkout_connection(self, connection_id):
+        if self.registry is None:
+            return self.connections.get(connection_id)
+        
+        self._sync_registry()
+        db_conn = self.connections.get(connection_id)
+        if db_conn is not None:
+            return db_conn
+        
+        entry = self.registry.lookup(connection_id)
+        if entry is None:
+            return None
+        if not entry['shareable'] and entry['worker_pid'] != os.getpid():
+            logger.warning(f"Connection {connection_id} is an in-memory database owned by worker {entry['worker_pid']}")
+            return None
+        
+        with self._open_lock:
+            db_conn = self.connections.get(connection_id)
+            if db_conn is None:
+                db_conn = self._open_connection(connection_id, entry['profile'])
+                if not isinstance(db_conn, DatabaseConnection):
+                    logger.error(f"Re-opening connection {connection_id} failed: {db_conn.get('error')}")
+                    return None
+        return db_conn
+    
+    def _sync_registry(self):
+        """Close local handles for connections another worker has closed"""
+        now = time.monotonic()
+        if now - self._registry_synced_at < REGISTRY_SYNC_INTERVAL:
+            return
+        # Skipped while a connection is being opened so one not yet registered is not dropped
+        if not self._open_lock.acquire(blocking=False):
+            return
+        try:
+            self._registry_synced_at = now
+            live = self.registry.ids()
+            for connection_id in [cid for cid in self.connections if cid not in live]:
+                self._close_handles(self.connections.pop(connection_id))
+        finally:
+            self._open_lock.release()
+    
+    def _worker_local_error(self, feature):
+        """Error for a feature whose state lives in one worker process, when several workers serve requests"""
+        if self.registry is None:
+            return None
+        return {"success": False,
+                "error": f"{feature} keeps its state inside one worker process; run with DBONLY_WORKERS=1 to use it"}
+    
+    def connection_count(self):
+        if self.registry is not None:
+            return len(self.registry.ids())
+        return len(self.connections)
     
     def _get_connection_id(self):
         return str(uuid.uuid4())
     
-    def connect_sqlite(self, database_path):
+    def _resolve_sqlite_options(self, profile_name=None, options=None):
+        """Merge a named SQLite preset with explicit per-profile overrides"""
+        profile_name = (profile_name or 'default').lower().replace(' ', '_')
+        if profile_name not in SQLITE_PROFILES:
+            raise ValueError(f"Unknown SQLite profile: {profile_name}")
+        
+        settings = dict(SQLITE_PROFILES[profile_name])
+        settings.update(options or {})
+        
+        for key, value in settings.items():
+            if key in SQLITE_PRAGMA_CHOICES:
+                value = str(value).upper()
+                if value not in SQLITE_PRAGMA_CHOICES[key]:
+                    raise ValueError(f"Invalid value for {key}: {value}")
+                settings[key] = value
+            elif key in SQLITE_PRAGMA_INTEGERS:
+                settings[key] = int(value)
+            elif key in ('read_only', 'immutable'):
+                settings[key] = bool(value)
+            else:
+                raise ValueError(f"Unsupported SQLite option: {key}")
+        
+        if settings.get('immutable'):
+            settings['read_only'] = True
+        if settings.get('read_only'):
+            # Journal changes need write access to the file
+            settings.pop('journal_mode', None)
+        
+        return profile_name, settings
+    
+    def connect_sqlite(self, database_path, profile_name=None, options=None):
         try:
             if not os.path.exists(database_path):
                 return {"success": False, "error": f"Database file not found: {database_path}"}
             
-            conn = sqlite3.connect(database_path, check_same_thread=False)
+            profile_name, settings = self._resolve_sqlite_options(profile_name, options)
+            timeout = settings.get('busy_timeout', 5000) / 1000.0
+            
+            if settings.get('read_only'):
+                uri = f"{pathlib.Path(os.path.abspath(database_path)).as_uri()}?mode=ro"
+                if settings.get('immutable'):
+                    uri += "&immutable=1"
+                conn = sqlite3.connect(uri, uri=True, timeout=timeout, check_same_thread=False)
+            else:
+                conn = sqlite3.connect(database_path, timeout=timeout, check_same_thread=False)
             conn.row_factory = sqlite3.Row
             
             cursor = conn.cursor()
+            # Pragma values are validated against fixed choices/ints above
+            for pragma in ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout'):
+                if pragma in settings:
+                    cursor.execute(f"PRAGMA {pragma} = {settings[pragma]}")
+            if settings.get('read_only'):
+                cursor.execute("PRAGMA query_only = ON")
+            
             cursor.execute("SELECT sqlite_version()")
             version = cursor.fetchone()[0]
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
             cursor.close()
             
             return {
@@ -74,13 +1234,19 @@ class DatabaseManager:
                 "type": "sqlite",
                 "version": version,
                 "database": os.path.basename(database_path),
-                "path": database_path
+                "path": database_path,
+                "sqlite_profile": profile_name,
+                "sqlite_settings": dict(settings, journal_mode=journal_mode.upper())
             }
         except Exception as e:
             logger.error(f"SQLite connection error: {str(e)}")
             return {"success": False, "error": str(e)}
     
     def connect_mysql(self, host, port, username, password, database):
+        pymysql = drivers.get('pymysql')
+        if pymysql is None:
+            return {"success": False, "error": "MySQL support not available. Please install PyMySQL: pip install PyMySQL"}
+        
         try:
             conn = pymysql.connect(
                 host=host, port=port, user=username, password=password,
@@ -102,7 +1268,8 @@ class DatabaseManager:
             return {"success": False, "error": str(e)}
     
     def connect_postgresql(self, host, port, username, password, database):
-        if not PSYCOPG2_AVAILABLE:
+        psycopg2 = drivers.get('psycopg2')
+        if psycopg2 is None:
             return {"success": False, "error": "PostgreSQL support not available. Please install psycopg2-binary: pip install psycopg2-binary"}
         
         try:
@@ -124,7 +1291,8 @@ class DatabaseManager:
             return {"success": False, "error": str(e)}
     
     def connect_mssql(self, host, port, username, password, database):
-        if not PYODBC_AVAILABLE:
+        pyodbc = drivers.get('pyodbc')
+        if pyodbc is None:
             return {"success": False, "error": "MSSQL support not available. Please install pyodbc: pip install pyodbc"}
         
         try:
@@ -144,27 +1312,57 @@ class DatabaseManager:
             logger.error(f"MSSQL connection error: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def test_connection(self, profile):
+    def connect_mongodb(self, host, port, username, password, database):
+        pymongo = drivers.get('pymongo')
+        if pymongo is None:
+            return {"success": False, "error": "MongoDB support not available. Please install pymongo: pip install pymongo"}
+        
         try:
-            db_type = profile['type'].lower()
+            client = pymongo.MongoClient(
+                host=host, port=int(port), username=username or None, password=password or None,
+                serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS
+            )
+            version = client.server_info()['version']
             
-            if db_type == 'sqlite':
-                result = self.connect_sqlite(profile['database'])
-            elif db_type == 'mysql':
-                port = profile.get('port', 3306)
-                result = self.connect_mysql(profile['host'], port, profile['username'], profile['password'], profile['database'])
-            elif db_type == 'postgresql':
-                port = profile.get('port', 5432)
-                result = self.connect_postgresql(profile['host'], port, profile['username'], profile['password'], profile['database'])
-            elif db_type == 'mssql':
-                port = profile.get('port', 1433)
-                result = self.connect_mssql(profile['host'], port, profile['username'], profile['password'], profile['database'])
-            else:
-                return {"success": False, "error": f"Unsupported database type: {db_type}"}
+            return {
+                "success": True, "connection": client, "type": "mongodb",
+                "version": version, "host": host, "port": port, "database": database
+            }
+        except Exception as e:
+            logger.error(f"MongoDB connection error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def _connect_profile(self, profile):
+        """Open a driver connection for a connection profile"""
+        db_type = profile['type'].lower()
+        
+        if db_type == 'sqlite':
+            return self.connect_sqlite(profile['database'], profile.get('sqlite_profile'), profile.get('sqlite_options'))
+        elif db_type == 'mysql':
+            port = profile.get('port', 3306)
+            return self.connect_mysql(profile['host'], port, profile['username'], profile['password'], profile['database'])
+        elif db_type == 'postgresql':
+            port = profile.get('port', 5432)
+            return self.connect_postgresql(profile['host'], port, profile['username'], profile['password'], profile['database'])
+        elif db_type == 'mssql':
+            port = profile.get('port', 1433)
+            return self.connect_mssql(profile['host'], port, profile['username'], profile['password'], profile['database'])
+        elif db_type == 'mongodb':
+            port = profile.get('port', 27017)
+            return self.connect_mongodb(profile['host'], port, profile.get('username'), profile.get('password'), profile['database'])
+        else:
+            return {"success": False, "error": f"Unsupported database type: {db_type}"}
+    
+    def test_connection(self, profile):
+        try:
+            result = self._connect_profile(profile)
             
             if result['success']:
+                # Kept open for a create-connection of the same profile instead of being dropped
+                self.handoff.park(profile, result)
+                
                 # Return clean data without the connection object
-                return {
+                response = {
                     "success": True,
                     "type": result['type'],
                     "version": result.get('version', ''),
@@ -173,6 +1371,10 @@ class DatabaseManager:
                     "port": result.get('port', ''),
                     "path": result.get('path', '')
                 }
+                if 'sqlite_profile' in result:
+                    response['sqlite_profile'] = result['sqlite_profile']
+                    response['sqlite_settings'] = result['sqlite_settings']
+                return response
             else:
                 return result
                 
@@ -182,102 +1384,392 @@ class DatabaseManager:
     
     def create_connection(self, profile):
         try:
-            # First test the connection to get the actual connection object
-            db_type = profile['type'].lower()
-            
-            if db_type == 'sqlite':
-                result = self.connect_sqlite(profile['database'])
-            elif db_type == 'mysql':
-                port = profile.get('port', 3306)
-                result = self.connect_mysql(profile['host'], port, profile['username'], profile['password'], profile['database'])
-            elif db_type == 'postgresql':
-                port = profile.get('port', 5432)
-                result = self.connect_postgresql(profile['host'], port, profile['username'], profile['password'], profile['database'])
-            elif db_type == 'mssql':
-                port = profile.get('port', 1433)
-                result = self.connect_mssql(profile['host'], port, profile['username'], profile['password'], profile['database'])
-            else:
-                return {"success": False, "error": f"Unsupported database type: {db_type}"}
-            
-            if not result['success']:
-                return result
-            
             connection_id = self._get_connection_id()
-            
-            # Create a clean connection info without the actual connection object
-            connection_info = {
-                'name': profile['name'],
-                'type': profile['type'],
-                'color': profile.get('color', '#007bff'),
-                'version': result.get('version', ''),
-                'database': result.get('database', ''),
-                'host': result.get('host', ''),
-                'port': result.get('port', ''),
-                'path': result.get('path', '')
-            }
-            
-            db_connection = DatabaseConnection(
-                connection_id=connection_id,
-                connection_info=connection_info,
-                connection_obj=result['connection'],
-                db_type=profile['type']
-            )
-            
-            self.connections[connection_id] = db_connection
+            with self._open_lock:
+                db_connection = self._open_connection(connection_id, profile)
+                if not isinstance(db_connection, DatabaseConnection):
+                    return db_connection
+                
+                # Other workers re-open the same profile under this id when a request for it reaches them
+                if self.registry is not None:
+                    self.registry.register(connection_id, profile, db_connection.connection_info)
             
             return {
                 "success": True,
                 "connection_id": connection_id,
-                "connection_info": connection_info
+                "connection_info": db_connection.connection_info
             }
             
         except Exception as e:
             logger.error(f"Create connection error: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def execute_query(self, connection_id, query, query_type="auto"):
+    def _open_connection(self, connection_id, profile):
+        """Connect a profile and keep it under connection_id; the driver's error result on failure"""
+        # A handle left by a recent test of the same profile saves a second handshake
+        result = self.handoff.claim(profile) or self._connect_profile(profile)
+        
+        if not result['success']:
+            return result
+        
+        # Create a clean connection info without the actual connection object
+        connection_info = {
+            'name': profile['name'],
+            'type': profile['type'],
+            'color': profile.get('color', '#007bff'),
+            'version': result.get('version', ''),
+            'database': result.get('database', ''),
+            'host': result.get('host', ''),
+            'port': result.get('port', ''),
+            'path': result.get('path', '')
+        }
+        if 'sqlite_profile' in result:
+            connection_info['sqlite_profile'] = result['sqlite_profile']
+            connection_info['sqlite_settings'] = result['sqlite_settings']
+        
+        db_connection = DatabaseConnection(
+            connection_id=connection_id,
+            connection_info=connection_info,
+            connection_obj=result['connection'],
+            db_type=profile['type']
+        )
+        # Kept server-side so extra handles can be opened for parallel work
+        db_connection.profile = profile
+        
+        if profile.get('replicas'):
+            self._attach_replicas(db_connection, profile)
+            connection_info['replicas'] = [replica.status() for replica in db_connection.replicas]
+            connection_info['replica_strategy'] = db_connection.replica_strategy
+            self._schedule_replica_checks(db_connection)
+        
+        self.connections[connection_id] = db_connection
+        return db_connection
+    
+    def _attach_replicas(self, db_conn, profile):
+        """Open the read replicas listed in a MySQL/PostgreSQL profile"""
+        db_type = profile['type'].lower()
+        if db_type not in REPLICA_DB_TYPES:
+            raise ValueError(f"Read replicas are not supported for {db_type}")
+        
+        strategy = profile.get('replica_strategy', 'round_robin')
+        if strategy not in REPLICA_STRATEGIES:
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+        db_conn.replica_strategy = strategy
+        db_conn.read_your_writes = profile.get('read_your_writes', True)
+        
+        for replica in profile['replicas']:
+            # Replicas inherit credentials and database from the primary
+            replica_profile = dict(profile)
+            replica_profile.pop('replicas', None)
+            replica_profile.update(replica)
+            replica_profile.setdefault('port', profile.get('port', 3306 if db_type == 'mysql' else 5432))
+            
+            result = self._connect_profile(replica_profile)
+            if result['success']:
+                db_conn.replicas.append(ReplicaConnection(replica_profile, result['connection']))
+            else:
+                logger.warning(f"Replica {replica_profile['host']} unavailable: {result['error']}")
+                db_conn.replicas.append(ReplicaConnection(replica_profile, error=result['error']))
+    
+    def _schedule_replica_checks(self, db_conn):
+        """Re-check the replicas every REPLICA_HEALTH_INTERVAL on a timer, off the query path"""
+        if not db_conn.is_active or REPLICA_HEALTH_INTERVAL <= 0:
+            return
+        db_conn.replica_timer = threading.Timer(REPLICA_HEALTH_INTERVAL, self._run_replica_checks, args=(db_conn,))
+        db_conn.replica_timer.daemon = True
+        db_conn.replica_timer.start()
+    
+    def _run_replica_checks(self, db_conn):
+        for replica in db_conn.replicas:
+            if not db_conn.is_active:
+                return
+            # A replica busy with a query is reachable; it is checked on the next round
+            if replica.lock.acquire(blocking=False):
+                try:
+                    self._check_replica(replica)
+                finally:
+                    replica.lock.release()
+        self._schedule_replica_checks(db_conn)
+    
+    def _check_replica(self, replica):
+        """Ping a replica, reconnecting it if its handle was lost; the caller holds replica.lock"""
+        replica.last_checked = time.monotonic()
+        try:
+            if replica.connection_obj is None:
+                result = self._connect_profile(replica.profile)
+                if not result['success']:
+                    raise RuntimeError(result['error'])
+                replica.connection_obj = result['connection']
+            
+            start_time = time.perf_counter()
+            cursor = replica.connection_obj.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            latency = (time.perf_counter() - start_time) * 1000
+            
+            # Smooth latency so one slow ping doesn't flip the ranking
+            if replica.latency_ms is None:
+                replica.latency_ms = latency
+            else:
+                replica.latency_ms = 0.7 * replica.latency_ms + 0.3 * latency
+            replica.healthy = True
+            replica.failures = 0
+            replica.last_error = None
+        except Exception as e:
+            self._mark_replica_failed(replica, e)
+        return replica.healthy
+    
+    def _mark_replica_failed(self, replica, error):
+        logger.warning(f"Replica {replica.host}:{replica.port} failed: {str(error)}")
+        replica.healthy = False
+        replica.failures += 1
+        replica.last_error = str(error)
+        replica.last_checked = time.monotonic()
+        if replica.connection_obj is not None:
+            try:
+                replica.connection_obj.close()
+            except Exception:
+                pass
+            replica.connection_obj = None
+    
+    def _read_candidates(self, db_conn, query_type, use_primary=False):
+        """Order the replicas a read should try; the primary is always the fallback"""
+        if query_type != 'select' or use_primary or not db_conn.replicas:
+            return []
+        if db_conn.read_your_writes and db_conn.last_write_at is not None:
+            if time.monotonic() - db_conn.last_write_at < REPLICA_READ_YOUR_WRITES_WINDOW:
+                return []
+        
+        # Health and latency come from the background checks, so a dead replica never stalls a read
+        candidates = [replica for replica in db_conn.replicas if replica.healthy]
+        
+        if db_conn.replica_strategy == 'least_latency':
+            candidates.sort(key=lambda replica: replica.latency_ms if replica.latency_ms is not None else float('inf'))
+        elif candidates:
+            with db_conn._replica_lock:
+                start = db_conn._replica_cursor % len(candidates)
+                db_conn._replica_cursor += 1
+            candidates = candidates[start:] + candidates[:start]
+        return candidates
+    
+    def _is_connection_error(self, error):
+        """True for driver errors that mean the server is unreachable rather than the SQL is bad"""
+        # Only drivers already in use can have raised the error, so nothing new is imported here
+        error_types = []
+        if 'pymysql' in sys.modules:
+            pymysql = drivers.get('pymysql')
+            error_types.extend([pymysql.err.OperationalError, pymysql.err.InterfaceError])
+        if 'psycopg2' in sys.modules:
+            psycopg2 = drivers.get('psycopg2')
+            error_types.extend([psycopg2.OperationalError, psycopg2.InterfaceError])
+        return isinstance(error, tuple(error_types))
+    
+    def _execute_on(self, conn, db_type, query, query_type, max_rows=None, max_bytes=None):
+        if db_type == 'sqlite':
+            return self._execute_sqlite_query(conn, query, query_type, max_rows, max_bytes)
+        elif db_type == 'mysql':
+            return self._execute_mysql_query(conn, query, query_type, max_rows, max_bytes)
+        elif db_type == 'postgresql':
+            return self._execute_postgresql_query(conn, query, query_type, max_rows, max_bytes)
+        elif db_type == 'mssql':
+            return self._execute_mssql_query(conn, query, query_type, max_rows, max_bytes)
+        elif db_type == 'mongodb':
+            return self._execute_mongodb_query(conn, query)
+        else:
+            return {"success": False, "error": f"Unsupported database type: {db_type}"}
+    
+    def execute_query(self, connection_id, query, query_type="auto", use_primary=False, max_cell_size=MAX_CELL_SIZE,
+                      max_rows=QUERY_MAX_ROWS, max_bytes=QUERY_MAX_BYTES, auto_limit=True, cache_result=False):
         try:
-            if connection_id not in self.connections:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
                 return {"success": False, "error": "Connection not found"}
             
-            db_conn = self.connections[connection_id]
             conn = db_conn.connection_obj
             db_type = db_conn.db_type
             
-            if query_type == "auto":
+            if db_type == 'mongodb':
+                # MongoDB queries are find/aggregate/count specs against the connection's database
+                conn = self._mongo_database(db_conn)
+                query_type = 'select'
+            elif query_type == "auto":
                 query_type = self._detect_query_type(query)
             
+            # One row past the cap tells a full result apart from a truncated one
+            max_rows = int(max_rows) if max_rows else None
+            max_bytes = int(max_bytes) if max_bytes else None
+            row_limit_applied = False
+            if query_type == 'select' and max_rows and auto_limit and db_type != 'mongodb':
+                query, row_limit_applied = self._apply_row_limit(db_type, query, max_rows + 1)
+            
             db_conn.last_used = datetime.now()
             start_time = datetime.now()
             
-            if db_type == 'sqlite':
-                result = self._execute_sqlite_query(conn, query, query_type)
-            elif db_type == 'mysql':
-                result = self._execute_mysql_query(conn, query, query_type)
-            elif db_type == 'postgresql':
-                result = self._execute_postgresql_query(conn, query, query_type)
-            elif db_type == 'mssql':
-                result = self._execute_mssql_query(conn, query, query_type)
-            else:
-                return {"success": False, "error": f"Unsupported database type: {db_type}"}
+            result = None
+            served_by = "primary"
+            for replica in self._read_candidates(db_conn, query_type, use_primary):
+                with replica.lock:
+                    if replica.connection_obj is None:
+                        # Failed its health check since the candidates were picked
+                        continue
+                    try:
+                        result = self._execute_on(replica.connection_obj, db_type, query, query_type, max_rows, max_bytes)
+                        served_by = f"{replica.host}:{replica.port}"
+                        break
+                    except Exception as e:
+                        if not self._is_connection_error(e):
+                            raise
+                        self._mark_replica_failed(replica, e)
+            
+            if result is None:
+                if query_type != 'select':
+                    db_conn.last_write_at = time.monotonic()
+                result = self._execute_on(conn, db_type, query, query_type, max_rows, max_bytes)
+                if query_type != 'select':
+                    self._invalidate_table_caches(db_conn, schema_changed=query_type in ('ddl', 'other'))
             
             execution_time = (datetime.now() - start_time).total_seconds() * 1000
             
             if result['success']:
                 result['execution_time'] = execution_time
                 result['query_type'] = query_type
+                if db_conn.replicas:
+                    result['served_by'] = served_by
+                if 'truncated' in result:
+                    # The full count is only computed on request, through /api/query-count
+                    result['row_limit_applied'] = row_limit_applied
+                    result['total_count'] = None if result['truncated'] else result['row_count']
+                if db_type != 'mongodb' and query_type in ('select', 'insert', 'update', 'delete'):
+                    try:
+                        self._record_query_workload(db_conn, query, query_type, execution_time, result.get('row_count'))
+                    except Exception as e:
+                        logger.warning(f"Workload recording error: {str(e)}")
+                if cache_result and 'data' in result and self.registry is not None:
+                    result['result_cache_error'] = self._worker_local_error("Result caching")['error']
+                elif cache_result and 'data' in result:
+                    # Kept before cell capping so analysis sees the full values
+                    result['result_id'] = self._cache_result(connection_id, query, result)
+                self._cap_result_cells(result, max_cell_size)
             
             return result
             
+        except MemoryBudgetError:
+            raise
         except Exception as e:
             logger.error(f"Query execution error: {str(e)}")
             return {"success": False, "error": str(e), "traceback": traceback.format_exc()}
     
+    def count_query_rows(self, connection_id, query):
+        """Total row count of a SELECT, for results that came back truncated"""
+        try:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            
+            db_type = db_conn.db_type
+            if db_type == 'mongodb':
+                return {"success": False, "error": "Use a count spec for MongoDB queries"}
+            if self._detect_query_type(query) != 'select':
+                return {"success": False, "error": "Only SELECT queries can be counted"}
+            
+            count_query, rewritten = self._count_query(query)
+            
+            db_conn.last_used = datetime.now()
+            start_time = datetime.now()
+            conn = db_conn.connection_obj
+            cursor = conn.cursor()
+            try:
+                cursor.execute(count_query)
+                row = cursor.fetchone()
+            except Exception as e:
+                if rewritten:
+                    raise
+                # Kept SELECT lists must name every column once to sit in a derived table
+                return {"success": False, "error": f"This query can't be counted as written; "
+                                                   f"give each result column its own name ({str(e)})"}
+            finally:
+                cursor.close()
+                if db_type in ('mysql', 'postgresql'):
+                    conn.rollback()
+            
+            total = list(row.values())[0] if isinstance(row, dict) else row[0]
+            execution_time = (datetime.now() - start_time).total_seconds() * 1000
+            return {"success": True, "total_count": int(total), "execution_time": execution_time}
+            
+        except Exception as e:
+            logger.error(f"Query count error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def _count_query(self, query):
+        """COUNT(*) over a SELECT; returns (sql, rewritten)
+        
+        When the final SELECT's list doesn't decide the row count (no DISTINCT, grouping,
+        aggregates or compound parts), it is replaced with a constant, so unnamed or
+        duplicate result columns can't break the derived table. A leading WITH stays
+        outside the derived table, where SQL Server requires it.
+        """
+        query = self._trim_statement(query)
+        skeleton = self._sql_skeleton(query).upper()
+        
+        # A top-level ORDER BY doesn't change the count, and SQL Server rejects it in a derived table
+        order_by = re.search(r'\bORDER\s+BY\b', skeleton)
+        if order_by and not re.search(r'\b(LIMIT|FETCH|TOP|OFFSET)\b', skeleton):
+            query, skeleton = query[:order_by.start()].rstrip(), skeleton[:order_by.start()].rstrip()
+            order_by = None
+        
+        # CTE bodies are blanked in the skeleton, so the first SELECT left is the final one
+        select = re.search(r'\bSELECT\b', skeleton)
+        if select is None:
+            return f"SELECT COUNT(*) FROM (\n{query}\n) AS _dbonly_count", False
+        prefix, body = query[:select.start()], query[select.start():]
+        body_skeleton = skeleton[select.start():]
+        
+        head = re.match(r'SELECT\s+(ALL\s+)?(TOP\s*(\(\s*\)|\d+)(\s+PERCENT)?(\s+WITH\s+TIES)?\s+)?', body_skeleton)
+        from_clause = re.search(r'\bFROM\b', body_skeleton)
+        fixed_list = (
+            order_by is not None or from_clause is None
+            or re.search(r'\b(DISTINCT|GROUP\s+BY|HAVING|UNION|INTERSECT|EXCEPT|INTO)\b', body_skeleton)
+            or COUNT_AGGREGATE_PATTERN.search(body_skeleton[head.end():from_clause.start()])
+        )
+        if fixed_list:
+            return f"{prefix}SELECT COUNT(*) FROM (\n{body}\n) AS _dbonly_count", False
+        # Blanked literals look like whitespace to the pattern, so the list starts after its last keyword
+        list_start = len(body_skeleton[:head.end()].rstrip()) + 1
+        body = f"{body[:list_start]}1 AS _c\n{body[from_clause.start():]}"
+        return f"{prefix}SELECT COUNT(*) FROM (\n{body}\n) AS _dbonly_count", True
+    
+    def get_replica_status(self, connection_id):
+        """Report health and latency for a connection's read replicas"""
+        try:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            
+            for replica in db_conn.replicas:
+                with replica.lock:
+                    self._check_replica(replica)
+            
+            return {
+                "success": True,
+                "strategy": db_conn.replica_strategy,
+                "read_your_writes": db_conn.read_your_writes,
+                "replicas": [replica.status() for replica in db_conn.replicas]
+            }
+        except Exception as e:
+            logger.error(f"Replica status error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
     def _detect_query_type(self, query):
-        query_upper = query.strip().upper()
+        # Leading comments don't change what the statement does
+        query_upper = re.sub(r'^(\s*(--[^\n]*(\n|$)|/\*.*?\*/))*', '', query, flags=re.S).strip().upper()
         
         if query_upper.startswith('SELECT'):
             return 'select'
+        elif query_upper.startswith('WITH') and not re.search(r'\b(INSERT|UPDATE|DELETE|MERGE)\b', query_upper):
+            return 'select'
         elif query_upper.startswith('INSERT'):
             return 'insert'
         elif query_upper.startswith('UPDATE'):
@@ -289,63 +1781,238 @@ class DatabaseManager:
         else:
             return 'other'
     
-    def _execute_sqlite_query(self, conn, query, query_type):
+    def _sql_token_end(self, query, i):
+        """End of the quoted name, literal or comment starting at i, or None if none starts there"""
+        length = len(query)
+        char = query[i]
+        if char in "'\"`[":
+            close = ']' if char == '[' else char
+            end = i + 1
+            while end < length:
+                if query[end] == close:
+                    if close != ']' and end + 1 < length and query[end + 1] == close:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            return min(end + 1, length)
+        if query.startswith('--', i):
+            end = query.find('\n', i)
+            return length if end < 0 else end
+        if query.startswith('/*', i):
+            end = query.find('*/', i + 2)
+            return length if end < 0 else end + 2
+        return None
+    
+    def _trim_statement(self, query):
+        """The query without trailing whitespace, semicolons and comments
+        
+        A clause appended after a trailing line comment or semicolon would be
+        commented out or run as a second statement.
+        """
+        end = 0
+        i = 0
+        while i < len(query):
+            token_end = self._sql_token_end(query, i)
+            if token_end is not None:
+                if query[i] not in '-/':
+                    end = token_end
+                i = token_end
+                continue
+            if not query[i].isspace() and query[i] != ';':
+                end = i + 1
+            i += 1
+        return query[:end]
+    
+    def _sql_skeleton(self, query):
+        """Blank out literals, comments and anything inside parentheses, keeping offsets"""
+        out = list(query)
+        length = len(query)
+        depth = 0
+        i = 0
+        while i < length:
+            char = query[i]
+            end = self._sql_token_end(query, i)
+            if end is not None:
+                out[i:end] = ' ' * (end - i)
+                i = end
+                continue
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth = max(depth - 1, 0)
+            elif depth:
+                out[i] = ' '
+            i += 1
+        return ''.join(out)
+    
+    def _apply_row_limit(self, db_type, query, limit):
+        """Add a row limit to a SELECT that has none; returns (query, applied)"""
+        query = self._trim_statement(query)
+        skeleton = self._sql_skeleton(query).upper()
+        
+        # Already bounded, paged, or not a plain read (SELECT INTO, locking reads)
+        if re.search(r'\b(LIMIT|FETCH|TOP|OFFSET|INTO|FOR\s+UPDATE|FOR\s+SHARE)\b', skeleton):
+            return query, False
+        
+        if db_type in ('sqlite', 'mysql'):
+            return f"{query}\nLIMIT {limit}", True
+        elif db_type == 'postgresql':
+            return f"{query}\nFETCH FIRST {limit} ROWS ONLY", True
+        elif db_type == 'mssql':
+            # TOP only binds to the first SELECT of a compound query
+            select = re.match(r'\s*SELECT\s+((DISTINCT|ALL)\s+)?', skeleton)
+            if not select or re.search(r'\b(UNION|INTERSECT|EXCEPT)\b', skeleton):
+                return query, False
+            list_start = len(skeleton[:select.end()].rstrip()) + 1
+            return f"{query[:list_start]}TOP ({limit}) {query[list_start:]}", True
+        return query, False
+    
+    def _fetch_limited(self, cursor, max_rows, max_bytes):
+        """Fetch in batches until the rows run out or a cap is reached; returns (rows, truncated_by)"""
+        with tracer.span('db.fetch') as span:
+            rows, truncated_by = self._fetch_batches(cursor, max_rows, max_bytes)
+            if span is not None:
+                span['attrs'].update(rows=len(rows), truncated_by=truncated_by)
+            return rows, truncated_by
+    
+    def _fetch_batches(self, cursor, max_rows, max_bytes):
+        rows = []
+        size = 0
+        while True:
+            batch = cursor.fetchmany(QUERY_FETCH_BATCH)
+            if not batch:
+                return rows, None
+            kept, charged = len(rows), size
+            truncated_by = None
+            for row in batch:
+                if max_rows and len(rows) >= max_rows:
+                    truncated_by = 'rows'
+                    break
+                size += self._row_size(row.values() if isinstance(row, dict) else row)
+                if max_bytes and size > max_bytes and rows:
+                    truncated_by = 'bytes'
+                    break
+                rows.append(row)
+            try:
+                memory_budget.charge(size - charged)
+            except MemoryBudgetError:
+                # Rejected before anything was fetched; past that, the result is cut short instead
+                if not kept:
+                    raise
+                return rows[:kept], 'memory'
+            if truncated_by:
+                return rows, truncated_by
+    
+    def _row_size(self, values):
+        """Rough in-memory/JSON footprint of one result row"""
+        size = 0
+        for value in values:
+            if isinstance(value, (str, bytes, bytearray, memoryview)):
+                size += len(value) + 8
+            else:
+                size += 16
+        return size
+    
+    def _select_result(self, columns, rows, truncated_by):
+        with tracer.span('rows.convert', rows=len(rows)):
+            result = [row if isinstance(row, dict) else dict(zip(columns, row)) for row in rows]
+        response = {"success": True, "data": result, "columns": columns, "row_count": len(result),
+                    "truncated": truncated_by is not None}
+        if truncated_by:
+            response['truncated_by'] = truncated_by
+        return response
+    
+    def _execute_sqlite_query(self, conn, query, query_type, max_rows=None, max_bytes=None):
+        cursor = conn.cursor()
         try:
-            cursor = conn.cursor()
-            cursor.execute(query)
+            with tracer.span('db.execute', db_type='sqlite'):
+                cursor.execute(query)
             
             if query_type == 'select':
                 columns = [description[0] for description in cursor.description]
-                rows = cursor.fetchall()
-                result = [dict(zip(columns, row)) for row in rows]
-                return {"success": True, "data": result, "columns": columns, "row_count": len(result)}
+                rows, truncated_by = self._fetch_limited(cursor, max_rows, max_bytes)
+                return self._select_result(columns, rows, truncated_by)
             else:
                 conn.commit()
                 return {"success": True, "affected_rows": cursor.rowcount}
         finally:
             cursor.close()
     
-    def _execute_mysql_query(self, conn, query, query_type):
+    def _execute_mysql_query(self, conn, query, query_type, max_rows=None, max_bytes=None):
+        # Unbuffered cursor for reads so rows past the cap are never held in client memory
+        pymysql = drivers.get('pymysql')
+        cursor = conn.cursor(pymysql.cursors.SSDictCursor) if query_type == 'select' else conn.cursor()
+        truncated_by = None
         try:
-            cursor = conn.cursor()
-            cursor.execute(query)
+            with tracer.span('db.execute', db_type='mysql'):
+                cursor.execute(query)
             
             if query_type == 'select':
-                result = cursor.fetchall()
-                columns = list(result[0].keys()) if result else []
-                return {"success": True, "data": result, "columns": columns, "row_count": len(result)}
+                rows, truncated_by = self._fetch_limited(cursor, max_rows, max_bytes)
+                columns = [desc[0] for desc in cursor.description] if cursor.description else []
+                return self._select_result(columns, rows, truncated_by)
             else:
                 conn.commit()
                 return {"success": True, "affected_rows": cursor.rowcount}
         finally:
-            cursor.close()
+            if truncated_by:
+                # Closing reads and discards every row the server still has to send
+                self._kill_mysql_query(conn)
+            try:
+                cursor.close()
+            except pymysql.err.OperationalError as e:
+                if not truncated_by or e.args[0] != pymysql.constants.ER.QUERY_INTERRUPTED:
+                    raise
     
-    def _execute_postgresql_query(self, conn, query, query_type):
+    def _kill_mysql_query(self, conn):
+        """Stop the statement running on a MySQL handle from a short-lived second session"""
+        pymysql = drivers.get('pymysql')
+        user = conn.user.decode(conn.encoding) if isinstance(conn.user, bytes) else conn.user
         try:
+            killer = pymysql.connect(host=conn.host, port=conn.port, user=user, password=conn.password,
+                                     unix_socket=conn.unix_socket, ssl=conn.ctx if conn.ssl else None,
+                                     connect_timeout=5)
+            try:
+                with killer.cursor() as cursor:
+                    cursor.execute(f"KILL QUERY {int(conn.thread_id())}")
+            finally:
+                killer.close()
+        except Exception as e:
+            # The rows are then drained as before
+            logger.warning(f"MySQL query cancel error: {str(e)}")
+    
+    def _execute_postgresql_query(self, conn, query, query_type, max_rows=None, max_bytes=None):
+        # Named (server-side) cursor for reads; its description is only set after the first fetch
+        if query_type == 'select':
+            cursor = conn.cursor(name=f"dbonly_{uuid.uuid4().hex}")
+            cursor.itersize = QUERY_FETCH_BATCH
+        else:
             cursor = conn.cursor()
-            cursor.execute(query)
+        try:
+            with tracer.span('db.execute', db_type='postgresql'):
+                cursor.execute(query)
             
             if query_type == 'select':
-                columns = [desc[0] for desc in cursor.description]
-                rows = cursor.fetchall()
-                result = [dict(zip(columns, row)) for row in rows]
-                return {"success": True, "data": result, "columns": columns, "row_count": len(result)}
+                rows, truncated_by = self._fetch_limited(cursor, max_rows, max_bytes)
+                columns = [desc[0] for desc in cursor.description] if cursor.description else []
+                return self._select_result(columns, rows, truncated_by)
             else:
                 conn.commit()
                 return {"success": True, "affected_rows": cursor.rowcount}
         finally:
             cursor.close()
     
-    def _execute_mssql_query(self, conn, query, query_type):
+    def _execute_mssql_query(self, conn, query, query_type, max_rows=None, max_bytes=None):
+        cursor = conn.cursor()
         try:
-            cursor = conn.cursor()
-            cursor.execute(query)
+            with tracer.span('db.execute', db_type='mssql'):
+                cursor.execute(query)
             
             if query_type == 'select':
                 columns = [column[0] for column in cursor.description]
-                rows = cursor.fetchall()
-                result = [dict(zip(columns, row)) for row in rows]
-                return {"success": True, "data": result, "columns": columns, "row_count": len(result)}
+                rows, truncated_by = self._fetch_limited(cursor, max_rows, max_bytes)
+                return self._select_result(columns, rows, truncated_by)
             else:
                 conn.commit()
                 return {"success": True, "affected_rows": cursor.rowcount}
@@ -354,10 +2021,10 @@ class DatabaseManager:
     
     def get_database_info(self, connection_id):
         try:
-            if connection_id not in self.connections:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
                 return {"success": False, "error": "Connection not found"}
             
-            db_conn = self.connections[connection_id]
             conn = db_conn.connection_obj
             db_type = db_conn.db_type
             
@@ -369,6 +2036,8 @@ class DatabaseManager:
                 return self._get_postgresql_info(conn)
             elif db_type == 'mssql':
                 return self._get_mssql_info(conn)
+            elif db_type == 'mongodb':
+                return self._get_mongodb_info(self._mongo_database(db_conn))
             else:
                 return {"success": False, "error": f"Unsupported database type: {db_type}"}
             
@@ -380,7 +2049,7 @@ class DatabaseManager:
         try:
             cursor = conn.cursor()
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
+            tables = [row[0] for row in cursor.fetchall() if not self._is_internal_table(row[0])]
             cursor.close()
             
             # Get database name safely
@@ -405,47 +2074,136 @@ class DatabaseManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def get_table_schema(self, connection_id, table_name):
+    def get_table_schema(self, connection_id, table_name, include_sample=False, sample_columns=None,
+                         sample_limit=SAMPLE_DEFAULT_ROWS, max_cell_size=SAMPLE_MAX_CELL_SIZE):
         """Get detailed schema information for a specific table"""
         try:
-            if connection_id not in self.connections:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
                 return {"success": False, "error": "Connection not found"}
             
-            db_conn = self.connections[connection_id]
             conn = db_conn.connection_obj
             db_type = db_conn.db_type
             
             if db_type == 'sqlite':
-                return self._get_sqlite_table_schema(conn, table_name)
+                result = self._get_sqlite_table_schema(conn, table_name)
             elif db_type == 'mysql':
-                return self._get_mysql_table_schema(conn, table_name)
+                result = self._get_mysql_table_schema(conn, table_name)
             elif db_type == 'postgresql':
-                return self._get_postgresql_table_schema(conn, table_name)
+                result = self._get_postgresql_table_schema(conn, table_name)
             elif db_type == 'mssql':
-                return self._get_mssql_table_schema(conn, table_name)
+                result = self._get_mssql_table_schema(conn, table_name)
+            elif db_type == 'mongodb':
+                result = self._get_mongodb_table_schema(self._mongo_database(db_conn), table_name)
             else:
                 return {"success": False, "error": f"Unsupported database type: {db_type}"}
+            
+            if result['success']:
+                sample_rows = []
+                if include_sample and db_type == 'mongodb':
+                    sample_rows = self._fetch_mongodb_sample(self._mongo_database(db_conn), table_name,
+                                                             sample_columns, sample_limit, max_cell_size)
+                elif include_sample:
+                    sample_rows = self._fetch_table_sample(conn, db_type.lower(), table_name, result['columns'],
+                                                           sample_columns, sample_limit, max_cell_size)
+                result['sample_data'] = sample_rows
+                result['row_count'] = len(sample_rows)
+            return result
                 
         except Exception as e:
             logger.error(f"Get table schema error: {str(e)}")
             return {"success": False, "error": str(e)}
     
+    def get_table_sample(self, connection_id, table_name, columns=None,
+                         limit=SAMPLE_DEFAULT_ROWS, max_cell_size=SAMPLE_MAX_CELL_SIZE):
+        """Get a few sample rows, projected to the requested columns with capped cell sizes"""
+        result = self.get_table_schema(connection_id, table_name, True, columns, limit, max_cell_size)
+        if not result['success']:
+            return result
+        return {
+            "success": True,
+            "table_name": table_name,
+            "columns": [col['name'] for col in result['columns'] if not columns or col['name'] in columns],
+            "sample_data": result['sample_data'],
+            "row_count": result['row_count']
+        }
+    
+    def _fetch_table_sample(self, conn, db_type, table_name, schema_columns, columns, limit, max_cell_size):
+        """Read sample rows, truncating wide text/blob columns inside the database"""
+        known = {col['name']: col for col in schema_columns}
+        columns = [col for col in (columns or []) if col != '*'] or list(known)
+        unknown = [col for col in columns if col not in known]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        limit = max(1, min(int(limit), SAMPLE_MAX_ROWS))
+        max_cell_size = max(1, int(max_cell_size))
+        
+        # Fetch one element past the cap so truncation can be detected without reading the full value
+        select_list = []
+        for name in columns:
+            quoted = self._quote_identifier(db_type, name)
+            if self._type_family(known[name]['type']) in ('text', 'blob'):
+                if db_type == 'sqlite':
+                    expr = f"substr({quoted}, 1, {max_cell_size + 1})"
+                elif db_type == 'postgresql':
+                    expr = f"substring({quoted} from 1 for {max_cell_size + 1})"
+                else:
+                    expr = f"SUBSTRING({quoted}, 1, {max_cell_size + 1})"
+                select_list.append(f"{expr} AS {quoted}")
+            else:
+                select_list.append(quoted)
+        
+        table = self._quote_identifier(db_type, table_name)
+        if db_type == 'mssql':
+            query = f"SELECT TOP {limit} {', '.join(select_list)} FROM {table}"
+        else:
+            query = f"SELECT {', '.join(select_list)} FROM {table} LIMIT {limit}"
+        
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        
+        sample_rows = []
+        for row in rows:
+            values = row.values() if isinstance(row, dict) else row
+            sample_rows.append({name: self._cap_cell(value, max_cell_size) for name, value in zip(columns, values)})
+        return sample_rows
+    
+    def _cap_cell(self, value, max_cell_size, exact=False):
+        """Replace an oversized (or binary) value with a JSON-safe truncation marker
+        
+        exact means value is the full cell, so its length can be reported.
+        """
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            value = bytes(value)
+            truncated = len(value) > max_cell_size
+            return {
+                "__truncated__": truncated,
+                "type": "blob",
+                "length": len(value) if exact or not truncated else None,
+                "preview": base64.b64encode(value[:max_cell_size]).decode('ascii')
+            }
+        if isinstance(value, str) and len(value) > max_cell_size:
+            return {
+                "__truncated__": True,
+                "type": "text",
+                "length": len(value) if exact else None,
+                "preview": value[:max_cell_size]
+            }
+        return value
+    
     def _get_sqlite_table_schema(self, conn, table_name):
         """Get detailed SQLite table schema"""
         try:
             cursor = conn.cursor()
             
             # Get table info - SQLite doesn't support parameterized PRAGMA
-            cursor.execute(f"PRAGMA table_info({table_name})")
+            cursor.execute(f"PRAGMA table_info({self._quote_identifier('sqlite', table_name)})")
             columns_info = cursor.fetchall()
             
-            # Get sample data (first 5 rows)
-            cursor.execute(f"SELECT * FROM {table_name} LIMIT 5")
-            sample_data = cursor.fetchall()
-            
-            # Get column names for sample data
-            column_names = [description[0] for description in cursor.description] if cursor.description else []
-            
             # Format columns info
             columns = []
             for col in columns_info:
@@ -457,24 +2215,333 @@ class DatabaseManager:
                     'primary_key': bool(col[5])
                 })
             
-            # Format sample data
-            sample_rows = []
-            for row in sample_data:
-                sample_rows.append(dict(zip(column_names, row)))
-            
             cursor.close()
             
             return {
                 "success": True,
                 "table_name": table_name,
-                "columns": columns,
-                "sample_data": sample_rows,
-                "row_count": len(sample_rows)
+                "columns": columns
+            }
+            
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    # Whole-catalog introspection
+    def get_catalog(self, connection_id):
+        """Get tables, columns, keys, indexes and row estimates for the whole database"""
+        try:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            
+            conn = db_conn.connection_obj
+            db_type = db_conn.db_type.lower()
+            start_time = time.perf_counter()
+            
+            if db_type == 'sqlite':
+                catalog = self._get_sqlite_catalog(conn)
+            elif db_type == 'mysql':
+                catalog = self._get_mysql_catalog(conn)
+            elif db_type == 'postgresql':
+                catalog = self._get_postgresql_catalog(conn)
+            elif db_type == 'mssql':
+                catalog = self._get_mssql_catalog(conn)
+            else:
+                return {"success": False, "error": f"Unsupported database type: {db_type}"}
+            
+            tables = self._build_catalog(*catalog)
+            return {
+                "success": True,
+                "type": db_type,
+                "database": db_conn.connection_info.get('database', ''),
+                "tables": tables,
+                "table_count": len(tables),
+                "execution_time": (time.perf_counter() - start_time) * 1000
             }
             
         except Exception as e:
+            logger.error(f"Catalog error: {str(e)}")
             return {"success": False, "error": str(e)}
     
+    def _build_catalog(self, estimates, column_rows, index_rows, fk_rows):
+        """Assemble per-table catalog entries from set-based metadata rows
+        
+        column_rows: (table, column, type, not_null, default, primary_key or key position)
+        index_rows:  (table, index, unique, primary, column) in key order
+        fk_rows:     (table, constraint, column, referenced_table, referenced_column) in key order
+        """
+        tables = {}
+        
+        def entry(table_name):
+            if table_name not in tables:
+                tables[table_name] = {
+                    "name": table_name, "columns": [], "primary_key": [],
+                    "indexes": [], "foreign_keys": [], "row_estimate": estimates.get(table_name)
+                }
+            return tables[table_name]
+        
+        for table_name in estimates:
+            entry(table_name)
+        
+        key_positions = {}
+        for table_name, name, col_type, not_null, default, primary_key in column_rows:
+            table = entry(table_name)
+            table['columns'].append({
+                'name': name,
+                'type': col_type,
+                'not_null': bool(not_null),
+                'default_value': default,
+                'primary_key': bool(primary_key)
+            })
+            if primary_key:
+                # SQLite reports the key position; other dialects a flag
+                key_positions[(table_name, name)] = int(primary_key)
+                table['primary_key'].append(name)
+        for table in tables.values():
+            table['primary_key'].sort(key=lambda name: key_positions[(table['name'], name)])
+        
+        indexes = {}
+        for table_name, index_name, unique, primary, column in index_rows:
+            table = entry(table_name)
+            if (table_name, index_name) not in indexes:
+                index = {"name": index_name, "unique": bool(unique), "primary": bool(primary), "columns": []}
+                indexes[(table_name, index_name)] = index
+                table['indexes'].append(index)
+            indexes[(table_name, index_name)]['columns'].append(column)
+            if primary and column not in table['primary_key']:
+                table['primary_key'].append(column)
+                for col in table['columns']:
+                    if col['name'] == column:
+                        col['primary_key'] = True
+        
+        foreign_keys = {}
+        for table_name, constraint, column, referenced_table, referenced_column in fk_rows:
+            table = entry(table_name)
+            if (table_name, constraint) not in foreign_keys:
+                fk = {"name": constraint, "columns": [], "referenced_table": referenced_table, "referenced_columns": []}
+                foreign_keys[(table_name, constraint)] = fk
+                table['foreign_keys'].append(fk)
+            foreign_keys[(table_name, constraint)]['columns'].append(column)
+            foreign_keys[(table_name, constraint)]['referenced_columns'].append(referenced_column)
+        
+        return sorted(tables.values(), key=lambda table: table['name'])
+    
+    def _row_estimates(self, conn, db_type):
+        """Row counts from the database's statistics, by table; None where there are none"""
+        cursor = conn.cursor()
+        try:
+            if db_type == 'sqlite':
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+                if not cursor.fetchone():
+                    return {}
+                # ANALYZE statistics: the first number of a table's stat is its row count
+                cursor.execute("SELECT tbl, MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 GROUP BY tbl")
+                return {table_name: rows for table_name, rows in cursor.fetchall()}
+            if db_type == 'mysql':
+                cursor.execute("""
+                    SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+                """)
+                return {row['TABLE_NAME']: row['TABLE_ROWS'] for row in cursor.fetchall()}
+            if db_type == 'postgresql':
+                cursor.execute("""
+                    SELECT c.relname, c.reltuples::bigint
+                    FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+                """)
+                # reltuples is -1 for tables that were never vacuumed or analyzed
+                return {name: (rows if rows >= 0 else None) for name, rows in cursor.fetchall()}
+            if db_type == 'mssql':
+                cursor.execute("""
+                    SELECT t.name, SUM(p.rows)
+                    FROM sys.tables t
+                    JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1)
+                    GROUP BY t.name
+                """)
+                return {name: rows for name, rows in cursor.fetchall()}
+            return {}
+        finally:
+            cursor.close()
+    
+    def _get_sqlite_catalog(self, conn):
+        cursor = conn.cursor()
+        try:
+            # pragma table-valued functions join against sqlite_master in one pass each
+            cursor.execute("""
+                SELECT m.name, p.name, p.type, p."notnull", p.dflt_value, p.pk
+                FROM sqlite_master m JOIN pragma_table_info(m.name) p
+                WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+                ORDER BY m.name, p.cid
+            """)
+            column_rows = [tuple(row) for row in cursor.fetchall()]
+            
+            cursor.execute("""
+                SELECT m.name, il.name, il."unique", il.origin = 'pk', ii.name
+                FROM sqlite_master m
+                JOIN pragma_index_list(m.name) il
+                JOIN pragma_index_info(il.name) ii
+                WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+                ORDER BY m.name, il.name, ii.seqno
+            """)
+            index_rows = [tuple(row) for row in cursor.fetchall()]
+            
+            cursor.execute("""
+                SELECT m.name, 'fk_' || fk.id, fk."from", fk."table", fk."to"
+                FROM sqlite_master m JOIN pragma_foreign_key_list(m.name) fk
+                WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+                ORDER BY m.name, fk.id, fk.seq
+            """)
+            fk_rows = [tuple(row) for row in cursor.fetchall()]
+            
+            column_rows = [row for row in column_rows if not self._is_internal_table(row[0])]
+            index_rows = [row for row in index_rows if not self._is_internal_table(row[0])]
+            fk_rows = [row for row in fk_rows if not self._is_internal_table(row[0])]
+            
+            estimates = {row[0]: None for row in column_rows}
+            estimates.update({table_name: rows for table_name, rows in self._row_estimates(conn, 'sqlite').items()
+                              if table_name in estimates})
+            
+            return estimates, column_rows, index_rows, fk_rows
+        finally:
+            cursor.close()
+    
+    def _get_mysql_catalog(self, conn):
+        cursor = conn.cursor()
+        try:
+            estimates = self._row_estimates(conn, 'mysql')
+            
+            cursor.execute("""
+                SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT, COLUMN_KEY
+                FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE()
+                ORDER BY TABLE_NAME, ORDINAL_POSITION
+            """)
+            column_rows = [
+                (row['TABLE_NAME'], row['COLUMN_NAME'], row['COLUMN_TYPE'], row['IS_NULLABLE'] == 'NO',
+                 row['COLUMN_DEFAULT'], row['COLUMN_KEY'] == 'PRI')
+                for row in cursor.fetchall() if row['TABLE_NAME'] in estimates
+            ]
+            
+            cursor.execute("""
+                SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME
+                FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE()
+                ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+            """)
+            index_rows = [
+                (row['TABLE_NAME'], row['INDEX_NAME'], not row['NON_UNIQUE'], row['INDEX_NAME'] == 'PRIMARY', row['COLUMN_NAME'])
+                for row in cursor.fetchall() if row['TABLE_NAME'] in estimates
+            ]
+            
+            cursor.execute("""
+                SELECT TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+                FROM information_schema.KEY_COLUMN_USAGE
+                WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL
+                ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+            """)
+            fk_rows = [
+                (row['TABLE_NAME'], row['CONSTRAINT_NAME'], row['COLUMN_NAME'], row['REFERENCED_TABLE_NAME'], row['REFERENCED_COLUMN_NAME'])
+                for row in cursor.fetchall()
+            ]
+            
+            return estimates, column_rows, index_rows, fk_rows
+        finally:
+            cursor.close()
+    
+    def _get_postgresql_catalog(self, conn):
+        cursor = conn.cursor()
+        try:
+            estimates = self._row_estimates(conn, 'postgresql')
+            
+            cursor.execute("""
+                SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod), a.attnotnull,
+                       pg_get_expr(d.adbin, d.adrelid), false
+                FROM pg_attribute a
+                JOIN pg_class c ON c.oid = a.attrelid
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+                WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p') AND a.attnum > 0 AND NOT a.attisdropped
+                ORDER BY c.relname, a.attnum
+            """)
+            column_rows = cursor.fetchall()
+            
+            cursor.execute("""
+                SELECT t.relname, i.relname, ix.indisunique, ix.indisprimary, a.attname
+                FROM pg_index ix
+                JOIN pg_class t ON t.oid = ix.indrelid
+                JOIN pg_class i ON i.oid = ix.indexrelid
+                JOIN pg_namespace n ON n.oid = t.relnamespace
+                CROSS JOIN LATERAL unnest(ix.indkey) WITH ORDINALITY AS k(attnum, ord)
+                JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+                WHERE n.nspname = 'public'
+                ORDER BY t.relname, i.relname, k.ord
+            """)
+            index_rows = cursor.fetchall()
+            
+            cursor.execute("""
+                SELECT cl.relname, con.conname, a.attname, rcl.relname, ra.attname
+                FROM pg_constraint con
+                JOIN pg_class cl ON cl.oid = con.conrelid
+                JOIN pg_namespace n ON n.oid = cl.relnamespace
+                JOIN pg_class rcl ON rcl.oid = con.confrelid
+                CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k(attnum, refattnum, ord)
+                JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+                JOIN pg_attribute ra ON ra.attrelid = con.confrelid AND ra.attnum = k.refattnum
+                WHERE con.contype = 'f' AND n.nspname = 'public'
+                ORDER BY cl.relname, con.conname, k.ord
+            """)
+            fk_rows = cursor.fetchall()
+            
+            return estimates, column_rows, index_rows, fk_rows
+        finally:
+            cursor.close()
+    
+    def _get_mssql_catalog(self, conn):
+        cursor = conn.cursor()
+        try:
+            estimates = self._row_estimates(conn, 'mssql')
+            
+            cursor.execute("""
+                SELECT c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE, c.CHARACTER_MAXIMUM_LENGTH,
+                       c.NUMERIC_PRECISION, c.NUMERIC_SCALE, c.IS_NULLABLE, c.COLUMN_DEFAULT
+                FROM INFORMATION_SCHEMA.COLUMNS c
+                JOIN INFORMATION_SCHEMA.TABLES t
+                  ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME AND t.TABLE_TYPE = 'BASE TABLE'
+                ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+            """)
+            column_rows = []
+            for table_name, name, data_type, char_length, precision, scale, nullable, default in cursor.fetchall():
+                if char_length:
+                    data_type = f"{data_type}({'MAX' if char_length == -1 else char_length})"
+                elif data_type in ('decimal', 'numeric') and precision:
+                    data_type = f"{data_type}({precision},{scale or 0})"
+                column_rows.append((table_name, name, data_type, nullable == 'NO', default, False))
+            
+            cursor.execute("""
+                SELECT t.name, i.name, i.is_unique, i.is_primary_key, c.name
+                FROM sys.indexes i
+                JOIN sys.tables t ON t.object_id = i.object_id
+                JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+                JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+                WHERE i.name IS NOT NULL AND ic.is_included_column = 0
+                ORDER BY t.name, i.name, ic.key_ordinal
+            """)
+            index_rows = [tuple(row) for row in cursor.fetchall()]
+            
+            cursor.execute("""
+                SELECT tp.name, fk.name, cp.name, tr.name, cr.name
+                FROM sys.foreign_keys fk
+                JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+                JOIN sys.tables tp ON tp.object_id = fkc.parent_object_id
+                JOIN sys.columns cp ON cp.object_id = fkc.parent_object_id AND cp.column_id = fkc.parent_column_id
+                JOIN sys.tables tr ON tr.object_id = fkc.referenced_object_id
+                JOIN sys.columns cr ON cr.object_id = fkc.referenced_object_id AND cr.column_id = fkc.referenced_column_id
+                ORDER BY tp.name, fk.name, fkc.constraint_column_id
+            """)
+            fk_rows = [tuple(row) for row in cursor.fetchall()]
+            
+            return estimates, column_rows, index_rows, fk_rows
+        finally:
+            cursor.close()
+    
     # SQLite CRUD Implementation
     def _insert_sqlite_record(self, conn, table_name, values):
         """Insert record into SQLite table"""
@@ -524,45 +2591,166 @@ class DatabaseManager:
         finally:
             cursor.close()
     
-    def _select_sqlite_records(self, conn, table_name, columns, where_conditions, limit, offset):
-        """Select records from SQLite table"""
-        try:
-            cursor = conn.cursor()
-            columns_str = ', '.join(columns) if columns != ['*'] else '*'
-            where_clause = ''
-            values_list = []
-            
-            if where_conditions:
-                where_clause = ' AND '.join([f"{col} = ?" for col in where_conditions.keys()])
-                values_list = list(where_conditions.values())
-                where_clause = f"WHERE {where_clause}"
+    # Table reads with server-side filtering and sorting
+    def _get_table_columns(self, db_conn, table_name):
+        """Column names of a table, cached per connection until the next DDL"""
+        if table_name not in db_conn.schema_cache:
+            schema = self.get_table_schema(db_conn.connection_id, table_name)
+            if not schema['success']:
+                raise ValueError(schema['error'])
+            if not schema['columns']:
+                raise ValueError(f"Table not found: {table_name}")
+            db_conn.schema_cache[table_name] = [col['name'] for col in schema['columns']]
+        return db_conn.schema_cache[table_name]
+    
+    def _column_ref(self, db_type, known_columns, column):
+        if column not in known_columns:
+            raise ValueError(f"Unknown column: {column}")
+        return self._quote_identifier(db_type, column)
+    
+    def _compile_filters(self, db_type, known_columns, filters):
+        """Compile a filter tree into a parameterized boolean expression
+        
+        A list is an AND of its items; an item is either
+        {"column", "op", "value"} or {"or": [...]} / {"and": [...]}.
+        """
+        placeholder = self._placeholder(db_type)
+        params = []
+        count = [0]
+        
+        def compile_node(node):
+            if isinstance(node, list):
+                node = {"and": node}
+            if 'and' in node or 'or' in node:
+                joiner = ' AND ' if 'and' in node else ' OR '
+                parts = [compile_node(child) for child in node['and' if 'and' in node else 'or']]
+                parts = [part for part in parts if part]
+                return f"({joiner.join(parts)})" if parts else ''
             
-            query = f"SELECT {columns_str} FROM {table_name} {where_clause} LIMIT ? OFFSET ?"
-            values_list.extend([limit, offset])
+            count[0] += 1
+            if count[0] > FILTER_MAX_PREDICATES:
+                raise ValueError(f"Too many filter predicates (max {FILTER_MAX_PREDICATES})")
             
-            cursor.execute(query, values_list)
-            columns = [description[0] for description in cursor.description]
-            rows = cursor.fetchall()
-            result = [dict(zip(columns, row)) for row in rows]
+            column = self._column_ref(db_type, known_columns, node['column'])
+            op = str(node.get('op', 'eq')).lower()
+            if op not in FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            sql_op = FILTER_OPERATORS[op]
+            value = node.get('value')
             
+            if sql_op in ('IS NULL', 'IS NOT NULL'):
+                return f"{column} {sql_op}"
+            if sql_op in ('IN', 'NOT IN'):
+                if not isinstance(value, list) or not value:
+                    raise ValueError(f"Filter '{op}' needs a non-empty list value")
+                params.extend(value)
+                return f"{column} {sql_op} ({', '.join(placeholder for _ in value)})"
+            if sql_op == 'BETWEEN':
+                if not isinstance(value, list) or len(value) != 2:
+                    raise ValueError("Filter 'between' needs a [low, high] value")
+                params.extend(value)
+                return f"{column} BETWEEN {placeholder} AND {placeholder}"
+            params.append(value)
+            return f"{column} {sql_op} {placeholder}"
+        
+        return compile_node(filters or []), params
+    
+    def _compile_order_by(self, db_type, known_columns, order_by):
+        """Compile ["col", "-col", {"column": ..., "direction": "desc"}] into an ORDER BY list"""
+        terms = []
+        for item in order_by or []:
+            if isinstance(item, str):
+                item = {"column": item[1:], "direction": "desc"} if item.startswith('-') else {"column": item}
+            direction = str(item.get('direction', 'asc')).upper()
+            if direction not in ('ASC', 'DESC'):
+                raise ValueError(f"Invalid sort direction: {direction}")
+            terms.append(f"{self._column_ref(db_type, known_columns, item['column'])} {direction}")
+        return ', '.join(terms)
+    
+    def _build_where(self, db_type, known_columns, where_conditions, filters):
+        """Combine legacy equality conditions with a filter tree"""
+        tree = [{"column": col, "op": "eq", "value": value} for col, value in (where_conditions or {}).items()]
+        if filters:
+            tree.append(filters if isinstance(filters, dict) else {"and": filters})
+        expression, params = self._compile_filters(db_type, known_columns, tree)
+        return (f"WHERE {expression}" if expression else ''), params
+    
+    def _paginate(self, db_type, order_clause, limit, offset):
+        """Dialect-specific ORDER BY + row limit clause"""
+        placeholder = self._placeholder(db_type)
+        if db_type == 'mssql':
+            # OFFSET/FETCH requires an ORDER BY
+            order_clause = order_clause or "(SELECT NULL)"
+            return f"ORDER BY {order_clause} OFFSET {placeholder} ROWS FETCH NEXT {placeholder} ROWS ONLY", [offset, limit]
+        order_sql = f"ORDER BY {order_clause} " if order_clause else ''
+        return f"{order_sql}LIMIT {placeholder} OFFSET {placeholder}", [limit, offset]
+    
+    def _fetch_dicts(self, cursor):
+        # Charged batch by batch, so an oversized page is refused before it is all in memory
+        rows = []
+        while True:
+            batch = cursor.fetchmany(QUERY_FETCH_BATCH)
+            if not batch:
+                break
+            memory_budget.charge(sum(self._row_size(row.values() if isinstance(row, dict) else row) for row in batch))
+            rows.extend(batch)
+        if rows and isinstance(rows[0], dict):
+            return rows, list(rows[0].keys())
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in rows], columns
+    
+    def _select_table_records(self, db_conn, table_name, columns, where_conditions, limit, offset,
+                              filters=None, order_by=None):
+        """Select records with filters and ordering compiled to parameterized SQL"""
+        db_type = db_conn.db_type.lower()
+        known_columns = self._get_table_columns(db_conn, table_name)
+        
+        if not columns or columns == ['*']:
+            columns_str = '*'
+        else:
+            columns_str = ', '.join(self._column_ref(db_type, known_columns, col) for col in columns)
+        where_clause, values_list = self._build_where(db_type, known_columns, where_conditions, filters)
+        page_clause, page_params = self._paginate(db_type, self._compile_order_by(db_type, known_columns, order_by), limit, offset)
+        
+        query = f"SELECT {columns_str} FROM {self._quote_identifier(db_type, table_name)} {where_clause} {page_clause}"
+        
+        cursor = db_conn.connection_obj.cursor()
+        try:
+            start_time = time.perf_counter()
+            cursor.execute(query, values_list + page_params)
+            result, columns = self._fetch_dicts(cursor)
+            if not result and cursor.description:
+                columns = [description[0] for description in cursor.description]
+            self._record_workload(db_conn, table_name, where_conditions, filters, order_by, start_time, len(result),
+                                  (query, values_list + page_params))
             return {"success": True, "data": result, "columns": columns, "row_count": len(result)}
         finally:
             cursor.close()
     
-    def _get_sqlite_table_data(self, conn, table_name, limit, offset):
-        """Get SQLite table data with pagination"""
+    def _get_table_page(self, db_conn, table_name, limit, offset, filters=None, order_by=None):
+        """Get table data with pagination, filters and ordering"""
+        db_type = db_conn.db_type.lower()
+        known_columns = self._get_table_columns(db_conn, table_name)
+        table = self._quote_identifier(db_type, table_name)
+        
+        where_clause, values_list = self._build_where(db_type, known_columns, None, filters)
+        page_clause, page_params = self._paginate(db_type, self._compile_order_by(db_type, known_columns, order_by), limit, offset)
+        
+        query = f"SELECT * FROM {table} {where_clause} {page_clause}"
+        cursor = db_conn.connection_obj.cursor()
         try:
-            cursor = conn.cursor()
-            query = f"SELECT * FROM {table_name} LIMIT ? OFFSET ?"
-            cursor.execute(query, [limit, offset])
-            
-            columns = [description[0] for description in cursor.description]
-            rows = cursor.fetchall()
-            result = [dict(zip(columns, row)) for row in rows]
+            start_time = time.perf_counter()
+            cursor.execute(query, values_list + page_params)
+            result, columns = self._fetch_dicts(cursor)
+            if not result and cursor.description:
+                columns = [description[0] for description in cursor.description]
+            self._record_workload(db_conn, table_name, None, filters, order_by, start_time, len(result),
+                                  (query, values_list + page_params))
             
-            # Get total count
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            total_count = cursor.fetchone()[0]
+            # Get total count (of the filtered rows)
+            cursor.execute(f"SELECT COUNT(*) FROM {table} {where_clause}", values_list)
+            row = cursor.fetchone()
+            total_count = list(row.values())[0] if isinstance(row, dict) else row[0]
             
             return {
                 "success": True, 
@@ -613,10 +2801,6 @@ class DatabaseManager:
             cursor.execute(f"DESCRIBE {table_name}")
             columns_info = cursor.fetchall()
             
-            # Get sample data (first 5 rows)
-            cursor.execute(f"SELECT * FROM {table_name} LIMIT 5")
-            sample_data = cursor.fetchall()
-            
             # Format columns info
             columns = []
             for col in columns_info:
@@ -633,16 +2817,14 @@ class DatabaseManager:
             return {
                 "success": True,
                 "table_name": table_name,
-                "columns": columns,
-                "sample_data": sample_data,
-                "row_count": len(sample_data)
+                "columns": columns
             }
             
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     def _get_postgresql_info(self, conn):
-        if not PSYCOPG2_AVAILABLE:
+        if not drivers.available('psycopg2'):
             return {"success": False, "error": "PostgreSQL support not available. Please install psycopg2-binary: pip install psycopg2-binary"}
         
         try:
@@ -669,8 +2851,55 @@ class DatabaseManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def _get_postgresql_table_schema(self, conn, table_name):
+        """Get detailed PostgreSQL table schema"""
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT c.column_name, c.data_type, c.character_maximum_length,
+                       c.numeric_precision, c.numeric_scale, c.is_nullable, c.column_default,
+                       EXISTS (
+                           SELECT 1 FROM information_schema.table_constraints tc
+                           JOIN information_schema.key_column_usage k
+                             ON tc.constraint_name = k.constraint_name AND tc.table_schema = k.table_schema
+                           WHERE tc.constraint_type = 'PRIMARY KEY' AND tc.table_schema = c.table_schema
+                             AND tc.table_name = c.table_name AND k.column_name = c.column_name
+                       )
+                FROM information_schema.columns c
+                WHERE c.table_schema = 'public' AND c.table_name = %s
+                ORDER BY c.ordinal_position
+            """, [table_name])
+            columns_info = cursor.fetchall()
+            
+            columns = []
+            for name, data_type, char_length, precision, scale, nullable, default, is_pk in columns_info:
+                if char_length:
+                    data_type = f"{data_type}({char_length})"
+                elif data_type == 'numeric' and precision:
+                    data_type = f"numeric({precision},{scale or 0})"
+                columns.append({
+                    'name': name,
+                    'type': data_type,
+                    'not_null': nullable == 'NO',
+                    'default_value': default,
+                    'primary_key': bool(is_pk)
+                })
+            
+            cursor.close()
+            
+            return {
+                "success": True,
+                "table_name": table_name,
+                "columns": columns
+            }
+            
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
     def _get_mssql_info(self, conn):
-        if not PYODBC_AVAILABLE:
+        pyodbc = drivers.get('pyodbc')
+        if pyodbc is None:
             return {"success": False, "error": "MSSQL support not available. Please install pyodbc: pip install pyodbc"}
         
         try:
@@ -697,46 +2926,3004 @@ class DatabaseManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def close_connection(self, connection_id):
+    def _get_mssql_table_schema(self, conn, table_name):
+        """Get detailed MSSQL table schema"""
         try:
-            if connection_id not in self.connections:
-                return {"success": False, "error": "Connection not found"}
+            cursor = conn.cursor()
             
-            db_conn = self.connections[connection_id]
+            cursor.execute("""
+                SELECT c.COLUMN_NAME, c.DATA_TYPE, c.CHARACTER_MAXIMUM_LENGTH,
+                       c.NUMERIC_PRECISION, c.NUMERIC_SCALE, c.IS_NULLABLE, c.COLUMN_DEFAULT,
+                       CASE WHEN EXISTS (
+                           SELECT 1 FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+                           JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+                             ON tc.CONSTRAINT_NAME = k.CONSTRAINT_NAME AND tc.TABLE_SCHEMA = k.TABLE_SCHEMA
+                           WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY' AND tc.TABLE_SCHEMA = c.TABLE_SCHEMA
+                             AND tc.TABLE_NAME = c.TABLE_NAME AND k.COLUMN_NAME = c.COLUMN_NAME
+                       ) THEN 1 ELSE 0 END
+                FROM INFORMATION_SCHEMA.COLUMNS c
+                WHERE c.TABLE_NAME = ?
+                ORDER BY c.ORDINAL_POSITION
+            """, [table_name])
+            columns_info = cursor.fetchall()
             
-            if hasattr(db_conn.connection_obj, 'close'):
-                db_conn.connection_obj.close()
+            columns = []
+            for name, data_type, char_length, precision, scale, nullable, default, is_pk in columns_info:
+                if char_length:
+                    data_type = f"{data_type}({'MAX' if char_length == -1 else char_length})"
+                elif data_type in ('decimal', 'numeric') and precision:
+                    data_type = f"{data_type}({precision},{scale or 0})"
+                columns.append({
+                    'name': name,
+                    'type': data_type,
+                    'not_null': nullable == 'NO',
+                    'default_value': default,
+                    'primary_key': bool(is_pk)
+                })
             
-            db_conn.is_active = False
-            del self.connections[connection_id]
+            cursor.close()
             
-            return {"success": True, "message": "Connection closed successfully"}
+            return {
+                "success": True,
+                "table_name": table_name,
+                "columns": columns
+            }
             
         except Exception as e:
-            logger.error(f"Close connection error: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    # CRUD Operations
-    def insert_record(self, connection_id, table_name, values):
-        """Insert a new record into a table"""
+    def close_connection(self, connection_id):
         try:
-            if connection_id not in self.connections:
+            # Other workers drop their handles on their next registry sync
+            db_conn = self.connections.pop(connection_id, None)
+            registered = self.registry is not None and self.registry.lookup(connection_id) is not None
+            if db_conn is None and not registered:
                 return {"success": False, "error": "Connection not found"}
             
-            db_conn = self.connections[connection_id]
-            conn = db_conn.connection_obj
-            db_type = db_conn.db_type
+            if db_conn is not None:
+                self._close_handles(db_conn)
+            if registered:
+                self.registry.remove(connection_id)
+            self.result_cache.drop(connection_id=connection_id)
             
-            if db_type == 'sqlite':
-                return self._insert_sqlite_record(conn, table_name, values)
-            elif db_type == 'mysql':
-                return self._insert_mysql_record(conn, table_name, values)
-            elif db_type == 'postgresql':
-                return self._insert_postgresql_record(conn, table_name, values)
-            elif db_type == 'mssql':
-                return self._insert_mssql_record(conn, table_name, values)
+            return {"success": True, "message": "Connection closed successfully"}
+            
+        except Exception as e:
+            logger.error(f"Close connection error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def _close_handles(self, db_conn):
+        if hasattr(db_conn.connection_obj, 'close'):
+            db_conn.connection_obj.close()
+        if db_conn.side_handle is not None:
+            db_conn.side_handle.close()
+        if db_conn.replica_timer is not None:
+            db_conn.replica_timer.cancel()
+        for replica in db_conn.replicas:
+            if replica.connection_obj is not None:
+                replica.connection_obj.close()
+        db_conn.is_active = False
+    
+    # Cross-connection table copy
+    def _quote_identifier(self, db_type, name):
+        """Quote a table or column name for the given dialect"""
+        db_type = db_type.lower()
+        if db_type == 'mysql':
+            return "`" + str(name).replace("`", "``") + "`"
+        elif db_type == 'mssql':
+            return "[" + str(name).replace("]", "]]") + "]"
+        return '"' + str(name).replace('"', '""') + '"'
+    
+    def _placeholder(self, db_type):
+        return '%s' if db_type.lower() in ('mysql', 'postgresql') else '?'
+    
+    def _type_family(self, type_name):
+        """Classify a declared column type into a portable family"""
+        t = (type_name or '').lower()
+        if not t:
+            return 'any'
+        if 'interval' in t:
+            return 'text'
+        if t.startswith('bool') or t == 'bit' or t.startswith('tinyint(1)'):
+            return 'boolean'
+        if 'int' in t or 'serial' in t:
+            return 'integer'
+        if any(k in t for k in ('dec', 'numeric', 'money')):
+            return 'decimal'
+        if any(k in t for k in ('real', 'floa', 'doub')):
+            return 'real'
+        if any(k in t for k in ('blob', 'binary', 'bytea', 'image')):
+            return 'blob'
+        if 'timestamp' in t or 'datetime' in t:
+            return 'datetime'
+        if t.startswith('date'):
+            return 'date'
+        if t.startswith('time'):
+            return 'time'
+        return 'text'
+    
+    def _translate_column_type(self, type_name, target_type):
+        """Map a source column type onto the closest type of the target dialect"""
+        family = self._type_family(type_name)
+        translated = COPY_TYPE_MAP[target_type][family]
+        size = re.search(r'\((\d+)(?:\s*,\s*(\d+))?\)', type_name or '')
+        
+        if size and target_type != 'sqlite':
+            if family == 'decimal':
+                translated = f"{translated}({size.group(1)},{size.group(2) or 0})"
+            elif family == 'text' and 'char' in type_name.lower():
+                translated = f"{'NVARCHAR' if target_type == 'mssql' else 'VARCHAR'}({size.group(1)})"
+        return family, translated
+    
+    def _value_adapter(self, family, target_type):
+        """Convert driver values that the target driver cannot bind as-is"""
+        if target_type == 'sqlite':
+            def adapt(value):
+                if isinstance(value, Decimal):
+                    return str(value)
+                if hasattr(value, 'isoformat'):
+                    return value.isoformat()
+                if isinstance(value, (bytearray, memoryview)):
+                    return bytes(value)
+                if isinstance(value, (uuid.UUID, timedelta)):
+                    return str(value)
+                return value
+            return adapt
+        if family == 'boolean' and target_type == 'postgresql':
+            return lambda value: value if value is None else bool(value)
+        return None
+    
+    def _open_additional_connection(self, db_conn):
+        """Open another driver handle to the same database as an existing connection"""
+        if db_conn.profile is None:
+            raise ValueError("Connection profile not available for opening additional handles")
+        result = self._connect_profile(db_conn.profile)
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        return result['connection']
+    
+    def _claim_side_handle(self, db_conn):
+        """A second driver handle for sidebar metadata while the main one is busy, or None to queue as usual"""
+        db_type = db_conn.db_type.lower()
+        if db_type not in ('sqlite', 'mysql', 'postgresql', 'mssql') or db_conn.profile is None:
+            return None
+        if db_type == 'sqlite' and db_conn.profile.get('database') == ':memory:':
+            # Another handle would open a different, empty database
+            return None
+        if not db_conn.scheduler.claim_side_lane():
+            return None
+        try:
+            with db_conn.side_lock:
+                if db_conn.side_handle is None:
+                    db_conn.side_handle = self._open_additional_connection(db_conn)
+            return db_conn.side_handle
+        except Exception as e:
+            db_conn.scheduler.release_side_lane()
+            logger.warning(f"Side handle error: {str(e)}")
+            return None
+    
+    def _open_stream_cursor(self, conn, db_type, batch_size):
+        """Cursor that streams rows from the server instead of buffering the result"""
+        if db_type == 'mysql':
+            return conn.cursor(drivers.get('pymysql').cursors.SSCursor)
+        elif db_type == 'postgresql':
+            cursor = conn.cursor(name=f"dbonly_{uuid.uuid4().hex}")
+            cursor.itersize = batch_size
+            return cursor
+        return conn.cursor()
+    
+    def _integer_key(self, db_type, schema):
+        """Single integer primary key usable for range splitting, or rowid for SQLite"""
+        keys = [col for col in schema['columns'] if col['primary_key']]
+        if len(keys) == 1 and self._type_family(keys[0]['type']) == 'integer':
+            return keys[0]['name']
+        if db_type == 'sqlite':
+            return 'rowid'
+        return None
+    
+    def _key_bounds(self, conn, db_type, table_name, key):
+        quoted_key = key if key == 'rowid' else self._quote_identifier(db_type, key)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT MIN({quoted_key}), MAX({quoted_key}) FROM {self._quote_identifier(db_type, table_name)}")
+            row = cursor.fetchone()
+            if isinstance(row, dict):
+                row = list(row.values())
+            return row[0], row[1]
+        finally:
+            cursor.close()
+    
+    def _split_key_range(self, low, high, parts):
+        """Split the inclusive range [low, high] into contiguous half-open slices"""
+        if low is None or high is None:
+            return []
+        span = high - low + 1
+        parts = max(1, min(parts, span))
+        step = -(-span // parts)
+        return [(start, min(start + step, high + 1)) for start in range(low, high + 1, step)]
+    
+    def _stream_rows(self, conn, db_type, table_name, columns, batch_size, key=None, key_range=None):
+        """Yield row batches (lists of tuples) from a table, optionally limited to a key slice"""
+        column_list = ', '.join(self._quote_identifier(db_type, col) for col in columns)
+        query = f"SELECT {column_list} FROM {self._quote_identifier(db_type, table_name)}"
+        params = []
+        if key_range is not None:
+            quoted_key = key if key == 'rowid' else self._quote_identifier(db_type, key)
+            placeholder = self._placeholder(db_type)
+            query += f" WHERE {quoted_key} >= {placeholder} AND {quoted_key} < {placeholder} ORDER BY {quoted_key}"
+            params = list(key_range)
+        
+        stream = self._stream_query(conn, db_type, query, params, batch_size)
+        next(stream)
+        yield from stream
+    
+    def _stream_query(self, conn, db_type, query, params, batch_size):
+        """Yield a query's column names, then its rows in batches (lists of tuples)"""
+        cursor = self._open_stream_cursor(conn, db_type, batch_size)
+        try:
+            cursor.execute(query, params)
+            # Server-side PostgreSQL cursors only describe their columns after the first fetch
+            rows = cursor.fetchmany(batch_size)
+            yield [description[0] for description in cursor.description]
+            while rows:
+                yield [tuple(row) for row in rows]
+                rows = cursor.fetchmany(batch_size)
+        finally:
+            cursor.close()
+            if db_type == 'postgresql':
+                conn.rollback()
+    
+    def copy_table(self, source_connection_id, source_table, target_connection_id, target_table=None,
+                   batch_size=COPY_BATCH_SIZE, workers=1, if_exists='fail'):
+        """Copy a table between two connections with pipelined, optionally parallel reads"""
+        try:
+            source = self._get_connection(source_connection_id)
+            target = self._get_connection(target_connection_id)
+            if source is None or target is None:
+                return {"success": False, "error": "Connection not found"}
+            if if_exists not in ('fail', 'append', 'replace'):
+                return {"success": False, "error": f"Invalid if_exists option: {if_exists}"}
+            
+            target_table = target_table or source_table
+            if source_connection_id == target_connection_id and source_table == target_table:
+                return {"success": False, "error": "Source and target table are the same"}
+            
+            source_type = source.db_type.lower()
+            target_type = target.db_type.lower()
+            batch_size = max(1, int(batch_size))
+            workers = max(1, min(int(workers), COPY_MAX_WORKERS))
+            start_time = time.perf_counter()
+            
+            schema = self.get_table_schema(source_connection_id, source_table)
+            if not schema['success']:
+                return schema
+            if not schema['columns']:
+                return {"success": False, "error": f"Table not found: {source_table}"}
+            
+            columns = [col['name'] for col in schema['columns']]
+            column_types = []
+            adapters = []
+            for col in schema['columns']:
+                family, translated = self._translate_column_type(col['type'], target_type)
+                column_types.append({"name": col['name'], "source_type": col['type'], "target_type": translated})
+                adapters.append(self._value_adapter(family, target_type))
+            
+            load_table = self._prepare_copy_target(target, target_table, schema['columns'], column_types, if_exists)
+            
+            # Key ranges let several readers scan the source concurrently
+            key_ranges = [None]
+            key = None
+            if workers > 1:
+                key = self._integer_key(source_type, schema)
+                if key is None:
+                    workers = 1
+                else:
+                    low, high = self._key_bounds(source.connection_obj, source_type, source_table, key)
+                    key_ranges = self._split_key_range(low, high, workers) or [None]
+                    workers = len(key_ranges)
+            
+            batches = queue.Queue(maxsize=COPY_QUEUE_DEPTH)
+            stop = threading.Event()
+            
+            def put(item):
+                # Stop waiting on a full queue once the writer has given up
+                while not stop.is_set():
+                    try:
+                        batches.put(item, timeout=0.5)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+            
+            lease = memory_budget.current
+            
+            def read_range(key_range):
+                conn = None
+                try:
+                    with memory_budget.attach(lease):
+                        conn = source.connection_obj if workers == 1 else self._open_additional_connection(source)
+                        for rows in self._stream_rows(conn, source_type, source_table, columns, batch_size, key, key_range):
+                            memory_budget.charge(sum(self._row_size(row) for row in rows))
+                            if not put(('rows', rows)):
+                                return
+                        put(('done', None))
+                except Exception as e:
+                    put(('error', e))
+                finally:
+                    if workers > 1 and conn is not None:
+                        conn.close()
+            
+            readers = [threading.Thread(target=read_range, args=(key_range,), daemon=True) for key_range in key_ranges]
+            for reader in readers:
+                reader.start()
+            
+            try:
+                rows_copied, batch_count = self._write_copy_batches(
+                    target, load_table, columns, adapters, batches, len(readers), stop)
+                for reader in readers:
+                    reader.join()
+                if load_table != target_table:
+                    self._replace_copy_target(target, load_table, target_table)
+            except Exception:
+                if load_table != target_table:
+                    self._drop_copy_staging(target, load_table)
+                raise
+            self._invalidate_table_caches(target, target_table, schema_changed=True)
+            
+            elapsed = time.perf_counter() - start_time
+            return {
+                "success": True,
+                "source_table": source_table,
+                "target_table": target_table,
+                "rows_copied": rows_copied,
+                "batches": batch_count,
+                "workers": workers,
+                "split_key": key if workers > 1 else None,
+                "columns": column_types,
+                "execution_time": elapsed * 1000,
+                "rows_per_second": round(rows_copied / elapsed, 1) if elapsed > 0 else None
+            }
+            
+        except MemoryBudgetError:
+            raise
+        except Exception as e:
+            logger.error(f"Copy table error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def _prepare_copy_target(self, target, target_table, source_columns, column_types, if_exists):
+        """Create (or validate) the table a copy loads into; returns its name
+        
+        A replaced table is loaded under a staging name and only swapped in by _replace_copy_target,
+        so a copy that fails part way leaves the original in place.
+        """
+        target_type = target.db_type.lower()
+        existing = self.get_table_schema(target.connection_id, target_table)
+        exists = existing['success'] and bool(existing['columns'])
+        
+        if exists and if_exists == 'fail':
+            raise ValueError(f"Target table already exists: {target_table}")
+        if exists and if_exists == 'append':
+            return target_table
+        
+        load_table = f"{target_table}__copy_{uuid.uuid4().hex[:8]}" if exists else target_table
+        definitions = []
+        for source_col, col in zip(source_columns, column_types):
+            definition = f"{self._quote_identifier(target_type, col['name'])} {col['target_type']}".rstrip()
+            if source_col['not_null']:
+                definition += " NOT NULL"
+            definitions.append(definition)
+        
+        keys = [self._quote_identifier(target_type, col['name']) for col in source_columns if col['primary_key']]
+        if keys:
+            definitions.append(f"PRIMARY KEY ({', '.join(keys)})")
+        
+        cursor = target.connection_obj.cursor()
+        try:
+            cursor.execute(f"CREATE TABLE {self._quote_identifier(target_type, load_table)} ({', '.join(definitions)})")
+            target.connection_obj.commit()
+        finally:
+            cursor.close()
+        return load_table
+    
+    def _replace_copy_target(self, target, load_table, target_table):
+        """Swap a fully loaded staging table in for the table it replaces"""
+        target_type = target.db_type.lower()
+        q = lambda name: self._quote_identifier(target_type, name)
+        conn = target.connection_obj
+        cursor = conn.cursor()
+        try:
+            if target_type == 'mysql':
+                # One RENAME TABLE swaps both names atomically
+                retired = f"{target_table}__old_{uuid.uuid4().hex[:8]}"
+                cursor.execute(f"RENAME TABLE {q(target_table)} TO {q(retired)}, {q(load_table)} TO {q(target_table)}")
+                cursor.execute(f"DROP TABLE {q(retired)}")
+            elif target_type == 'mssql':
+                cursor.execute(f"DROP TABLE {q(target_table)}")
+                cursor.execute("EXEC sp_rename ?, ?", [load_table, target_table])
+            else:
+                # Transactional DDL on both; Python's sqlite3 runs DDL in autocommit unless a
+                # transaction is opened first, which would leave no table if the rename failed
+                if target_type == 'sqlite' and not conn.in_transaction:
+                    cursor.execute("BEGIN")
+                cursor.execute(f"DROP TABLE {q(target_table)}")
+                cursor.execute(f"ALTER TABLE {q(load_table)} RENAME TO {q(target_table)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    
+    def _drop_copy_staging(self, target, load_table):
+        conn = target.connection_obj
+        cursor = conn.cursor()
+        try:
+            conn.rollback()
+            cursor.execute(f"DROP TABLE IF EXISTS {self._quote_identifier(target.db_type.lower(), load_table)}")
+            conn.commit()
+        except Exception as e:
+            logger.warning(f"Copy staging cleanup error: {str(e)}")
+        finally:
+            cursor.close()
+    
+    def _write_copy_batches(self, target, target_table, columns, adapters, batches, reader_count, stop):
+        """Consume row batches from the readers and bulk insert them into the target"""
+        target_type = target.db_type.lower()
+        conn = target.connection_obj
+        placeholder = self._placeholder(target_type)
+        insert = (
+            f"INSERT INTO {self._quote_identifier(target_type, target_table)} "
+            f"({', '.join(self._quote_identifier(target_type, col) for col in columns)}) "
+            f"VALUES ({', '.join(placeholder for _ in columns)})"
+        )
+        needs_adapting = any(adapters)
+        rows_copied = 0
+        batch_count = 0
+        finished = 0
+        
+        cursor = conn.cursor()
+        try:
+            if target_type == 'mssql':
+                cursor.fast_executemany = True
+            while finished < reader_count:
+                kind, payload = batches.get()
+                if kind == 'done':
+                    finished += 1
+                    continue
+                if kind == 'error':
+                    raise payload
+                
+                rows = payload
+                if needs_adapting:
+                    rows = [
+                        tuple(adapt(value) if adapt else value for adapt, value in zip(adapters, row))
+                        for row in rows
+                    ]
+                cursor.executemany(insert, rows)
+                rows_copied += len(rows)
+                batch_count += 1
+                memory_budget.release(sum(self._row_size(row) for row in payload))
+            conn.commit()
+        except Exception:
+            stop.set()
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        
+        return rows_copied, batch_count
+    
+    # Fan-out queries
+    def fan_out_query(self, connection_ids, query, timeout=FAN_OUT_DEFAULT_TIMEOUT, merge=False, source_column='_source',
+                      allow_writes=False):
+        """Run one query against many connections concurrently"""
+        try:
+            connection_ids = list(dict.fromkeys(connection_ids))
+            if not connection_ids:
+                return {"success": False, "error": "At least one connection ID required"}
+            if not allow_writes and self._detect_query_type(query) != 'select':
+                # A mistyped write would otherwise hit every target at once
+                return {"success": False, "error": "Fan-out runs SELECT queries only; pass allow_writes to send other statements"}
+            timeout = float(timeout)
+            start_time = time.perf_counter()
+            
+            results = {}
+            started = {}
+            executor = ThreadPoolExecutor(max_workers=min(len(connection_ids), FAN_OUT_MAX_WORKERS))
+            lease = memory_budget.current
+            
+            def run(connection_id):
+                started[connection_id] = time.perf_counter()
+                with memory_budget.attach(lease), self._statement_timeout(self.connections.get(connection_id), timeout):
+                    return self.execute_query(connection_id, query)
+            
+            pending = {}
+            for connection_id in connection_ids:
+                if self._get_connection(connection_id) is None:
+                    results[connection_id] = {"success": False, "error": "Connection not found"}
+                else:
+                    pending[executor.submit(run, connection_id)] = connection_id
+            
+            # Each target's timeout counts from when its worker actually started
+            while pending:
+                now = time.perf_counter()
+                deadlines = [started[cid] + timeout for cid in pending.values() if cid in started]
+                wait_for = max(0.0, min(deadlines) - now) if deadlines else timeout
+                done, _ = wait(list(pending), timeout=min(wait_for, timeout) or 0.01, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    connection_id = pending.pop(future)
+                    try:
+                        results[connection_id] = future.result()
+                    except Exception as e:
+                        results[connection_id] = {"success": False, "error": str(e)}
+                
+                now = time.perf_counter()
+                for future, connection_id in list(pending.items()):
+                    if connection_id in started and now - started[connection_id] >= timeout:
+                        pending.pop(future)
+                        self._interrupt_connection(connection_id)
+                        results[connection_id] = {"success": False, "error": f"Timed out after {timeout}s", "timed_out": True}
+            
+            # Timed-out statements were cancelled; waiting for their threads keeps the connections'
+            # scheduler slots held until nothing is left running on their handles
+            executor.shutdown(wait=True)
+            total_time = (time.perf_counter() - start_time) * 1000
+            
+            targets = []
+            for connection_id in connection_ids:
+                result = dict(results[connection_id])
+                result['connection_id'] = connection_id
+                db_conn = self.connections.get(connection_id)
+                if db_conn is not None:
+                    result['name'] = db_conn.connection_info.get('name')
+                result.pop('traceback', None)
+                targets.append(result)
+            
+            response = {
+                "success": True,
+                "total_time": total_time,
+                "slowest_target_time": max((t.get('execution_time', 0) for t in targets), default=0),
+                "succeeded": sum(1 for t in targets if t['success']),
+                "failed": sum(1 for t in targets if not t['success'])
+            }
+            
+            if merge:
+                columns = [source_column]
+                data = []
+                for target in targets:
+                    if not target['success'] or 'data' not in target:
+                        continue
+                    for col in target['columns']:
+                        if col not in columns:
+                            columns.append(col)
+                    for row in target['data']:
+                        merged_row = {source_column: target['connection_id']}
+                        merged_row.update(row)
+                        data.append(merged_row)
+                response.update({
+                    "columns": columns,
+                    "data": data,
+                    "row_count": len(data),
+                    "sources": {t['connection_id']: t.get('name') for t in targets},
+                    "errors": [{"connection_id": t['connection_id'], "error": t['error'], "timed_out": t.get('timed_out', False)}
+                               for t in targets if not t['success']]
+                })
+            else:
+                response['results'] = targets
+            
+            return response
+            
+        except Exception as e:
+            logger.error(f"Fan-out query error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def _interrupt_connection(self, connection_id):
+        """Best-effort cancel of a statement still running on a connection or one of its busy replicas"""
+        db_conn = self.connections.get(connection_id)
+        if db_conn is None:
+            return
+        db_type = db_conn.db_type.lower()
+        handles = [db_conn.connection_obj]
+        handles.extend(replica.connection_obj for replica in db_conn.replicas
+                       if replica.lock.locked() and replica.connection_obj is not None)
+        for handle in handles:
+            try:
+                if db_type == 'sqlite':
+                    handle.interrupt()
+                elif db_type == 'mysql':
+                    self._kill_mysql_query(handle)
+                elif db_type == 'postgresql':
+                    handle.cancel()
+            except Exception as e:
+                logger.warning(f"Interrupt failed for {connection_id}: {str(e)}")
+    
+    @contextlib.contextmanager
+    def _statement_timeout(self, db_conn, timeout):
+        """Server-side timeout for drivers that can't cancel from another thread (pyodbc)"""
+        if db_conn is None or db_conn.db_type.lower() != 'mssql':
+            yield
+            return
+        conn = db_conn.connection_obj
+        previous = conn.timeout
+        conn.timeout = max(1, math.ceil(timeout))
+        try:
+            yield
+        finally:
+            conn.timeout = previous
+    
+    # Parallel key-range scans
+    def scan_table(self, connection_id, table_name, columns=None, workers=4, chunk_size=None, max_cell_size=MAX_CELL_SIZE):
+        """Read a whole table by splitting its integer key range across several connections"""
+        try:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            
+            db_type = db_conn.db_type.lower()
+            workers = max(1, min(int(workers), SCAN_MAX_WORKERS))
+            start_time = time.perf_counter()
+            
+            schema = self.get_table_schema(connection_id, table_name)
+            if not schema['success']:
+                return schema
+            if not schema['columns']:
+                return {"success": False, "error": f"Table not found: {table_name}"}
+            
+            table_columns = [col['name'] for col in schema['columns']]
+            columns = [col for col in (columns or []) if col != '*'] or table_columns
+            unknown = [col for col in columns if col not in table_columns]
+            if unknown:
+                return {"success": False, "error": f"Unknown columns: {', '.join(unknown)}"}
+            
+            key = self._integer_key(db_type, schema)
+            if key is None:
+                return {"success": False, "error": "Parallel scan needs a single integer primary key"}
+            
+            low, high = self._key_bounds(db_conn.connection_obj, db_type, table_name, key)
+            if chunk_size:
+                # Sized by key span, so a sparse key would otherwise ask for one query per missing id
+                parts = -(-(high - low + 1) // max(1, int(chunk_size))) if low is not None else 0
+                parts = min(parts, SCAN_MAX_CHUNKS)
+            else:
+                parts = workers * SCAN_CHUNKS_PER_WORKER
+            chunks = self._split_key_range(low, high, parts)
+            workers = max(1, min(workers, len(chunks)))
+            
+            # One handle per worker; chunks are pulled from a shared pool of handles
+            handles = queue.Queue()
+            opened = []
+            if workers == 1:
+                handles.put(db_conn.connection_obj)
+            else:
+                for _ in range(workers):
+                    conn = self._open_additional_connection(db_conn)
+                    opened.append(conn)
+                    handles.put(conn)
+            
+            lease = memory_budget.current
+            
+            def read_chunk(key_range):
+                conn = handles.get()
+                try:
+                    with memory_budget.attach(lease):
+                        rows = []
+                        for batch in self._stream_rows(conn, db_type, table_name, columns, COPY_BATCH_SIZE, key, key_range):
+                            memory_budget.charge(sum(self._row_size(row) for row in batch))
+                            rows.extend(batch)
+                        return rows
+                finally:
+                    handles.put(conn)
+            
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    chunk_rows = list(executor.map(read_chunk, chunks))
+            finally:
+                for conn in opened:
+                    conn.close()
+            
+            # executor.map keeps chunk order, so rows come back in key order
+            data = [dict(zip(columns, row)) for rows in chunk_rows for row in rows]
+            
+            return self._cap_result_cells({
+                "success": True,
+                "data": data,
+                "columns": columns,
+                "row_count": len(data),
+                "split_key": key,
+                "chunks": len(chunks),
+                "workers": workers,
+                "execution_time": (time.perf_counter() - start_time) * 1000
+            }, max_cell_size)
+            
+        except MemoryBudgetError:
+            raise
+        except Exception as e:
+            logger.error(f"Table scan error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    # Local snapshots of remote tables
+    def _snapshot_path(self, db_conn, name):
+        """Snapshot file for a table or query name, stable across restarts and shared by workers"""
+        profile_key = self.handoff.fingerprint(db_conn.profile or db_conn.connection_info)[:16]
+        name_key = hashlib.sha256(name.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(SNAPSHOT_DIR, f"{profile_key}-{name_key}.db")
+    
+    def _open_snapshot_file(self, path, meta=None):
+        """Open a snapshot file; its stored metadata is read when meta is not given"""
+        conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        try:
+            # A snapshot can always be rebuilt from its source, so durability is traded for speed
+            conn.execute("PRAGMA journal_mode=MEMORY")
+            conn.execute("PRAGMA synchronous=OFF")
+            if meta is None:
+                row = conn.execute(f"SELECT value FROM {SNAPSHOT_META_TABLE} WHERE key = 'meta'").fetchone()
+                meta = json.loads(row[0])
+        except Exception:
+            conn.close()
+            raise
+        
+        db_conn = DatabaseConnection(
+            connection_id=f"snapshot:{os.path.basename(path)}",
+            connection_info={'name': meta['name'], 'type': 'sqlite', 'path': path},
+            connection_obj=conn,
+            db_type='sqlite'
+        )
+        # Lets the page and select helpers resolve columns without a schema lookup by connection id
+        db_conn.schema_cache[meta['name']] = [col['name'] for col in meta['columns']]
+        return TableSnapshot(path, meta, db_conn)
+    
+    def _find_snapshot(self, db_conn, name):
+        """The snapshot of a table for this connection, including ones left by another worker or session"""
+        snapshot = db_conn.snapshots.get(name)
+        if snapshot is not None:
+            try:
+                # Gone when evicted to keep the directory under its size limit; a new inode when
+                # another worker rebuilt it, which leaves this handle on the unlinked old file
+                replaced = os.stat(snapshot.path).st_ino != snapshot.inode
+            except FileNotFoundError:
+                replaced = True
+            if replaced:
+                db_conn.snapshots.pop(name, None)
+                snapshot.db_conn.connection_obj.close()
+                snapshot = None
+            else:
+                # Other workers' refreshes and writes are recorded in the file
+                with snapshot.lock:
+                    snapshot.reload_meta()
+        if snapshot is None and db_conn.profile is not None:
+            path = self._snapshot_path(db_conn, name)
+            if not os.path.exists(path):
+                return None
+            try:
+                snapshot = self._open_snapshot_file(path)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable snapshot {path}: {str(e)}")
+                return None
+            db_conn.snapshots[name] = snapshot
+        if snapshot is not None:
+            # Modification time doubles as last use for eviction
+            os.utime(snapshot.path)
+        return snapshot
+    
+    def _snapshot_source_query(self, db_conn, meta, where=None):
+        """SELECT over the snapshot's source, optionally restricted by a WHERE clause"""
+        db_type = db_conn.db_type.lower()
+        if meta.get('source_table'):
+            column_list = ', '.join(self._quote_identifier(db_type, col['name']) for col in meta['columns'])
+            query = f"SELECT {column_list} FROM {self._quote_identifier(db_type, meta['source_table'])}"
+        else:
+            query = meta['query']
+            if where:
+                query = f"SELECT * FROM (\n{query}\n) AS _dbonly_snapshot"
+        if where:
+            query += f" WHERE {where}"
+        return query
+    
+    def _snapshot_adapters(self, meta):
+        return [self._value_adapter(self._type_family(col.get('type')), 'sqlite') for col in meta['columns']]
+    
+    def _snapshot_value(self, value):
+        """JSON-safe form of a watermark or key value"""
+        if value is None or isinstance(value, (int, float, str, bool)):
+            return value
+        return self._value_adapter('any', 'sqlite')(value) if not isinstance(value, bytes) else value.hex()
+    
+    def _load_snapshot_rows(self, source, meta, local, stream, upsert=False):
+        """Write streamed row batches into the snapshot table; returns rows written and the new watermark"""
+        columns = [col['name'] for col in meta['columns']]
+        adapters = self._snapshot_adapters(meta)
+        change_index = columns.index(meta['change_column']) if meta.get('change_column') else None
+        watermark = None
+        verb = "INSERT OR REPLACE" if upsert else "INSERT"
+        insert = (f"{verb} INTO {self._quote_identifier('sqlite', meta['name'])} "
+                  f"({', '.join(self._quote_identifier('sqlite', col) for col in columns)}) "
+                  f"VALUES ({', '.join('?' for _ in columns)})")
+        page_size = local.execute("PRAGMA page_size").fetchone()[0]
+        written = 0
+        for rows in stream:
+            if change_index is not None:
+                values = [row[change_index] for row in rows if row[change_index] is not None]
+                if values:
+                    batch_max = max(values)
+                    watermark = batch_max if watermark is None or batch_max > watermark else watermark
+            rows = [tuple(adapt(value) if adapt else value for adapt, value in zip(adapters, row)) for row in rows]
+            local.executemany(insert, rows)
+            written += len(rows)
+            # Pages still in the cache count too, so the file size alone would lag behind
+            if local.execute("PRAGMA page_count").fetchone()[0] * page_size > SNAPSHOT_MAX_BYTES:
+                raise ValueError(f"Snapshot {meta['name']} is larger than {SNAPSHOT_MAX_BYTES} bytes")
+        return written, watermark
+    
+    def _build_snapshot(self, source, meta, path):
+        """Materialize the whole source into a new snapshot file at path"""
+        source_type = source.db_type.lower()
+        stream = self._stream_query(source.connection_obj, source_type, self._snapshot_source_query(source, meta), [],
+                                    SNAPSHOT_BATCH_SIZE)
+        try:
+            names = next(stream)
+            if not meta['columns']:
+                # Query snapshots take their columns from the result, with no declared types
+                meta['columns'] = [{"name": name, "type": None} for name in names]
+            
+            if os.path.exists(path):
+                os.remove(path)
+            local = sqlite3.connect(path, timeout=10)
+            os.chmod(path, 0o600)
+            try:
+                local.execute("PRAGMA journal_mode=OFF")
+                local.execute("PRAGMA synchronous=OFF")
+                definitions = [
+                    f"{self._quote_identifier('sqlite', col['name'])} "
+                    f"{self._translate_column_type(col.get('type'), 'sqlite')[1]}".rstrip()
+                    for col in meta['columns']
+                ]
+                if meta['key_columns']:
+                    keys = ', '.join(self._quote_identifier('sqlite', key) for key in meta['key_columns'])
+                    definitions.append(f"PRIMARY KEY ({keys})")
+                local.execute(f"CREATE TABLE {self._quote_identifier('sqlite', meta['name'])} ({', '.join(definitions)})")
+                local.execute(f"CREATE TABLE {SNAPSHOT_META_TABLE} (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                
+                rows, watermark = self._load_snapshot_rows(source, meta, local, stream)
+                meta['rows'] = rows
+                meta['watermark'] = self._snapshot_value(watermark)
+                meta['refreshed_at'] = datetime.now().isoformat()
+                meta['last_refresh_mode'] = 'full'
+                local.execute(f"INSERT INTO {SNAPSHOT_META_TABLE} VALUES ('meta', ?)", [json.dumps(meta)])
+                local.commit()
+            finally:
+                local.close()
+        except Exception:
+            stream.close()
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+    
+    def _enforce_snapshot_dir_limit(self, keep):
+        """Delete least recently used snapshot files until the directory fits its limit"""
+        files = []
+        for entry in os.scandir(SNAPSHOT_DIR):
+            if entry.name.endswith('.db') and entry.path != keep:
+                files.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+        total = sum(size for _, size, _ in files) + (os.path.getsize(keep) if os.path.exists(keep) else 0)
+        evicted = []
+        for _, size, path in sorted(files):
+            if total <= SNAPSHOT_DIR_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted.append(os.path.basename(path))
+        return evicted
+    
+    def create_snapshot(self, connection_id, table_name=None, query=None, name=None, key_columns=None, change_column=None):
+        """Materialize a table or query of this connection into a local SQLite snapshot"""
+        try:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            if db_conn.db_type.lower() not in ('sqlite', 'mysql', 'postgresql', 'mssql'):
+                return {"success": False, "error": f"Snapshots are not supported for {db_conn.db_type}"}
+            if bool(table_name) == bool(query):
+                return {"success": False, "error": "Give either table_name or query"}
+            if query and not name:
+                return {"success": False, "error": "A query snapshot needs a name"}
+            if query and self._detect_query_type(query) != 'select':
+                return {"success": False, "error": "Only SELECT queries can be snapshotted"}
+            
+            name = name or table_name
+            columns = []
+            if table_name:
+                schema = self.get_table_schema(connection_id, table_name)
+                if not schema['success']:
+                    return schema
+                if not schema['columns']:
+                    return {"success": False, "error": f"Table not found: {table_name}"}
+                columns = [{"name": col['name'], "type": col['type']} for col in schema['columns']]
+                key_columns = key_columns or [col['name'] for col in schema['columns'] if col['primary_key']]
+                known = {col['name'] for col in columns}
+                unknown = [col for col in list(key_columns) + ([change_column] if change_column else []) if col not in known]
+                if unknown:
+                    return {"success": False, "error": f"Unknown columns: {', '.join(unknown)}"}
+            
+            start_time = time.perf_counter()
+            now = datetime.now().isoformat()
+            meta = {
+                "name": name,
+                "source_table": table_name,
+                # Wrapped in a derived table to refresh, where a trailing comment or semicolon would break it
+                "query": self._trim_statement(query) if query else None,
+                "columns": columns,
+                "key_columns": list(key_columns or []),
+                "change_column": change_column,
+                "created_at": now,
+                "refreshed_at": now
+            }
+            
+            os.makedirs(SNAPSHOT_DIR, mode=0o700, exist_ok=True)
+            path = self._snapshot_path(db_conn, name)
+            previous = db_conn.snapshots.pop(name, None)
+            if previous is not None:
+                previous.db_conn.connection_obj.close()
+            
+            # Built beside the live file and swapped in, so a failed build leaves the old copy usable
+            building = f"{path}.{os.getpid()}.building"
+            self._build_snapshot(db_conn, meta, building)
+            os.replace(building, path)
+            snapshot = self._open_snapshot_file(path, meta)
+            db_conn.snapshots[name] = snapshot
+            evicted = self._enforce_snapshot_dir_limit(path)
+            
+            return {"success": True, "snapshot": snapshot.status(), "evicted": evicted,
+                    "execution_time": (time.perf_counter() - start_time) * 1000}
+            
+        except Exception as e:
+            logger.error(f"Create snapshot error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def refresh_snapshot(self, connection_id, name, full=False, detect_deletes=False):
+        """Bring a snapshot up to date: by change-column watermark, by new primary keys, or in full"""
+        try:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            snapshot = self._find_snapshot(db_conn, name)
+            if snapshot is None:
+                return {"success": False, "error": f"No snapshot named {name}"}
+            
+            meta = snapshot.meta
+            keys = meta['key_columns']
+            if full or not keys:
+                return self.create_snapshot(connection_id, meta.get('source_table'), meta.get('query'),
+                                            None if meta.get('source_table') else name, keys, meta.get('change_column'))
+            
+            source_type = db_conn.db_type.lower()
+            placeholder = self._placeholder(source_type)
+            local = snapshot.db_conn.connection_obj
+            table = self._quote_identifier('sqlite', name)
+            start_time = time.perf_counter()
+            
+            with snapshot.lock:
+                # Rows changed since the watermark (>= so rows sharing the last timestamp are not missed),
+                # or rows with a key beyond the largest one copied
+                if meta.get('change_column') and meta.get('watermark') is not None:
+                    mode = 'watermark'
+                    where = f"{self._quote_identifier(source_type, meta['change_column'])} >= {placeholder}"
+                    params = [meta['watermark']]
+                    # App writes may include deletes, which a watermark can't see
+                    detect_deletes = detect_deletes or snapshot.dirty
+                elif len(keys) == 1 and not snapshot.dirty:
+                    mode = 'key'
+                    local_max = local.execute(f"SELECT MAX({self._quote_identifier('sqlite', keys[0])}) FROM {table}").fetchone()[0]
+                    where = f"{self._quote_identifier(source_type, keys[0])} > {placeholder}" if local_max is not None else None
+                    params = [local_max] if local_max is not None else []
+                else:
+                    # New keys alone would miss updates and deletes made through the app, so those need a rebuild
+                    return self.create_snapshot(connection_id, meta.get('source_table'), meta.get('query'),
+                                                None if meta.get('source_table') else name, keys, meta.get('change_column'))
+                
+                stream = self._stream_query(db_conn.connection_obj, source_type,
+                                            self._snapshot_source_query(db_conn, meta, where), params, SNAPSHOT_BATCH_SIZE)
+                next(stream)
+                try:
+                    upserted, watermark = self._load_snapshot_rows(db_conn, meta, local, stream, upsert=True)
+                    deleted = self._delete_missing_snapshot_rows(db_conn, meta, local) if detect_deletes else None
+                    
+                    if watermark is not None:
+                        watermark = self._snapshot_value(watermark)
+                        if meta.get('watermark') is None or watermark > meta['watermark']:
+                            meta['watermark'] = watermark
+                    meta['rows'] = local.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    meta['refreshed_at'] = datetime.now().isoformat()
+                    meta['last_refresh_mode'] = mode
+                    # Only a watermark refresh sees updated rows, so only it settles earlier writes
+                    if mode == 'watermark':
+                        meta['written_since_refresh'] = False
+                    snapshot.save_meta()
+                except Exception:
+                    stream.close()
+                    local.rollback()
+                    raise
+                self._invalidate_table_caches(snapshot.db_conn, name)
+            
+            return {"success": True, "snapshot": snapshot.status(), "mode": mode, "rows_upserted": upserted,
+                    "rows_deleted": deleted, "execution_time": (time.perf_counter() - start_time) * 1000}
+            
+        except Exception as e:
+            logger.error(f"Refresh snapshot error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def _delete_missing_snapshot_rows(self, source, meta, local):
+        """Remove local rows whose key no longer exists at the source, by streaming the source's keys"""
+        source_type = source.db_type.lower()
+        keys = meta['key_columns']
+        key_meta = dict(meta, columns=[col for col in meta['columns'] if col['name'] in keys])
+        adapters = self._snapshot_adapters(key_meta)
+        key_names = [col['name'] for col in key_meta['columns']]
+        quoted = [self._quote_identifier('sqlite', key) for key in key_names]
+        
+        local.execute(f"CREATE TEMP TABLE _dbonly_source_keys ({', '.join(quoted)})")
+        try:
+            stream = self._stream_query(source.connection_obj, source_type, self._snapshot_source_query(source, key_meta), [],
+                                        SNAPSHOT_BATCH_SIZE)
+            next(stream)
+            for rows in stream:
+                local.executemany(f"INSERT INTO _dbonly_source_keys VALUES ({', '.join('?' for _ in key_names)})",
+                                  [tuple(adapt(value) if adapt else value for adapt, value in zip(adapters, row)) for row in rows])
+            local.execute(f"CREATE INDEX temp._dbonly_source_keys_idx ON _dbonly_source_keys ({', '.join(quoted)})")
+            matches = ' AND '.join(f"k.{key} = t.{key}" for key in quoted)
+            cursor = local.execute(f"DELETE FROM {self._quote_identifier('sqlite', meta['name'])} AS t "
+                                   f"WHERE NOT EXISTS (SELECT 1 FROM _dbonly_source_keys AS k WHERE {matches})")
+            return cursor.rowcount
+        finally:
+            local.execute("DROP TABLE temp._dbonly_source_keys")
+    
+    def drop_snapshot(self, connection_id, name):
+        try:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            snapshot = self._find_snapshot(db_conn, name)
+            if snapshot is None:
+                return {"success": False, "error": f"No snapshot named {name}"}
+            
+            db_conn.snapshots.pop(name, None)
+            snapshot.db_conn.connection_obj.close()
+            os.remove(snapshot.path)
+            return {"success": True, "message": f"Snapshot {name} dropped"}
+            
+        except Exception as e:
+            logger.error(f"Drop snapshot error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def list_snapshots(self, connection_id):
+        try:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            snapshots = [self._find_snapshot(db_conn, name) for name in list(db_conn.snapshots)]
+            return {"success": True, "snapshots": [snapshot.status() for snapshot in snapshots if snapshot is not None]}
+            
+        except Exception as e:
+            logger.error(f"List snapshots error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def _get_snapshot_page(self, snapshot, limit, offset, max_cell_size, filters, order_by, since_version):
+        """A table-data page read from a snapshot; change detection only tells unchanged from reloaded"""
+        with snapshot.lock:
+            version = self._table_version(snapshot.db_conn, snapshot.name, None)
+            if since_version is not None and since_version == version:
+                result = {"success": True, "unchanged": True, "version": version, "limit": limit, "offset": offset}
+            else:
+                result = self._get_table_page(snapshot.db_conn, snapshot.name, limit, offset, filters, order_by)
+                result['version'] = version
+        result['snapshot'] = snapshot.status()
+        return self._cap_result_cells(result, max_cell_size)
+    
+    # Analysis of cached results
+    def _cache_result(self, connection_id, query, result):
+        """Keep a result for /api/result/analyze; its id, or None when it is too large to keep"""
+        size = sum(self._row_size(row.values()) for row in result['data'])
+        entry = CachedResult(uuid.uuid4().hex, connection_id, query, result.get('columns') or [], result['data'], size,
+                             result.get('truncated_by') if result.get('truncated') else None)
+        return entry.result_id if self.result_cache.put(entry) else None
+    
+    def _factorize(self, values):
+        """Integer code per value plus each distinct value, in order of first appearance"""
+        index = {}
+        uniques = []
+        codes = []
+        for value in values:
+            key = value
+            if isinstance(value, (dict, list)):
+                key = json.dumps(value, sort_keys=True, default=str)
+            elif isinstance(value, (bytearray, memoryview)):
+                key = bytes(value)
+            code = index.get(key)
+            if code is None:
+                code = index[key] = len(uniques)
+                uniques.append(value)
+            codes.append(code)
+        return codes, uniques
+    
+    def _column_codes(self, cached, column):
+        return cached.derive(('codes', column), lambda: self._factorize(cached.values[column]))
+    
+    def _group_codes(self, cached, columns, numpy):
+        """Group number per row and the key tuple of each group, for the given key columns"""
+        if not columns:
+            return [0] * cached.row_count, [()]
+        
+        if numpy is not None:
+            # Combine column codes pairwise, compacting after each step so the numbers stay small
+            combined = None
+            for column in columns:
+                codes, uniques = self._column_codes(cached, column)
+                codes = numpy.asarray(codes, dtype=numpy.int64)
+                combined = codes if combined is None else combined * len(uniques) + codes
+                _, first_rows, combined = numpy.unique(combined, return_index=True, return_inverse=True)
+            # Groups in order of first appearance, like the pure Python path
+            order = numpy.argsort(first_rows, kind='stable')
+            rank = numpy.empty_like(order)
+            rank[order] = numpy.arange(len(order))
+            group_rows = first_rows[order].tolist()
+            keys = [tuple(cached.values[column][row] for column in columns) for row in group_rows]
+            return rank[combined.reshape(-1)], keys
+        
+        per_column = [self._column_codes(cached, column)[0] for column in columns]
+        codes, code_keys = self._factorize(zip(*per_column))
+        column_uniques = [self._column_codes(cached, column)[1] for column in columns]
+        keys = [tuple(column_uniques[i][code] for i, code in enumerate(key)) for key in code_keys]
+        return codes, keys
+    
+    def _float_column(self, cached, column, numpy):
+        """Column as float64 with NaN for nulls and non-numbers, and whether every number was an integer"""
+        def build():
+            numbers = []
+            integral = True
+            for value in cached.values[column]:
+                if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+                    numbers.append(float(value))
+                    integral = integral and not isinstance(value, float) and value == int(value)
+                else:
+                    numbers.append(math.nan)
+            return numpy.asarray(numbers, dtype=numpy.float64), integral
+        return cached.derive(('float', column), build)
+    
+    def _aggregate(self, cached, spec, codes, group_count, numpy, rows=None):
+        """One aggregate per group; None for groups with nothing to aggregate
+        
+        codes gives the group of each row, or of each row listed in rows when only some take part.
+        """
+        op = spec['op']
+        column = spec.get('column')
+        values = cached.values[column] if column else None
+        if values is not None and rows is not None:
+            values = [values[row] for row in rows]
+        
+        if op == 'count' and column is None:
+            if numpy is not None:
+                return numpy.bincount(numpy.asarray(codes, dtype=numpy.int64), minlength=group_count).tolist()
+            counts = [0] * group_count
+            for code in codes:
+                counts[code] += 1
+            return counts
+        
+        if op == 'count_distinct':
+            seen = [set() for _ in range(group_count)]
+            value_codes = self._column_codes(cached, column)[0]
+            if rows is not None:
+                value_codes = [value_codes[row] for row in rows]
+            for code, value_code, value in zip(codes, value_codes, values):
+                if value is not None:
+                    seen[code].add(value_code)
+            return [len(group) for group in seen]
+        
+        numeric = numpy is not None and op in ('sum', 'avg', 'min', 'max')
+        if numeric:
+            floats, integral = self._float_column(cached, column, numpy)
+            if rows is not None:
+                floats = floats[rows]
+            present = ~numpy.isnan(floats)
+            # Text and date columns have no float form; their min/max is computed below
+            numeric = op in ('sum', 'avg') or present.sum() == sum(value is not None for value in values)
+        if numeric:
+            group_codes = numpy.asarray(codes, dtype=numpy.int64)[present]
+            numbers = floats[present]
+            counts = numpy.bincount(group_codes, minlength=group_count)
+            if op in ('sum', 'avg'):
+                totals = numpy.bincount(group_codes, weights=numbers, minlength=group_count)
+                if op == 'avg':
+                    return [float(t / c) if c else None for t, c in zip(totals.tolist(), counts.tolist())]
+                return [(int(t) if integral else t) if c else None for t, c in zip(totals.tolist(), counts.tolist())]
+            extreme = numpy.full(group_count, numpy.inf if op == 'min' else -numpy.inf)
+            (numpy.minimum if op == 'min' else numpy.maximum).at(extreme, group_codes, numbers)
+            return [(int(v) if integral else v) if c else None for v, c in zip(extreme.tolist(), counts.tolist())]
+        
+        if op == 'count':
+            counts = [0] * group_count
+            for code, value in zip(codes, values):
+                if value is not None:
+                    counts[code] += 1
+            return counts
+        
+        results = [None] * group_count
+        counts = [0] * group_count
+        for code, value in zip(codes, values):
+            if value is None:
+                continue
+            if op in ('sum', 'avg'):
+                if not isinstance(value, (int, float, Decimal)) or isinstance(value, bool):
+                    continue
+                value = float(value) if isinstance(value, Decimal) else value
+                results[code] = value if results[code] is None else results[code] + value
+            else:
+                current = results[code]
+                if current is None or (value < current if op == 'min' else value > current):
+                    results[code] = value
+            counts[code] += 1
+        if op == 'avg':
+            return [total / count if count else None for total, count in zip(results, counts)]
+        return results
+    
+    def analyze_result(self, result_id, group_by=None, aggregates=None, pivot=None, order_by=None, top=None):
+        """Group, pivot and aggregate a cached result without going back to the database"""
+        try:
+            error = self._worker_local_error("Result analysis")
+            if error:
+                return error
+            cached = self.result_cache.get(result_id)
+            if cached is None:
+                return {"success": False, "error": "Result not found; run the query again with cache_result"}
+            
+            group_by = list(group_by or [])
+            aggregates = [dict(spec) for spec in (aggregates or [{"op": "count"}])]
+            referenced = list(group_by)
+            for spec in aggregates:
+                spec['op'] = str(spec.get('op', '')).lower()
+                if spec['op'] not in ANALYZE_AGGREGATES:
+                    return {"success": False, "error": f"Unsupported aggregate: {spec['op']}"}
+                if spec.get('column') is None and spec['op'] != 'count':
+                    return {"success": False, "error": f"Aggregate {spec['op']} needs a column"}
+                if spec.get('column') is not None:
+                    referenced.append(spec['column'])
+                spec.setdefault('as', f"{spec['op']}_{spec['column']}" if spec.get('column') else spec['op'])
+            if pivot:
+                referenced.append(pivot.get('column'))
+                if len(aggregates) != 1:
+                    return {"success": False, "error": "A pivot takes exactly one aggregate"}
+            unknown = [col for col in referenced if col not in cached.values]
+            if unknown:
+                return {"success": False, "error": f"Unknown columns: {', '.join(map(str, unknown))}"}
+            
+            start_time = time.perf_counter()
+            numpy = drivers.get('numpy')
+            codes, keys = self._group_codes(cached, group_by, numpy)
+            
+            if pivot:
+                # Cells are aggregated over (row group, pivot value) pairs; rows whose pivot
+                # value was not asked for are left out
+                pivot_codes, pivot_uniques = self._column_codes(cached, pivot['column'])
+                pivot_values = pivot_uniques
+                if pivot.get('values') is not None:
+                    pivot_values = [value for value in pivot['values'] if value in pivot_uniques]
+                if len(pivot_values) > ANALYZE_MAX_PIVOT_COLUMNS:
+                    return {"success": False, "error": f"Pivot column has {len(pivot_values)} values; "
+                                                       f"at most {ANALYZE_MAX_PIVOT_COLUMNS} can become columns"}
+                position = {code: pivot_values.index(value) for code, value in enumerate(pivot_uniques)
+                            if value in pivot_values}
+                width = len(pivot_values)
+                rows = [row for row, pivot_code in enumerate(pivot_codes) if pivot_code in position]
+                cell_codes = [int(codes[row]) * width + position[pivot_codes[row]] for row in rows]
+                if len(rows) == cached.row_count:
+                    rows = None
+                cells = self._aggregate(cached, aggregates[0], cell_codes, len(keys) * width, numpy, rows)
+                value_columns = ['null' if value is None else str(value) for value in pivot_values]
+                columns = group_by + value_columns
+                data = []
+                for group, key in enumerate(keys):
+                    row = dict(zip(group_by, key))
+                    row.update(zip(value_columns, cells[group * width:(group + 1) * width]))
+                    data.append(row)
+            else:
+                columns = group_by + [spec['as'] for spec in aggregates]
+                results = [self._aggregate(cached, spec, codes, len(keys), numpy) for spec in aggregates]
+                data = [dict(zip(group_by, key)) for key in keys]
+                for spec, values in zip(aggregates, results):
+                    for row, value in zip(data, values):
+                        row[spec['as']] = value
+            
+            # Top-N without an explicit order ranks by the first aggregate, largest first
+            if top and not order_by and not pivot:
+                order_by = [f"-{aggregates[0]['as']}"]
+            for term in reversed(order_by or []):
+                descending = term.startswith('-')
+                column = term[1:] if descending else term
+                if column not in columns:
+                    return {"success": False, "error": f"Unknown order column: {column}"}
+                # Nulls last in either direction
+                present = [row for row in data if row.get(column) is not None]
+                missing = [row for row in data if row.get(column) is None]
+                present.sort(key=lambda row: row[column], reverse=descending)
+                data = present + missing
+            
+            group_count = len(data)
+            limit = int(top) if top else ANALYZE_MAX_GROUPS
+            truncated = group_count > limit
+            data = data[:limit]
+            
+            return {
+                "success": True,
+                "data": data,
+                "columns": columns,
+                "row_count": len(data),
+                "group_count": group_count,
+                "truncated": truncated and not top,
+                "source_rows": cached.row_count,
+                # The query itself was cut short, so these figures cover only the rows fetched
+                "source_truncated": cached.truncated_by is not None,
+                "source_truncated_by": cached.truncated_by,
+                "engine": "numpy" if numpy is not None else "python",
+                "execution_time": (time.perf_counter() - start_time) * 1000
+            }
+            
+        except Exception as e:
+            logger.error(f"Result analysis error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    # Large cell values
+    def _cap_result_cells(self, result, max_cell_size):
+        """Swap oversized and binary cells in a result for truncation markers"""
+        if not result.get('success') or not result.get('data'):
+            return result
+        
+        # Binary values always need a marker since JSON cannot carry bytes
+        max_cell_size = int(max_cell_size) if max_cell_size else sys.maxsize
+        truncated = 0
+        for row in result['data']:
+            for column, value in row.items():
+                if isinstance(value, (str, bytes, bytearray, memoryview)):
+                    capped = self._cap_cell(value, max_cell_size, exact=True)
+                    if capped is not value:
+                        row[column] = capped
+                        truncated += capped['__truncated__']
+        result['truncated_cells'] = truncated
+        return result
+    
+    def get_cell_value(self, connection_id, table_name, column, key):
+        """Open a chunked stream over one full cell, addressed by primary key"""
+        try:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            
+            conn = db_conn.connection_obj
+            db_type = db_conn.db_type.lower()
+            
+            schema = self.get_table_schema(connection_id, table_name)
+            if not schema['success']:
+                return schema
+            known = {col['name']: col for col in schema['columns']}
+            if column not in known:
+                return {"success": False, "error": f"Unknown column: {column}"}
+            
+            primary_key = sorted(col['name'] for col in schema['columns'] if col['primary_key'])
+            if db_type == 'sqlite' and list(key) == ['rowid']:
+                primary_key = ['rowid']
+            if not key or sorted(key) != primary_key:
+                return {"success": False, "error": f"Key must give the primary key columns: {', '.join(primary_key) or 'none'}"}
+            
+            placeholder = self._placeholder(db_type)
+            where_clause = ' AND '.join(
+                f"{name if name == 'rowid' else self._quote_identifier(db_type, name)} = {placeholder}" for name in key)
+            params = list(key.values())
+            table = self._quote_identifier(db_type, table_name)
+            quoted_column = self._quote_identifier(db_type, column)
+            
+            cursor = conn.cursor()
+            try:
+                if db_type == 'sqlite':
+                    cursor.execute(f"SELECT rowid, typeof({quoted_column}), length(CAST({quoted_column} AS BLOB)) "
+                                   f"FROM {table} WHERE {where_clause}", params)
+                    row = cursor.fetchone()
+                    if row is None:
+                        return {"success": False, "error": "Row not found"}
+                    rowid, value_type, length = row
+                    if value_type == 'null':
+                        return {"success": False, "error": "Cell is NULL"}
+                    value_type = 'blob' if value_type == 'blob' else 'text'
+                else:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {where_clause}", params)
+                    row = cursor.fetchone()
+                    count = list(row.values())[0] if isinstance(row, dict) else row[0]
+                    if not count:
+                        return {"success": False, "error": "Row not found"}
+                    value_type = 'blob' if self._type_family(known[column]['type']) == 'blob' else 'text'
+                    length = None
+            finally:
+                cursor.close()
+            
+            if db_type == 'sqlite':
+                chunks = self._stream_sqlite_cell(conn, table_name, column, rowid, where_clause, params, value_type)
+            else:
+                chunks = self._stream_cell_chunks(conn, db_type, table, quoted_column, where_clause, params, value_type)
+            
+            return {"success": True, "type": value_type, "length": length, "chunks": chunks}
+            
+        except Exception as e:
+            logger.error(f"Cell value error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def _stream_sqlite_cell(self, conn, table_name, column, rowid, where_clause, params, value_type):
+        """Stream a SQLite cell with incremental blob I/O instead of re-reading it per chunk"""
+        if hasattr(conn, 'blobopen'):
+            try:
+                blob = conn.blobopen(table_name, column, rowid, readonly=True)
+            except sqlite3.Error:
+                blob = None
+            if blob is not None:
+                with blob:
+                    while True:
+                        chunk = blob.read(CELL_STREAM_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        yield chunk
+                return
+        
+        table = self._quote_identifier('sqlite', table_name)
+        quoted_column = self._quote_identifier('sqlite', column)
+        yield from self._stream_cell_chunks(conn, 'sqlite', table, f"CAST({quoted_column} AS BLOB)", where_clause, params, 'blob')
+    
+    def _stream_cell_chunks(self, conn, db_type, table, column_expr, where_clause, params, value_type):
+        """Stream a cell by reading fixed-size substrings until a short chunk comes back"""
+        placeholder = self._placeholder(db_type)
+        if db_type == 'sqlite':
+            expr = f"substr({column_expr}, {placeholder}, {placeholder})"
+        elif db_type == 'postgresql':
+            expr = f"substring({column_expr} from {placeholder} for {placeholder})"
+        else:
+            expr = f"SUBSTRING({column_expr}, {placeholder}, {placeholder})"
+        query = f"SELECT {expr} FROM {table} WHERE {where_clause}"
+        
+        position = 1
+        while True:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, [position, CELL_STREAM_CHUNK_SIZE] + params)
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+            if row is None:
+                return
+            chunk = list(row.values())[0] if isinstance(row, dict) else row[0]
+            if not chunk:
+                return
+            yield chunk.encode('utf-8') if isinstance(chunk, str) else bytes(chunk)
+            if len(chunk) < CELL_STREAM_CHUNK_SIZE:
+                return
+            position += CELL_STREAM_CHUNK_SIZE
+    
+    # Column profiling
+    def _invalidate_table_caches(self, db_conn, table_name=None, schema_changed=False):
+        """Drop cached profiles and bump change counters after a write; None means any table may have changed"""
+        if table_name is None:
+            db_conn.write_epoch += 1
+            db_conn.profile_cache.drop()
+        else:
+            db_conn.table_versions[table_name] = db_conn.table_versions.get(table_name, 0) + 1
+            db_conn.profile_cache.drop(table_name)
+        if schema_changed:
+            db_conn.schema_cache.clear()
+        if table_name is not None and table_name not in db_conn.snapshots:
+            # Loads a snapshot another worker made, so the write marks it too
+            self._find_snapshot(db_conn, table_name)
+        for snapshot in list(db_conn.snapshots.values()):
+            if table_name is None or snapshot.meta.get('source_table') in (table_name, None):
+                snapshot.mark_dirty()
+    
+    def get_table_profile(self, connection_id, table_name, columns=None, sample_size=PROFILE_DEFAULT_SAMPLE,
+                          bins=PROFILE_HISTOGRAM_BINS, top_n=PROFILE_TOP_VALUES, exact=False, workers=4, refresh=False):
+        """Per-column statistics computed from a random sample of the table"""
+        try:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            
+            db_type = db_conn.db_type.lower()
+            sample_size = max(1, min(int(sample_size), PROFILE_MAX_SAMPLE))
+            bins = max(1, int(bins))
+            top_n = max(0, int(top_n))
+            workers = max(1, min(int(workers), PROFILE_MAX_WORKERS))
+            
+            schema = self.get_table_schema(connection_id, table_name)
+            if not schema['success']:
+                return schema
+            if not schema['columns']:
+                return {"success": False, "error": f"Table not found: {table_name}"}
+            
+            types = {col['name']: col['type'] for col in schema['columns']}
+            columns = [col for col in (columns or []) if col != '*'] or list(types)
+            unknown = [col for col in columns if col not in types]
+            if unknown:
+                return {"success": False, "error": f"Unknown columns: {', '.join(unknown)}"}
+            
+            cache_key = (table_name, tuple(columns), sample_size, bins, top_n, bool(exact))
+            # Another worker's writes can't invalidate this one's cache, so it is only used with a single worker
+            cached = db_conn.profile_cache.get(cache_key) if self.registry is None else None
+            if cached is not None and not refresh:
+                return dict(cached, cached=True)
+            
+            start_time = time.perf_counter()
+            conn = db_conn.connection_obj
+            rows, total_rows, estimated = self._fetch_profile_sample(conn, db_type, table_name, schema, columns, sample_size)
+            memory_budget.charge(sum(self._row_size(row) for row in rows))
+            
+            def profile_column(index):
+                name = columns[index]
+                values = [row[index] for row in rows]
+                return self._profile_column(name, types[name], values, total_rows, bins, top_n)
+            
+            # Threads overlap numpy's sorting of numeric columns, which releases the GIL;
+            # text columns are compared as Python objects and run one at a time either way
+            vectorized = drivers.available('numpy')
+            if vectorized and len(columns) > 1:
+                with ThreadPoolExecutor(max_workers=min(workers, len(columns))) as executor:
+                    profiles = list(executor.map(profile_column, range(len(columns))))
+            else:
+                profiles = [profile_column(i) for i in range(len(columns))]
+            
+            if exact:
+                exact_stats = self._exact_column_stats(db_conn, table_name, columns, types, workers)
+                for profile in profiles:
+                    profile.update(exact_stats[profile['name']])
+            
+            result = {
+                "success": True,
+                "table_name": table_name,
+                "columns": profiles,
+                "total_rows": total_rows,
+                "total_rows_estimated": estimated,
+                "sample_rows": len(rows),
+                "sampled": len(rows) < total_rows,
+                "exact": bool(exact),
+                "vectorized": vectorized,
+                "profiled_at": datetime.now().isoformat(),
+                "execution_time": (time.perf_counter() - start_time) * 1000
+            }
+            db_conn.profile_cache.put(cache_key, result)
+            return dict(result, cached=False)
+            
+        except MemoryBudgetError:
+            raise
+        except Exception as e:
+            logger.error(f"Table profile error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def _count_rows(self, conn, db_type, table_name):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {self._quote_identifier(db_type, table_name)}")
+            row = cursor.fetchone()
+            if isinstance(row, dict):
+                row = list(row.values())
+            return row[0]
+        finally:
+            cursor.close()
+    
+    def _fetch_tuples(self, conn, query, params=()):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        return [tuple(row.values()) if isinstance(row, dict) else tuple(row) for row in rows]
+    
+    def _fetch_profile_sample(self, conn, db_type, table_name, schema, columns, sample_size):
+        """Random sample of rows as tuples, with the table's row count and whether that count is an estimate
+        
+        The count comes from the database's statistics when it has them. Tables it puts within the
+        sample size are read whole, capped in case the statistics are stale.
+        """
+        column_list = ', '.join(self._quote_identifier(db_type, col) for col in columns)
+        table = self._quote_identifier(db_type, table_name)
+        total_rows = self._row_estimates(conn, db_type).get(table_name)
+        estimated = total_rows is not None
+        if not estimated:
+            total_rows = self._count_rows(conn, db_type, table_name)
+        
+        if total_rows <= sample_size:
+            if db_type == 'mssql':
+                rows = self._fetch_tuples(conn, f"SELECT TOP {sample_size + 1} {column_list} FROM {table}")
+            else:
+                rows = self._fetch_tuples(conn, f"SELECT {column_list} FROM {table} LIMIT {sample_size + 1}")
+            if len(rows) <= sample_size:
+                return rows, len(rows), False
+            total_rows, estimated = self._count_rows(conn, db_type, table_name), False
+        
+        if db_type in ('postgresql', 'mssql'):
+            # Block sampling reads only the pages it picks
+            percent = min(100.0, 100.0 * sample_size * PROFILE_OVERSAMPLE / total_rows)
+            clause = f"TABLESAMPLE SYSTEM ({percent:.6f})" if db_type == 'postgresql' else f"TABLESAMPLE ({percent:.6f} PERCENT)"
+            rows = self._fetch_tuples(conn, f"SELECT {column_list} FROM {table} {clause}")
+        else:
+            key = self._integer_key(db_type, schema)
+            if key is not None:
+                rows = self._fetch_key_range_sample(conn, db_type, table_name, key, column_list, sample_size)
+            else:
+                # No key to seek on: one pass over the table, but without sorting it
+                fraction = min(1.0, sample_size * PROFILE_OVERSAMPLE / total_rows)
+                rows = self._fetch_tuples(conn, f"SELECT {column_list} FROM {table} WHERE RAND() < {fraction:.9f}")
+        
+        if len(rows) > sample_size:
+            rows = random.sample(rows, sample_size)
+        return rows, total_rows, estimated
+    
+    def _fetch_key_range_sample(self, conn, db_type, table_name, key, column_list, sample_size):
+        """Rows from random starting points in evenly spaced key ranges, each an index seek"""
+        quoted_key = key if key == 'rowid' else self._quote_identifier(db_type, key)
+        placeholder = self._placeholder(db_type)
+        query = (f"SELECT {column_list} FROM {self._quote_identifier(db_type, table_name)} "
+                 f"WHERE {quoted_key} >= {placeholder} AND {quoted_key} < {placeholder} ORDER BY {quoted_key} LIMIT {placeholder}")
+        
+        low, high = self._key_bounds(conn, db_type, table_name, key)
+        ranges = self._split_key_range(low, high, min(PROFILE_SAMPLE_RANGES, sample_size))
+        per_range = -(-sample_size // len(ranges)) if ranges else 0
+        rows = []
+        for start, end in ranges:
+            begin = random.randrange(start, end)
+            found = self._fetch_tuples(conn, query, (begin, end, per_range))
+            if len(found) < per_range and begin > start:
+                # Wrap around to the start of the range so sparse keys still yield a full share
+                found += self._fetch_tuples(conn, query, (start, begin, per_range - len(found)))
+            rows.extend(found)
+        return rows
+    
+    def _profile_column(self, name, type_name, values, total_rows, bins, top_n):
+        family = self._type_family(type_name)
+        numpy = drivers.get('numpy')
+        if numpy is not None and family != 'blob':
+            profile = self._profile_column_vectorized(numpy, name, type_name, family, values, total_rows, bins, top_n)
+            if profile is not None:
+                return profile
+        
+        present = [value for value in values if value is not None]
+        profile = {
+            "name": name,
+            "type": type_name,
+            "family": family,
+            "null_fraction": (len(values) - len(present)) / len(values) if values else 0.0,
+        }
+        if not present:
+            profile["distinct_estimate"] = 0
+            return profile
+        
+        if family == 'blob':
+            lengths = [len(value) for value in present]
+            profile.update(min_length=min(lengths), max_length=max(lengths),
+                           avg_length=sum(lengths) / len(lengths))
+            return profile
+        
+        # Hashable, comparable keys: typeless SQLite columns may mix numbers and text
+        keys = [value if isinstance(value, (int, float, str)) else str(value) for value in present]
+        counts = {}
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+        singletons = sum(1 for count in counts.values() if count == 1)
+        profile["distinct_estimate"] = self._estimate_distinct(len(counts), singletons, len(values), total_rows)
+        profile["top_values"] = [{"value": value, "count": count} for value, count in
+                                 sorted(counts.items(), key=lambda item: -item[1])[:top_n]]
+        
+        numbers = []
+        if family in PROFILE_NUMERIC_FAMILIES or family == 'any':
+            for value in present:
+                try:
+                    numbers.append(float(value))
+                except (TypeError, ValueError):
+                    pass
+        if numbers and (family != 'any' or len(numbers) == len(present)):
+            profile.update(self._numeric_summary(numbers, bins))
+        else:
+            try:
+                profile.update(min=min(present), max=max(present))
+            except TypeError:
+                profile.update(min=min(keys, key=str), max=max(keys, key=str))
+            if family in ('text', 'any'):
+                lengths = [len(str(value)) for value in present]
+                profile.update(min_length=min(lengths), max_length=max(lengths),
+                               avg_length=sum(lengths) / len(lengths))
+        return profile
+    
+    def _profile_column_vectorized(self, numpy, name, type_name, family, values, total_rows, bins, top_n):
+        """_profile_column with numpy masks and numpy.unique; None for values it leaves to the Python loop
+        
+        Columns of plain numbers, or of text outside numeric columns, are handled here; dates,
+        decimals, mixed types and the like keep the Python loop's conversions.
+        """
+        column = numpy.empty(len(values), dtype=object)
+        try:
+            column[:] = values
+        except ValueError:
+            # Array-valued cells (PostgreSQL arrays) don't fit a flat array
+            return None
+        nulls = numpy.equal(column, None)
+        present = column[~nulls]
+        profile = {
+            "name": name,
+            "type": type_name,
+            "family": family,
+            "null_fraction": float(nulls.mean()) if len(values) else 0.0,
+        }
+        if not present.size:
+            profile["distinct_estimate"] = 0
+            return profile
+        
+        numeric = family in PROFILE_NUMERIC_FAMILIES or family == 'any'
+        kinds = set(map(type, present))
+        try:
+            if kinds == {int}:
+                present = present.astype(numpy.int64)
+            elif kinds <= {int, float}:
+                present = present.astype(numpy.float64)
+            elif kinds != {str} or numeric:
+                return None
+            uniques, counts = numpy.unique(present, return_counts=True)
+        except (TypeError, OverflowError):
+            return None
+        
+        singletons = int(numpy.count_nonzero(counts == 1))
+        profile["distinct_estimate"] = self._estimate_distinct(len(uniques), singletons, len(values), total_rows)
+        top = numpy.argsort(-counts, kind='stable')[:top_n]
+        profile["top_values"] = [{"value": value, "count": count} for value, count in
+                                 zip(uniques[top].tolist(), counts[top].tolist())]
+        
+        if numeric and present.dtype != object:
+            profile.update(self._numeric_summary(present.astype(numpy.float64), bins))
+        else:
+            # numpy.unique sorts, so its ends are the minimum and maximum
+            low, high = uniques[[0, -1]].tolist()
+            profile.update(min=low, max=high)
+            if family in ('text', 'any'):
+                lengths = numpy.fromiter(map(len, map(str, present.tolist())), dtype=numpy.int64, count=present.size)
+                profile.update(min_length=int(lengths.min()), max_length=int(lengths.max()),
+                               avg_length=float(lengths.mean()))
+        return profile
+    
+    def _estimate_distinct(self, distinct, singletons, sample_rows, total_rows):
+        """Guaranteed-error estimator: values seen once are scaled up, repeated values counted once"""
+        if sample_rows >= total_rows:
+            return distinct
+        repeated = distinct - singletons
+        return min(total_rows, round((total_rows / sample_rows) ** 0.5 * singletons + repeated))
+    
+    def _numeric_summary(self, numbers, bins):
+        numpy = drivers.get('numpy')
+        if numpy is not None:
+            values = numpy.asarray(numbers, dtype=numpy.float64)
+            counts, edges = numpy.histogram(values, bins=bins)
+            p25, p50, p75 = numpy.percentile(values, [25, 50, 75])
+            return {
+                "min": float(values.min()), "max": float(values.max()),
+                "mean": float(values.mean()), "stddev": float(values.std()),
+                "p25": float(p25), "median": float(p50), "p75": float(p75),
+                "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+            }
+        
+        values = sorted(numbers)
+        n = len(values)
+        mean = sum(values) / n
+        
+        def percentile(q):
+            position = (n - 1) * q
+            low = int(position)
+            high = min(low + 1, n - 1)
+            return values[low] + (values[high] - values[low]) * (position - low)
+        
+        low, high = values[0], values[-1]
+        width = (high - low) / bins if high > low else 0
+        counts = [0] * bins
+        for value in values:
+            counts[min(int((value - low) / width), bins - 1) if width else 0] += 1
+        if width:
+            edges = [low + width * i for i in range(bins)] + [high]
+        else:
+            # Same convention as numpy for a constant column: a unit-wide range around the value
+            edges = [low - 0.5 + i / bins for i in range(bins + 1)]
+            counts = [0] * bins
+            counts[bins // 2] = n
+        return {
+            "min": low, "max": high,
+            "mean": mean, "stddev": (sum((v - mean) ** 2 for v in values) / n) ** 0.5,
+            "p25": percentile(0.25), "median": percentile(0.5), "p75": percentile(0.75),
+            "histogram": {"edges": edges, "counts": counts},
+        }
+    
+    def _exact_column_stats(self, db_conn, table_name, columns, types, workers):
+        """Full-table null and distinct counts, one aggregate query per column over parallel handles"""
+        db_type = db_conn.db_type.lower()
+        table = self._quote_identifier(db_type, table_name)
+        
+        # In-memory SQLite databases cannot be reopened, so they are profiled on the primary handle
+        handles = queue.Queue()
+        opened = []
+        shared = workers == 1 or len(columns) == 1 or (
+            db_type == 'sqlite' and db_conn.profile and db_conn.profile.get('database') == ':memory:')
+        if shared:
+            handles.put(db_conn.connection_obj)
+            workers = 1
+        else:
+            workers = min(workers, len(columns))
+            for _ in range(workers):
+                conn = self._open_additional_connection(db_conn)
+                opened.append(conn)
+                handles.put(conn)
+        
+        def aggregate(name):
+            quoted = self._quote_identifier(db_type, name)
+            conn = handles.get()
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT COUNT(*), COUNT({quoted}), COUNT(DISTINCT {quoted}) FROM {table}")
+                row = cursor.fetchone()
+                if isinstance(row, dict):
+                    row = list(row.values())
+                total, non_null, distinct = row
+                return name, {
+                    "null_fraction": (total - non_null) / total if total else 0.0,
+                    "distinct_count": distinct,
+                }
+            finally:
+                cursor.close()
+                if db_type == 'postgresql':
+                    conn.rollback()
+                handles.put(conn)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return dict(executor.map(aggregate, columns))
+        finally:
+            for conn in opened:
+                conn.close()
+    
+    # MongoDB
+    def _mongo_database(self, db_conn):
+        return db_conn.connection_obj[db_conn.connection_info['database']]
+    
+    def _mongo_value(self, value):
+        """Flatten BSON values for tabular results: ids and decimals as text, sub-documents as JSON"""
+        type_name = type(value).__name__
+        if type_name == 'ObjectId':
+            return str(value)
+        if type_name == 'Decimal128':
+            return str(value.to_decimal())
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=str)
+        return value
+    
+    def _mongo_row(self, document):
+        return {key: self._mongo_value(value) for key, value in document.items()}
+    
+    def _mongo_id(self, value):
+        """Accept an ObjectId given as its 24-character hex text"""
+        if isinstance(value, str) and re.fullmatch(r"[0-9a-fA-F]{24}", value):
+            return drivers.get('bson').ObjectId(value)
+        return value
+    
+    def _compile_mongo_filters(self, filters, where_conditions=None):
+        """The table-data filter tree as a MongoDB query document"""
+        count = [0]
+        
+        def compile_node(node):
+            if isinstance(node, list):
+                node = {"and": node}
+            if 'and' in node or 'or' in node:
+                key = 'and' if 'and' in node else 'or'
+                parts = [part for part in (compile_node(child) for child in node[key]) if part]
+                return {f"${key}": parts} if parts else {}
+            
+            count[0] += 1
+            if count[0] > FILTER_MAX_PREDICATES:
+                raise ValueError(f"Too many filter predicates (max {FILTER_MAX_PREDICATES})")
+            
+            field = str(node['column'])
+            if field.startswith('$'):
+                raise ValueError(f"Invalid field name: {field}")
+            op = str(node.get('op', 'eq')).lower()
+            value = node.get('value')
+            if field == '_id':
+                value = [self._mongo_id(v) for v in value] if isinstance(value, list) else self._mongo_id(value)
+            
+            if op == 'is_null':
+                return {field: None}
+            if op == 'not_null':
+                return {field: {"$ne": None}}
+            if op == 'between':
+                if not isinstance(value, list) or len(value) != 2:
+                    raise ValueError("Filter 'between' needs a [low, high] value")
+                return {field: {"$gte": value[0], "$lte": value[1]}}
+            if op in ('like', 'not_like'):
+                # SQL LIKE wildcards translated to an anchored regular expression
+                pattern = ''.join('.*' if ch == '%' else '.' if ch == '_' else re.escape(ch) for ch in str(value))
+                regex = {"$regex": f"^{pattern}$", "$options": "i"}
+                return {field: regex if op == 'like' else {"$not": regex}}
+            if op not in MONGO_FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            if op in ('in', 'not_in') and (not isinstance(value, list) or not value):
+                raise ValueError(f"Filter '{op}' needs a non-empty list value")
+            return {field: {MONGO_FILTER_OPERATORS[op]: value}}
+        
+        query = compile_node(filters or [])
+        if where_conditions:
+            conditions = {key: self._mongo_id(value) if key == '_id' else value
+                          for key, value in where_conditions.items()}
+            query = {"$and": [query, conditions]} if query else conditions
+        return query
+    
+    def _mongo_sort(self, order_by):
+        sort = []
+        for item in order_by or []:
+            if isinstance(item, str):
+                item = {"column": item[1:], "direction": "desc"} if item.startswith('-') else {"column": item}
+            direction = str(item.get('direction', 'asc')).lower()
+            if direction not in ('asc', 'desc'):
+                raise ValueError(f"Invalid sort direction: {direction}")
+            sort.append((item['column'], -1 if direction == 'desc' else 1))
+        return sort
+    
+    def _mongo_cursor(self, database, spec):
+        """Open a find or aggregate cursor from a JSON query spec"""
+        if isinstance(spec, str):
+            spec = json.loads(spec)
+        if not isinstance(spec, dict) or not spec.get('collection'):
+            raise ValueError('MongoDB queries are JSON objects like {"collection": "users", "find": {...}}')
+        
+        collection = database[spec['collection']]
+        batch_size = max(1, min(int(spec.get('batch_size', MONGO_DEFAULT_BATCH_SIZE)), MONGO_MAX_BATCH_SIZE))
+        
+        if 'aggregate' in spec:
+            return collection.aggregate(spec['aggregate'], batchSize=batch_size, allowDiskUse=True)
+        
+        cursor = collection.find(spec.get('find') or {}, spec.get('projection') or None, batch_size=batch_size)
+        sort = spec.get('sort')
+        if sort:
+            cursor = cursor.sort(list(sort.items()) if isinstance(sort, dict) else [tuple(item) for item in sort])
+        if spec.get('skip'):
+            cursor = cursor.skip(int(spec['skip']))
+        if spec.get('limit'):
+            cursor = cursor.limit(int(spec['limit']))
+        return cursor
+    
+    def _execute_mongodb_query(self, database, query):
+        """Run a find/aggregate/count spec, reading at most "limit" documents from the cursor"""
+        spec = json.loads(query) if isinstance(query, str) else query
+        if isinstance(spec, dict) and 'count' in spec:
+            count = database[spec['collection']].count_documents(spec['count'] or {})
+            return {"success": True, "data": [{"count": count}], "columns": ["count"], "row_count": 1}
+        
+        limit = int(spec.get('limit') or MONGO_DEFAULT_LIMIT) if isinstance(spec, dict) else MONGO_DEFAULT_LIMIT
+        if isinstance(spec, dict) and 'aggregate' not in spec:
+            # One document past the limit tells whether more are available
+            spec = dict(spec, limit=limit + 1)
+        cursor = self._mongo_cursor(database, spec)
+        try:
+            rows = []
+            columns = {}
+            has_more = False
+            for document in cursor:
+                if len(rows) == limit:
+                    has_more = True
+                    break
+                rows.append(self._mongo_row(document))
+                columns.update(dict.fromkeys(document))
+        finally:
+            cursor.close()
+        
+        return {"success": True, "data": rows, "columns": list(columns), "row_count": len(rows), "has_more": has_more}
+    
+    def stream_mongodb_query(self, connection_id, spec):
+        """Generator of NDJSON lines for a find/aggregate spec, one cursor batch in memory at a time"""
+        db_conn = self._get_connection(connection_id)
+        if db_conn is None:
+            raise LookupError("Connection not found")
+        
+        if db_conn.db_type.lower() != 'mongodb':
+            raise ValueError("Streaming find/aggregate queries requires a MongoDB connection")
+        
+        # Opened before the response starts so spec errors come back as ordinary JSON errors
+        cursor = self._mongo_cursor(self._mongo_database(db_conn), spec)
+        
+        def generate():
+            row_count = 0
+            try:
+                for document in cursor:
+                    row_count += 1
+                    yield json.dumps(document, default=str) + '\n'
+                yield json.dumps({"__end__": True, "row_count": row_count}) + '\n'
+            finally:
+                cursor.close()
+        
+        return generate()
+    
+    def _get_mongodb_info(self, database):
+        try:
+            return {
+                "success": True,
+                "type": "mongodb",
+                "tables": sorted(database.list_collection_names()),
+                "database": database.name
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _get_mongodb_table_schema(self, database, collection_name):
+        """Infer top-level fields and their BSON types from a random sample of documents"""
+        try:
+            collection = database[collection_name]
+            documents = list(collection.aggregate([{"$sample": {"size": MONGO_SCHEMA_SAMPLE}}]))
+            
+            fields = {}
+            for document in documents:
+                for key, value in document.items():
+                    field = fields.setdefault(key, {"count": 0, "types": {}})
+                    field["count"] += 1
+                    type_name = 'null' if value is None else type(value).__name__
+                    field["types"][type_name] = field["types"].get(type_name, 0) + 1
+            
+            columns = []
+            for name, field in fields.items():
+                types = sorted(field["types"], key=lambda t: -field["types"][t])
+                columns.append({
+                    'name': name,
+                    'type': '|'.join(types),
+                    'not_null': field["count"] == len(documents) and 'null' not in types,
+                    'default_value': None,
+                    'primary_key': name == '_id',
+                    'frequency': field["count"] / len(documents)
+                })
+            
+            return {
+                "success": True,
+                "table_name": collection_name,
+                "columns": columns,
+                "indexes": [{"name": name, "keys": info.get('key')} for name, info in collection.index_information().items()],
+                "sampled_documents": len(documents)
+            }
+            
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _fetch_mongodb_sample(self, database, collection_name, columns, limit, max_cell_size):
+        limit = max(1, min(int(limit), SAMPLE_MAX_ROWS))
+        projection = {col: 1 for col in columns} if columns else None
+        cursor = database[collection_name].find({}, projection, limit=limit)
+        try:
+            rows = [self._mongo_row(document) for document in cursor]
+        finally:
+            cursor.close()
+        return [{key: self._cap_cell(value, max_cell_size) for key, value in row.items()} for row in rows]
+    
+    def _get_mongodb_page(self, db_conn, collection_name, limit, offset, filters=None, order_by=None,
+                          columns=None, where_conditions=None, count=True):
+        """One page of a collection with filters, sort and projection pushed down to the server"""
+        collection = self._mongo_database(db_conn)[collection_name]
+        query = self._compile_mongo_filters(filters, where_conditions)
+        projection = {col: 1 for col in columns} if columns and columns != ['*'] else None
+        
+        cursor = collection.find(query, projection, skip=int(offset or 0), limit=int(limit or 0),
+                                 batch_size=min(max(int(limit or 0), 1), MONGO_MAX_BATCH_SIZE))
+        sort = self._mongo_sort(order_by)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            rows = []
+            result_columns = {}
+            for document in cursor:
+                rows.append(self._mongo_row(document))
+                result_columns.update(dict.fromkeys(document))
+        finally:
+            cursor.close()
+        
+        result = {
+            "success": True,
+            "data": rows,
+            "columns": list(result_columns) or list(projection or []),
+            "row_count": len(rows),
+            "limit": limit,
+            "offset": offset
+        }
+        if count:
+            # Unfiltered counts come from collection metadata instead of a scan
+            result["total_count"] = collection.count_documents(query) if query else collection.estimated_document_count()
+        return result
+    
+    def _sqlite_connection(self, connection_id, feature):
+        """A SQLite connection, for features built from SQLite triggers and virtual tables"""
+        db_conn = self._get_connection(connection_id)
+        if db_conn is None:
+            raise LookupError("Connection not found")
+        
+        if db_conn.db_type.lower() != 'sqlite':
+            raise ValueError(f"{feature} are only available for SQLite")
+        return db_conn
+    
+    # Change detection
+    def _change_log_names(self, table_name):
+        log_name = f"{table_name}{CHANGE_LOG_SUFFIX}"
+        return log_name, [f"{log_name}_ai", f"{log_name}_au", f"{log_name}_ad"]
+    
+    def _scalar(self, conn, query, params=()):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            if isinstance(row, dict):
+                row = list(row.values())
+            return row[0] if row else None
+        finally:
+            cursor.close()
+    
+    def _version_value(self, value):
+        """Version parts must survive a JSON round trip unchanged"""
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+    
+    def _has_change_log(self, conn, table_name):
+        log_name, _ = self._change_log_names(table_name)
+        return self._scalar(conn, "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?", [log_name]) > 0
+    
+    def _session_idle(self, conn, db_type):
+        """Whether a MySQL/PostgreSQL session has no transaction open, so one ended after our reads held only them"""
+        if db_type == 'postgresql':
+            return conn.info.transaction_status == drivers.get('psycopg2').extensions.TRANSACTION_STATUS_IDLE
+        if db_type == 'mysql':
+            return not conn.server_status & drivers.get('pymysql').constants.SERVER_STATUS.SERVER_STATUS_IN_TRANS
+        return False
+    
+    def _table_version(self, db_conn, table_name, change_column=None):
+        """Cheap token that changes whenever the table may have changed"""
+        conn = db_conn.connection_obj
+        db_type = db_conn.db_type.lower()
+        idle = self._session_idle(conn, db_type)
+        table = self._quote_identifier(db_type, table_name)
+        version = {
+            "epoch": db_conn.write_epoch,
+            "writes": db_conn.table_versions.get(table_name, 0),
+        }
+        
+        try:
+            # Writes from other clients: per-connection commit counter for SQLite, engine statistics elsewhere
+            if db_type == 'sqlite':
+                version["source"] = self._scalar(conn, "PRAGMA data_version")
+                if self._has_change_log(conn, table_name):
+                    log = self._quote_identifier(db_type, self._change_log_names(table_name)[0])
+                    version["log_seq"] = self._scalar(conn, f"SELECT COALESCE(MAX(seq), 0) FROM {log}")
+            elif db_type == 'mysql':
+                version["source"] = self._scalar(
+                    conn, "SELECT UPDATE_TIME FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+                    [table_name])
+            elif db_type == 'postgresql':
+                version["source"] = self._scalar(
+                    conn, "SELECT n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables WHERE relname = %s",
+                    [table_name])
+            elif db_type == 'mssql':
+                version["source"] = self._scalar(
+                    conn, "SELECT MAX(last_user_update) FROM sys.dm_db_index_usage_stats "
+                          "WHERE database_id = DB_ID() AND object_id = OBJECT_ID(?)", [table_name])
+            
+            if change_column:
+                column = self._column_ref(db_type, self._get_table_columns(db_conn, table_name), change_column)
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(f"SELECT MAX({column}), COUNT(*) FROM {table}")
+                    row = cursor.fetchone()
+                    if isinstance(row, dict):
+                        row = list(row.values())
+                finally:
+                    cursor.close()
+                version["marker"], version["rows"] = row[0], row[1]
+        finally:
+            # End the read transaction so the next check sees fresh statistics and snapshots,
+            # unless the session already had one open that a rollback would discard
+            if idle:
+                conn.rollback()
+        
+        return {key: self._version_value(value) for key, value in version.items()}
+    
+    def _get_table_delta(self, db_conn, table_name, since, version, limit, offset, filters, order_by=None,
+                         change_column=None):
+        """Rows changed since an earlier version, or None when a full page reload is needed
+        
+        Only an unsorted first page can be patched: changed rows elsewhere can't be placed on a later page
+        or in sort order without reading the rows around them.
+        """
+        if not isinstance(since, dict) or int(offset) > 0 or order_by:
+            return None
+        db_type = db_conn.db_type.lower()
+        conn = db_conn.connection_obj
+        idle = self._session_idle(conn, db_type)
+        known_columns = self._get_table_columns(db_conn, table_name)
+        table = self._quote_identifier(db_type, table_name)
+        where_clause, values_list = self._build_where(db_type, known_columns, None, filters)
+        placeholder = self._placeholder(db_type)
+        schema = self.get_table_schema(db_conn.connection_id, table_name)
+        key = self._integer_key(db_type, schema)
+        
+        if version.get('log_seq') is not None and isinstance(since.get('log_seq'), int):
+            log = self._quote_identifier(db_type, self._change_log_names(table_name)[0])
+            oldest = self._scalar(conn, f"SELECT MIN(seq) FROM {log}")
+            if oldest is not None and oldest > since['log_seq'] + 1:
+                return None
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT DISTINCT row_key FROM {log} WHERE seq > ? LIMIT ?", [since['log_seq'], int(limit) + 1])
+                changed_keys = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+            if len(changed_keys) > int(limit):
+                return None
+            match_clause = f"{key} IN ({', '.join('?' for _ in changed_keys)})" if key == 'rowid' else \
+                f"{self._quote_identifier(db_type, key)} IN ({', '.join('?' for _ in changed_keys)})"
+            match_params = changed_keys
+        elif change_column and since.get('marker') is not None and version.get('rows') is not None:
+            # An updated_at column shows inserts and updates but not deletes
+            if version['rows'] < (since.get('rows') or 0) or key is None:
+                return None
+            changed_keys = None
+            match_clause = f"{self._column_ref(db_type, known_columns, change_column)} > {placeholder}"
+            match_params = [since['marker']]
+        else:
+            return None
+        
+        if changed_keys == []:
+            rows, columns = [], list(known_columns)
+        else:
+            key_select = "rowid, " if key == 'rowid' else ""
+            where = f"{where_clause} AND {match_clause}" if where_clause else f"WHERE {match_clause}"
+            if db_type == 'mssql':
+                query = f"SELECT TOP {int(limit) + 1} {key_select}* FROM {table} {where}"
+            else:
+                query = f"SELECT {key_select}* FROM {table} {where} LIMIT {int(limit) + 1}"
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, values_list + match_params)
+                rows, columns = self._fetch_dicts(cursor)
+                if not rows and cursor.description:
+                    columns = [description[0] for description in cursor.description]
+            finally:
+                cursor.close()
+            if len(rows) > int(limit):
+                return None
+        
+        # Logged keys that no longer match are deleted rows or rows that fell out of the filter
+        returned = {row[key] for row in rows}
+        removed_keys = [k for k in (changed_keys or []) if k not in returned]
+        
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {table} {where_clause}", values_list)
+            row = cursor.fetchone()
+            total_count = list(row.values())[0] if isinstance(row, dict) else row[0]
+        finally:
+            cursor.close()
+            if idle:
+                conn.rollback()
+        
+        return {
+            "success": True,
+            "delta": True,
+            "unchanged": not rows and not removed_keys,
+            "key": key,
+            "data": rows,
+            "columns": columns,
+            "row_count": len(rows),
+            "removed_keys": removed_keys,
+            "total_count": total_count
+        }
+    
+    def enable_change_log(self, connection_id, table_name):
+        """Record changed row keys of a SQLite table so refreshes can return only those rows"""
+        try:
+            db_conn = self._sqlite_connection(connection_id, "Change logs")
+            conn = db_conn.connection_obj
+            
+            schema = self.get_table_schema(connection_id, table_name)
+            if not schema['success']:
+                return schema
+            if not schema['columns']:
+                return {"success": False, "error": f"Table not found: {table_name}"}
+            
+            key = self._integer_key('sqlite', schema)
+            key_ref = key if key == 'rowid' else self._quote_identifier('sqlite', key)
+            log_name, triggers = self._change_log_names(table_name)
+            q = lambda name: self._quote_identifier('sqlite', name)
+            table, log = q(table_name), q(log_name)
+            
+            # Each trigger also trims the log so it never grows past CHANGE_LOG_MAX_ROWS
+            trim = f"DELETE FROM {log} WHERE seq <= (SELECT MAX(seq) FROM {log}) - {CHANGE_LOG_MAX_ROWS};"
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {log} (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                    f"row_key INTEGER NOT NULL, op TEXT NOT NULL, changed_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+                for trigger, event, ref, op in ((triggers[0], 'INSERT', 'new', 'insert'),
+                                                (triggers[1], 'UPDATE', 'new', 'update'),
+                                                (triggers[2], 'DELETE', 'old', 'delete')):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {q(trigger)}")
+                    extra = ""
+                    if event == 'UPDATE':
+                        # A key change is a delete of the old key plus a write of the new one
+                        extra = (f"INSERT INTO {log}(row_key, op) SELECT old.{key_ref}, 'delete' "
+                                 f"WHERE old.{key_ref} IS NOT new.{key_ref}; ")
+                    cursor.execute(
+                        f"CREATE TRIGGER {q(trigger)} AFTER {event} ON {table} BEGIN {extra}"
+                        f"INSERT INTO {log}(row_key, op) VALUES ({ref}.{key_ref}, '{op}'); {trim} END")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+            self._invalidate_table_caches(db_conn, table_name, schema_changed=True)
+            
+            return {"success": True, "table_name": table_name, "log_name": log_name, "key": key}
+            
+        except Exception as e:
+            logger.error(f"Enable change log error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def disable_change_log(self, connection_id, table_name):
+        """Drop a table's change log and its triggers"""
+        try:
+            db_conn = self._sqlite_connection(connection_id, "Change logs")
+            conn = db_conn.connection_obj
+            log_name, triggers = self._change_log_names(table_name)
+            
+            cursor = conn.cursor()
+            try:
+                for trigger in triggers:
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {self._quote_identifier('sqlite', trigger)}")
+                cursor.execute(f"DROP TABLE IF EXISTS {self._quote_identifier('sqlite', log_name)}")
+                conn.commit()
+            finally:
+                cursor.close()
+            self._invalidate_table_caches(db_conn, table_name, schema_changed=True)
+            
+            return {"success": True, "message": f"Change log dropped for {table_name}"}
+            
+        except Exception as e:
+            logger.error(f"Disable change log error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    # SQLite full-text search
+    def _fts_names(self, table_name):
+        index_name = f"{table_name}{FTS_SUFFIX}"
+        return index_name, [f"{index_name}_ai", f"{index_name}_ad", f"{index_name}_au"]
+    
+    def _is_internal_table(self, table_name):
+        """FTS indexes with their shadow tables, and change logs, kept next to the user's tables"""
+        return (table_name.startswith('sqlite_') or table_name.endswith(CHANGE_LOG_SUFFIX)
+                or re.search(rf"{re.escape(FTS_SUFFIX)}(_data|_idx|_docsize|_config|_content)?$", table_name) is not None)
+    
+    def build_fts_index(self, connection_id, table_name, columns, tokenizer='unicode61'):
+        """Build an external-content FTS5 index over table columns, kept in sync by triggers"""
+        try:
+            db_conn = self._sqlite_connection(connection_id, "Full-text search indexes")
+            conn = db_conn.connection_obj
+            
+            schema = self.get_table_schema(connection_id, table_name)
+            if not schema['success']:
+                return schema
+            known_columns = [col['name'] for col in schema['columns']]
+            if not known_columns:
+                return {"success": False, "error": f"Table not found: {table_name}"}
+            if not columns:
+                return {"success": False, "error": "At least one column required"}
+            for col in columns:
+                self._column_ref('sqlite', known_columns, col)
+            if not re.fullmatch(r"[A-Za-z0-9_ ]+", tokenizer or ''):
+                return {"success": False, "error": f"Invalid tokenizer: {tokenizer}"}
+            
+            # Integer primary keys alias the rowid; other tables use the implicit rowid
+            key = self._integer_key('sqlite', schema)
+            index_name, triggers = self._fts_names(table_name)
+            q = lambda name: self._quote_identifier('sqlite', name)
+            table, index = q(table_name), q(index_name)
+            column_list = ', '.join(q(col) for col in columns)
+            new_values = ', '.join(f"new.{q(col)}" for col in columns)
+            old_values = ', '.join(f"old.{q(col)}" for col in columns)
+            key_ref = key if key == 'rowid' else q(key)
+            
+            start_time = time.perf_counter()
+            cursor = conn.cursor()
+            try:
+                for trigger in triggers:
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {q(trigger)}")
+                cursor.execute(f"DROP TABLE IF EXISTS {index}")
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {index} USING fts5({column_list}, "
+                    f"content={self._sql_string(table_name)}, content_rowid={self._sql_string(key)}, "
+                    f"tokenize={self._sql_string(tokenizer)})")
+                cursor.execute(
+                    f"CREATE TRIGGER {q(triggers[0])} AFTER INSERT ON {table} BEGIN "
+                    f"INSERT INTO {index}(rowid, {column_list}) VALUES (new.{key_ref}, {new_values}); END")
+                cursor.execute(
+                    f"CREATE TRIGGER {q(triggers[1])} AFTER DELETE ON {table} BEGIN "
+                    f"INSERT INTO {index}({index}, rowid, {column_list}) VALUES ('delete', old.{key_ref}, {old_values}); END")
+                cursor.execute(
+                    f"CREATE TRIGGER {q(triggers[2])} AFTER UPDATE ON {table} BEGIN "
+                    f"INSERT INTO {index}({index}, rowid, {column_list}) VALUES ('delete', old.{key_ref}, {old_values}); "
+                    f"INSERT INTO {index}(rowid, {column_list}) VALUES (new.{key_ref}, {new_values}); END")
+                cursor.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+                conn.commit()
+                cursor.execute(f"SELECT COUNT(*) FROM {index}")
+                indexed_rows = cursor.fetchone()[0]
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+            self._invalidate_table_caches(db_conn, table_name, schema_changed=True)
+            
+            return {
+                "success": True,
+                "table_name": table_name,
+                "index_name": index_name,
+                "columns": columns,
+                "indexed_rows": indexed_rows,
+                "execution_time": (time.perf_counter() - start_time) * 1000
+            }
+            
+        except Exception as e:
+            logger.error(f"Build FTS index error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def drop_fts_index(self, connection_id, table_name):
+        """Drop a table's FTS5 index and its sync triggers"""
+        try:
+            db_conn = self._sqlite_connection(connection_id, "Full-text search indexes")
+            conn = db_conn.connection_obj
+            index_name, triggers = self._fts_names(table_name)
+            
+            cursor = conn.cursor()
+            try:
+                for trigger in triggers:
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {self._quote_identifier('sqlite', trigger)}")
+                cursor.execute(f"DROP TABLE IF EXISTS {self._quote_identifier('sqlite', index_name)}")
+                conn.commit()
+            finally:
+                cursor.close()
+            self._invalidate_table_caches(db_conn, table_name, schema_changed=True)
+            
+            return {"success": True, "message": f"Full-text index dropped for {table_name}"}
+            
+        except Exception as e:
+            logger.error(f"Drop FTS index error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def search_fts_index(self, connection_id, table_name, search, limit=FTS_DEFAULT_LIMIT, offset=0, raw=False):
+        """Ranked, paginated full-text search joined back to the base table"""
+        try:
+            db_conn = self._sqlite_connection(connection_id, "Full-text search indexes")
+            conn = db_conn.connection_obj
+            index_name, _ = self._fts_names(table_name)
+            
+            schema = self.get_table_schema(connection_id, table_name)
+            if not schema['success']:
+                return schema
+            key = self._integer_key('sqlite', schema)
+            key_ref = key if key == 'rowid' else self._quote_identifier('sqlite', key)
+            
+            if not raw:
+                # Plain search text: every word must match, quoted so FTS5 syntax characters are literal
+                terms = [term.replace('"', '""') for term in search.split()]
+                search = ' '.join(f'"{term}"' for term in terms)
+            if not search:
+                return {"success": False, "error": "Search text required"}
+            
+            table = self._quote_identifier('sqlite', table_name)
+            index = self._quote_identifier('sqlite', index_name)
+            start_time = time.perf_counter()
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"SELECT t.*, bm25({index}) AS _rank, snippet({index}, -1, '[', ']', '...', 12) AS _snippet "
+                    f"FROM {index} JOIN {table} t ON t.{key_ref} = {index}.rowid "
+                    f"WHERE {index} MATCH ? ORDER BY _rank LIMIT ? OFFSET ?",
+                    [search, int(limit), int(offset)])
+                result, columns = self._fetch_dicts(cursor)
+                if not result and cursor.description:
+                    columns = [description[0] for description in cursor.description]
+                
+                cursor.execute(f"SELECT COUNT(*) FROM {index} WHERE {index} MATCH ?", [search])
+                total_count = cursor.fetchone()[0]
+            finally:
+                cursor.close()
+            
+            return {
+                "success": True,
+                "data": result,
+                "columns": columns,
+                "row_count": len(result),
+                "total_count": total_count,
+                "limit": int(limit),
+                "offset": int(offset),
+                "execution_time": (time.perf_counter() - start_time) * 1000
+            }
+            
+        except Exception as e:
+            logger.error(f"FTS search error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    # Index advisor
+    def _workload_predicates(self, where_conditions, filters):
+        """Columns compared by equality and by range in the top-level AND of a filter tree"""
+        equality = list((where_conditions or {}).keys())
+        ranges = []
+        
+        def walk(node):
+            if isinstance(node, list):
+                node = {"and": node}
+            if 'and' in node:
+                for child in node['and']:
+                    walk(child)
+                return
+            if 'or' in node:
+                # One index can't serve alternatives
+                if len(node['or']) == 1:
+                    walk(node['or'][0])
+                return
+            sql_op = FILTER_OPERATORS.get(str(node.get('op', 'eq')).lower())
+            value = node.get('value')
+            if sql_op in ADVISOR_EQUALITY_OPS:
+                equality.append(node['column'])
+            elif sql_op == 'LIKE' and isinstance(value, str) and value[:1] in ('%', '_'):
+                return
+            elif sql_op in ADVISOR_RANGE_OPS:
+                ranges.append(node['column'])
+        
+        if filters:
+            walk(filters)
+        return equality, ranges
+    
+    def _workload_order(self, order_by):
+        terms = []
+        for item in order_by or []:
+            if isinstance(item, str):
+                terms.append((item.lstrip('-'), item.startswith('-')))
+            else:
+                terms.append((item['column'], str(item.get('direction', 'asc')).lower() == 'desc'))
+        return terms
+    
+    def _record_workload(self, db_conn, table_name, where_conditions, filters, order_by, start_time, rows, statement):
+        equality, ranges = self._workload_predicates(where_conditions, filters)
+        db_conn.workload.record(table_name, equality, ranges, self._workload_order(order_by),
+                                (time.perf_counter() - start_time) * 1000, rows, statement + ([table_name],))
+    
+    def _record_write_workload(self, db_conn, table_name, where_conditions, start_time, rows):
+        """A keyed update or delete is a write, and a lookup on its key columns"""
+        db_conn.workload.record_write(table_name)
+        db_type = db_conn.db_type.lower()
+        where_clause, params = self._build_where(db_type, list(where_conditions), where_conditions, None)
+        probe = f"SELECT * FROM {self._quote_identifier(db_type, table_name)} {where_clause}"
+        db_conn.workload.record(table_name, list(where_conditions), (), (), (time.perf_counter() - start_time) * 1000,
+                                rows or 0, (probe, params, [table_name]))
+    
+    def _record_query_workload(self, db_conn, query, query_type, elapsed_ms, rows):
+        """Record the filtered and sorted columns of an ad-hoc statement, as far as its text shows them
+        
+        Only unquoted identifiers at the top level are read; predicates joined by OR are skipped.
+        """
+        skeleton = self._sql_skeleton(query)
+        upper = skeleton.upper()
+        identifier = r'[A-Za-z_][\w$]*'
+        not_aliases = {'WHERE', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'CROSS', 'OUTER', 'NATURAL', 'ON', 'USING',
+                       'GROUP', 'ORDER', 'HAVING', 'LIMIT', 'OFFSET', 'FETCH', 'SET', 'UNION', 'INTERSECT', 'EXCEPT',
+                       'WINDOW', 'FOR', 'VALUES', 'SELECT', 'RETURNING', 'WITH', 'DEFAULT'}
+        
+        aliases = {}
+        main = None
+        for match in re.finditer(rf'\b(?:FROM|JOIN|UPDATE|INTO)\s+((?:{identifier}\.)?{identifier})(?:\s+(?:AS\s+)?({identifier}))?',
+                                 skeleton, re.I):
+            table = match.group(1).split('.')[-1]
+            main = main or table
+            aliases[table.lower()] = table
+            if match.group(2) and match.group(2).upper() not in not_aliases:
+                aliases[match.group(2).lower()] = table
+        if main is None:
+            return
+        if query_type != 'select':
+            db_conn.workload.record_write(main)
+            if query_type == 'insert':
+                return
+        
+        tables = list(dict.fromkeys(aliases.values()))
+        
+        def resolve(qualifier, column):
+            if qualifier:
+                return aliases.get(qualifier.lower())
+            if len(tables) == 1:
+                return main
+            # Unqualified columns in a join belong to whichever table has them
+            for table in tables:
+                try:
+                    if column.lower() in (name.lower() for name in self._get_table_columns(db_conn, table)):
+                        return table
+                except Exception:
+                    continue
+            return None
+        
+        predicates = {table: ([], []) for table in tables}
+        where = re.search(r'\bWHERE\b', upper)
+        if where:
+            end = re.compile(r'\b(GROUP\s+BY|ORDER\s+BY|HAVING|LIMIT|OFFSET|FETCH|UNION|INTERSECT|EXCEPT|WINDOW|RETURNING|FOR)\b').search(upper, where.end())
+            clause_end = end.start() if end else len(skeleton)
+            if not re.search(r'\bOR\b', upper[where.end():clause_end]):
+                operator = (r'<=>|<>|!=|<=|>=|=|<|>|\bNOT\s+IN\b|\bIN\b|\bNOT\s+LIKE\b|\bLIKE\b|'
+                            r'\bNOT\s+BETWEEN\b|\bBETWEEN\b|\bIS\s+NOT\s+NULL\b|\bIS\s+NULL\b')
+                for match in re.compile(rf'(?:({identifier})\.)?({identifier})\s*({operator})', re.I).finditer(skeleton, where.end(), clause_end):
+                    column = match.group(2)
+                    if column.upper() in ('AND', 'NOT', 'NULL', 'ALL', 'ANY', 'SOME', 'EXISTS'):
+                        continue
+                    table = resolve(match.group(1), column)
+                    sql_op = re.sub(r'\s+', ' ', match.group(3).upper()).replace('<=>', '=')
+                    if table is None:
+                        continue
+                    if sql_op in ADVISOR_EQUALITY_OPS:
+                        predicates[table][0].append(column)
+                    elif sql_op == 'LIKE' and re.match(r"\s*'[%_]", query[match.end():]):
+                        continue
+                    elif sql_op in ADVISOR_RANGE_OPS:
+                        predicates[table][1].append(column)
+        
+        order_terms = []
+        order = re.search(r'\bORDER\s+BY\b', upper)
+        if order and query_type == 'select' and not re.search(r'\b(UNION|INTERSECT|EXCEPT)\b', upper):
+            end = re.compile(r'\b(LIMIT|OFFSET|FETCH|FOR)\b').search(upper, order.end())
+            for term in skeleton[order.end():end.start() if end else len(skeleton)].split(','):
+                match = re.fullmatch(rf'\s*(?:({identifier})\.)?({identifier})(?:\s+(ASC|DESC))?(?:\s+NULLS\s+(?:FIRST|LAST))?[\s;]*',
+                                     term, re.I)
+                # An index can only serve a sort prefix made of the main table's own columns
+                if not match or resolve(match.group(1), match.group(2)) != main:
+                    break
+                order_terms.append((match.group(2), (match.group(3) or '').upper() == 'DESC'))
+        
+        for table in tables:
+            names = [alias for alias, target in aliases.items() if target == table]
+            statement = (query, None, names) if query_type == 'select' else None
+            db_conn.workload.record(table, *predicates[table], order_terms if table == main else (),
+                                    elapsed_ms, rows or 0, statement)
+    
+    def _explain_plan(self, db_conn, sql, params, names):
+        """How the database would run a recorded statement for the table known by names
+        
+        access is the worst of full_scan, index_scan (a whole index walked in order) and index_search.
+        """
+        db_type = db_conn.db_type.lower()
+        conn = db_conn.connection_obj
+        names = {name.lower() for name in names}
+        plan = {"access": None, "sort": False, "indexes": [], "detail": []}
+        ranks = {None: 0, 'index_search': 1, 'index_scan': 2, 'full_scan': 3}
+        
+        def access(kind, index=None):
+            if ranks[kind] > ranks[plan['access']]:
+                plan['access'] = kind
+            if index and index not in plan['indexes']:
+                plan['indexes'].append(index)
+        
+        cursor = conn.cursor()
+        try:
+            args = [] if params is None else [params]
+            if db_type == 'sqlite':
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", *args)
+                for row in cursor.fetchall():
+                    detail = row[3]
+                    plan['detail'].append(detail)
+                    if 'TEMP B-TREE' in detail and 'ORDER BY' in detail:
+                        plan['sort'] = True
+                    match = re.match(r'(SCAN|SEARCH)\s+(?:TABLE\s+)?(\S+)', detail)
+                    if not match or match.group(2).lower() not in names:
+                        continue
+                    index = re.search(r'USING (?:COVERING )?INDEX (\S+)', detail)
+                    index = index.group(1) if index else ('PRIMARY KEY' if 'PRIMARY KEY' in detail else None)
+                    if match.group(1) == 'SEARCH':
+                        access('index_search', index)
+                    else:
+                        access('index_scan' if index else 'full_scan', index)
+            elif db_type == 'mysql':
+                cursor.execute(f"EXPLAIN {sql}", *args)
+                for row in cursor.fetchall():
+                    extra = row.get('Extra') or ''
+                    plan['detail'].append(f"{row.get('table')}: {row.get('type')} {row.get('key') or ''} {extra}".strip())
+                    if 'filesort' in extra:
+                        plan['sort'] = True
+                    if str(row.get('table') or '').lower() not in names:
+                        continue
+                    kind = {'ALL': 'full_scan', 'index': 'index_scan'}.get(row.get('type'), 'index_search')
+                    access(kind, row.get('key'))
+            elif db_type == 'postgresql':
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", *args)
+                document = cursor.fetchone()[0]
+                document = json.loads(document) if isinstance(document, str) else document
+                
+                def visit(node):
+                    node_type = node.get('Node Type', '')
+                    plan['detail'].append(f"{node_type} {node.get('Relation Name', '')}".strip())
+                    if node_type in ('Sort', 'Incremental Sort'):
+                        plan['sort'] = True
+                    relation = {str(node.get('Relation Name', '')).lower(), str(node.get('Alias', '')).lower()}
+                    if relation & names:
+                        if node_type == 'Seq Scan':
+                            access('full_scan')
+                        elif node_type == 'Bitmap Heap Scan':
+                            for child in node.get('Plans', []):
+                                access('index_search', child.get('Index Name'))
+                        elif 'Index' in node_type:
+                            access('index_search' if 'Index Cond' in node else 'index_scan', node.get('Index Name'))
+                    for child in node.get('Plans', []):
+                        visit(child)
+                
+                visit(document[0]['Plan'])
+            else:
+                return None
+        finally:
+            cursor.close()
+            if db_type in ('mysql', 'postgresql'):
+                conn.rollback()
+        return plan
+    
+    def _index_serves(self, index_columns, columns, equality_count):
+        """Whether an index leads with a key's equality columns, in any order, and then the rest of it in order"""
+        index_columns = [col.lower() for col in index_columns]
+        columns = [col.lower() for col in columns]
+        return (len(index_columns) >= len(columns)
+                and set(index_columns[:equality_count]) == set(columns[:equality_count])
+                and index_columns[equality_count:len(columns)] == columns[equality_count:])
+    
+    def _advisor_key(self, pattern, columns, frequency):
+        """Index columns for a pattern: equality columns, then one range column or the sort columns"""
+        equality = sorted({columns[col.lower()] for col in pattern['equality'] if col.lower() in columns},
+                          key=lambda col: (-frequency.get(col, 0), col))
+        ranges = [columns[col.lower()] for col in pattern['ranges'] if col.lower() in columns]
+        order = []
+        for term in pattern['order_by']:
+            if term['column'].lower() not in columns:
+                break
+            order.append((columns[term['column'].lower()], term['direction'] == 'desc'))
+        order = [(col, desc) for col, desc in order if col not in equality]
+        
+        key = list(equality)
+        descending = []
+        if ranges:
+            # Only one range column can follow the equality columns; a sort on it comes for free
+            key.append(order[0][0] if order and order[0][0] in ranges else ranges[0])
+        else:
+            key += [col for col, _ in order]
+            if len({desc for _, desc in order}) > 1:
+                # Mixed directions need them in the index; a uniform one is read backwards
+                descending = [col for col, desc in order if desc]
+        key = key[:ADVISOR_MAX_INDEX_COLUMNS]
+        return key, min(len(equality), len(key)), [col for col in descending if col in key]
+    
+    def _estimated_saving(self, pattern, row_estimate):
+        """Recorded time an index would save: a scan over the table becomes a B-tree descent plus the rows read"""
+        if not row_estimate:
+            return 0.0
+        rows_per_run = pattern['rows'] / pattern['count']
+        remaining = min(1.0, (math.log2(row_estimate + 1) + rows_per_run) / row_estimate)
+        return pattern['total_ms'] * (1 - remaining)
+    
+    def _advisor_index_name(self, table_name, columns):
+        name = re.sub(r'\W', '_', f"ix_{table_name}_{'_'.join(columns)}")
+        if len(name) > 60:
+            name = f"{name[:51]}_{hashlib.sha1(name.encode()).hexdigest()[:8]}"
+        return name
+    
+    def _advise_table(self, db_conn, table, patterns, explain):
+        """Recommendations and already-supported patterns for one table"""
+        db_type = db_conn.db_type.lower()
+        columns = {col['name'].lower(): col['name'] for col in table['columns']}
+        existing = [(index['name'], index['columns']) for index in table['indexes']]
+        unique = [(index['name'], index['columns']) for index in table['indexes'] if index['unique'] or index['primary']]
+        if table['primary_key'] and not any(index['primary'] for index in table['indexes']):
+            existing.append(('PRIMARY KEY', table['primary_key']))
+            unique.append(('PRIMARY KEY', table['primary_key']))
+        
+        row_estimate = table['row_estimate']
+        if row_estimate is None or row_estimate < 0:
+            cursor = db_conn.connection_obj.cursor()
+            try:
+                cursor.execute(f"SELECT COUNT(*) FROM {self._quote_identifier(db_type, table['name'])}")
+                row = cursor.fetchone()
+                row_estimate = list(row.values())[0] if isinstance(row, dict) else row[0]
+            finally:
+                cursor.close()
+        
+        # Equality columns used most often lead, so patterns on fewer of them share an index
+        frequency = {}
+        for pattern in patterns:
+            for col in pattern['equality']:
+                if col.lower() in columns:
+                    frequency[columns[col.lower()]] = frequency.get(columns[col.lower()], 0) + pattern['count']
+        
+        candidates, supported = [], []
+        for pattern in patterns:
+            key, equality_count, descending = self._advisor_key(pattern, columns, frequency)
+            if not key:
+                continue
+            plan = None
+            if explain and pattern['statement']:
+                try:
+                    plan = self._explain_plan(db_conn, *pattern['statement'])
+                except Exception as e:
+                    logger.warning(f"Index advisor EXPLAIN error: {str(e)}")
+            summary = {
+                "equality": pattern['equality'], "ranges": pattern['ranges'], "order_by": pattern['order_by'],
+                "count": pattern['count'], "avg_ms": pattern['total_ms'] / pattern['count'], "plan": plan
+            }
+            
+            served_by = next((name for name, index_columns in existing
+                              if self._index_serves(index_columns, key, equality_count)), None)
+            if served_by is None:
+                # Equality on a whole unique key finds at most one row, whatever else the pattern asks for
+                equality = {col.lower() for col in key[:equality_count]}
+                served_by = next((name for name, index_columns in unique
+                                  if {col.lower() for col in index_columns} <= equality), None)
+            if served_by is None and plan is not None and not (pattern['order_by'] and plan['sort']):
+                # The plan may use an index the key doesn't line up with, such as a more selective single column
+                if plan['access'] == 'index_search' or (plan['access'] == 'index_scan' and not (pattern['equality'] or pattern['ranges'])):
+                    served_by = ', '.join(plan['indexes']) or plan['access']
+            if served_by is not None:
+                supported.append(dict(summary, table=table['name'], index=served_by))
+                continue
+            candidates.append((key, equality_count, descending, pattern, summary))
+        
+        # Wider keys first, so narrower ones they also serve fold into them
+        recommendations = []
+        for key, equality_count, descending, pattern, summary in sorted(candidates, key=lambda c: -len(c[0])):
+            target = next((rec for rec in recommendations
+                           if self._index_serves(rec['columns'], key, equality_count)
+                           and not set(descending) - set(rec['descending'])), None)
+            if target is None:
+                name = self._advisor_index_name(table['name'], key)
+                q = lambda ident: self._quote_identifier(db_type, ident)
+                key_sql = ', '.join(q(col) + (' DESC' if col in descending else '') for col in key)
+                target = {
+                    "table": table['name'], "columns": key, "descending": descending, "index_name": name,
+                    "ddl": f"CREATE INDEX {q(name)} ON {q(table['name'])} ({key_sql})",
+                    "estimated_saved_ms": 0.0, "executions": 0, "recorded_ms": 0.0, "row_estimate": row_estimate,
+                    "writes_seen": db_conn.workload.write_count(table['name']), "patterns": []
+                }
+                recommendations.append(target)
+            target['estimated_saved_ms'] += self._estimated_saving(pattern, row_estimate)
+            target['executions'] += pattern['count']
+            target['recorded_ms'] += pattern['total_ms']
+            target['patterns'].append(summary)
+        return recommendations, supported
+    
+    def advise_indexes(self, connection_id, table_name=None, min_executions=ADVISOR_MIN_EXECUTIONS,
+                       limit=ADVISOR_MAX_RECOMMENDATIONS, explain=True, create=False, dry_run=True):
+        """Recommend composite indexes for the recorded workload, ranked by estimated time saved
+        
+        With create the recommendations are built as well, unless dry_run (the default) only returns their DDL.
+        """
+        try:
+            error = self._worker_local_error("The index advisor")
+            if error:
+                return error
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            db_type = db_conn.db_type.lower()
+            if db_type not in ('sqlite', 'mysql', 'postgresql', 'mssql'):
+                return {"success": False, "error": f"Unsupported database type: {db_type}"}
+            
+            start_time = time.perf_counter()
+            catalog = self.get_catalog(connection_id)
+            if not catalog['success']:
+                return catalog
+            tables = {table['name'].lower(): table for table in catalog['tables']}
+            
+            by_table = {}
+            patterns = db_conn.workload.entries(table_name)
+            for pattern in patterns:
+                table = tables.get(pattern['table'].lower())
+                if table is not None and pattern['count'] >= min_executions:
+                    by_table.setdefault(table['name'], []).append(pattern)
+            
+            recommendations, supported = [], []
+            for name, table_patterns in by_table.items():
+                table_recommendations, table_supported = self._advise_table(db_conn, tables[name.lower()], table_patterns, explain)
+                recommendations += table_recommendations
+                supported += table_supported
+            recommendations.sort(key=lambda rec: rec['estimated_saved_ms'], reverse=True)
+            recommendations = recommendations[:int(limit)]
+            
+            if create:
+                conn = db_conn.connection_obj
+                for rec in recommendations:
+                    rec['created'] = False
+                    if dry_run:
+                        continue
+                    cursor = conn.cursor()
+                    try:
+                        cursor.execute(rec['ddl'])
+                        conn.commit()
+                        rec['created'] = True
+                        metrics.add('index_advisor', created=1)
+                    except Exception as e:
+                        conn.rollback()
+                        rec['error'] = str(e)
+                        logger.error(f"Index advisor create error: {str(e)}")
+                    finally:
+                        cursor.close()
+                    self._invalidate_table_caches(db_conn, rec['table'], schema_changed=True)
+            
+            return {
+                "success": True,
+                "recommendations": recommendations,
+                "supported": supported,
+                "patterns_recorded": len(patterns),
+                "dry_run": bool(create and dry_run),
+                "execution_time": (time.perf_counter() - start_time) * 1000
+            }
+            
+        except Exception as e:
+            logger.error(f"Index advisor error: {str(e)}")
+            return {"success": False, "error": str(e)}
+    
+    def get_workload(self, connection_id, table_name=None):
+        """The recorded predicate and sort patterns, without the statements kept for EXPLAIN"""
+        error = self._worker_local_error("The index advisor")
+        if error:
+            return error
+        db_conn = self._get_connection(connection_id)
+        if db_conn is None:
+            return {"success": False, "error": "Connection not found"}
+        patterns = db_conn.workload.entries(table_name)
+        for pattern in patterns:
+            pattern.pop('statement', None)
+        patterns.sort(key=lambda pattern: pattern['total_ms'], reverse=True)
+        return {"success": True, "patterns": patterns, "writes": dict(db_conn.workload.writes)}
+    
+    def reset_workload(self, connection_id, table_name=None):
+        db_conn = self._get_connection(connection_id)
+        if db_conn is None:
+            return {"success": False, "error": "Connection not found"}
+        db_conn.workload.clear(table_name)
+        return {"success": True}
+    
+    def _sql_string(self, value):
+        return "'" + str(value).replace("'", "''") + "'"
+    
+    # CRUD Operations
+    def insert_record(self, connection_id, table_name, values):
+        """Insert a new record into a table"""
+        try:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
+                return {"success": False, "error": "Connection not found"}
+            
+            conn = db_conn.connection_obj
+            db_type = db_conn.db_type
+            
+            if db_type == 'sqlite':
+                result = self._insert_sqlite_record(conn, table_name, values)
+            elif db_type == 'mysql':
+                result = self._insert_mysql_record(conn, table_name, values)
+            elif db_type == 'postgresql':
+                result = self._insert_postgresql_record(conn, table_name, values)
+            elif db_type == 'mssql':
+                result = self._insert_mssql_record(conn, table_name, values)
             else:
                 return {"success": False, "error": f"Unsupported database type: {db_type}"}
+            
+            if result['success']:
+                self._invalidate_table_caches(db_conn, table_name)
+                db_conn.workload.record_write(table_name)
+            return result
                 
         except Exception as e:
             logger.error(f"Insert record error: {str(e)}")
@@ -745,23 +5932,29 @@ class DatabaseManager:
     def update_record(self, connection_id, table_name, values, where_conditions):
         """Update records in a table"""
         try:
-            if connection_id not in self.connections:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
                 return {"success": False, "error": "Connection not found"}
             
-            db_conn = self.connections[connection_id]
             conn = db_conn.connection_obj
             db_type = db_conn.db_type
             
+            start_time = time.perf_counter()
             if db_type == 'sqlite':
-                return self._update_sqlite_record(conn, table_name, values, where_conditions)
+                result = self._update_sqlite_record(conn, table_name, values, where_conditions)
             elif db_type == 'mysql':
-                return self._update_mysql_record(conn, table_name, values, where_conditions)
+                result = self._update_mysql_record(conn, table_name, values, where_conditions)
             elif db_type == 'postgresql':
-                return self._update_postgresql_record(conn, table_name, values, where_conditions)
+                result = self._update_postgresql_record(conn, table_name, values, where_conditions)
             elif db_type == 'mssql':
-                return self._update_mssql_record(conn, table_name, values, where_conditions)
+                result = self._update_mssql_record(conn, table_name, values, where_conditions)
             else:
                 return {"success": False, "error": f"Unsupported database type: {db_type}"}
+            
+            if result['success']:
+                self._invalidate_table_caches(db_conn, table_name)
+                self._record_write_workload(db_conn, table_name, where_conditions, start_time, result.get('affected_rows'))
+            return result
                 
         except Exception as e:
             logger.error(f"Update record error: {str(e)}")
@@ -770,134 +5963,572 @@ class DatabaseManager:
     def delete_record(self, connection_id, table_name, where_conditions):
         """Delete records from a table"""
         try:
-            if connection_id not in self.connections:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
                 return {"success": False, "error": "Connection not found"}
             
-            db_conn = self.connections[connection_id]
             conn = db_conn.connection_obj
             db_type = db_conn.db_type
             
+            start_time = time.perf_counter()
             if db_type == 'sqlite':
-                return self._delete_sqlite_record(conn, table_name, where_conditions)
+                result = self._delete_sqlite_record(conn, table_name, where_conditions)
             elif db_type == 'mysql':
-                return self._delete_mysql_record(conn, table_name, where_conditions)
+                result = self._delete_mysql_record(conn, table_name, where_conditions)
             elif db_type == 'postgresql':
-                return self._delete_postgresql_record(conn, table_name, where_conditions)
+                result = self._delete_postgresql_record(conn, table_name, where_conditions)
             elif db_type == 'mssql':
-                return self._delete_mssql_record(conn, table_name, where_conditions)
+                result = self._delete_mssql_record(conn, table_name, where_conditions)
             else:
                 return {"success": False, "error": f"Unsupported database type: {db_type}"}
+            
+            if result['success']:
+                self._invalidate_table_caches(db_conn, table_name)
+                self._record_write_workload(db_conn, table_name, where_conditions, start_time, result.get('affected_rows'))
+            return result
                 
         except Exception as e:
             logger.error(f"Delete record error: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def select_records(self, connection_id, table_name, columns, where_conditions, limit, offset):
+    def select_records(self, connection_id, table_name, columns, where_conditions, limit, offset, max_cell_size=MAX_CELL_SIZE,
+                       filters=None, order_by=None, use_snapshot=True):
         """Select records from a table"""
         try:
-            if connection_id not in self.connections:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
                 return {"success": False, "error": "Connection not found"}
             
-            db_conn = self.connections[connection_id]
-            conn = db_conn.connection_obj
             db_type = db_conn.db_type
             
-            if db_type == 'sqlite':
-                return self._select_sqlite_records(conn, table_name, columns, where_conditions, limit, offset)
-            elif db_type == 'mysql':
-                return self._select_mysql_records(conn, table_name, columns, where_conditions, limit, offset)
-            elif db_type == 'postgresql':
-                return self._select_postgresql_records(conn, table_name, columns, where_conditions, limit, offset)
-            elif db_type == 'mssql':
-                return self._select_mssql_records(conn, table_name, columns, where_conditions, limit, offset)
-            else:
+            if db_type.lower() == 'mongodb':
+                result = self._get_mongodb_page(db_conn, table_name, limit, offset, filters, order_by,
+                                                columns, where_conditions, count=False)
+                return self._cap_result_cells(result, max_cell_size)
+            if db_type.lower() not in ('sqlite', 'mysql', 'postgresql', 'mssql'):
                 return {"success": False, "error": f"Unsupported database type: {db_type}"}
+            
+            snapshot = self._find_snapshot(db_conn, table_name) if use_snapshot else None
+            if snapshot is not None and not snapshot.dirty:
+                with snapshot.lock:
+                    result = self._select_table_records(snapshot.db_conn, table_name, columns, where_conditions, limit,
+                                                        offset, filters, order_by)
+                result['snapshot'] = snapshot.status()
+                return self._cap_result_cells(result, max_cell_size)
+            
+            result = self._select_table_records(db_conn, table_name, columns, where_conditions, limit, offset, filters, order_by)
+            if snapshot is not None:
+                # Writes made through the app aren't in the copy, so the source is read until the next refresh
+                result['snapshot'] = dict(snapshot.status(), bypassed=True)
+            return self._cap_result_cells(result, max_cell_size)
                 
+        except MemoryBudgetError:
+            raise
         except Exception as e:
             logger.error(f"Select records error: {str(e)}")
             return {"success": False, "error": str(e)}
     
-    def get_table_data(self, connection_id, table_name, limit, offset):
-        """Get table data with pagination"""
+    def get_table_data(self, connection_id, table_name, limit, offset, max_cell_size=MAX_CELL_SIZE,
+                       filters=None, order_by=None, since_version=None, change_column=None, use_snapshot=True):
+        """Get table data with pagination; with since_version, only what changed since that version"""
         try:
-            if connection_id not in self.connections:
+            db_conn = self._get_connection(connection_id)
+            if db_conn is None:
                 return {"success": False, "error": "Connection not found"}
             
-            db_conn = self.connections[connection_id]
-            conn = db_conn.connection_obj
             db_type = db_conn.db_type
             
-            if db_type == 'sqlite':
-                return self._get_sqlite_table_data(conn, table_name, limit, offset)
-            elif db_type == 'mysql':
-                return self._get_mysql_table_data(conn, table_name, limit, offset)
-            elif db_type == 'postgresql':
-                return self._get_postgresql_table_data(conn, table_name, limit, offset)
-            elif db_type == 'mssql':
-                return self._get_mssql_table_data(conn, table_name, limit, offset)
-            else:
+            if db_type.lower() == 'mongodb':
+                result = self._get_mongodb_page(db_conn, table_name, limit, offset, filters, order_by)
+                return self._cap_result_cells(result, max_cell_size)
+            if db_type.lower() not in ('sqlite', 'mysql', 'postgresql', 'mssql'):
                 return {"success": False, "error": f"Unsupported database type: {db_type}"}
+            
+            snapshot = self._find_snapshot(db_conn, table_name) if use_snapshot else None
+            if snapshot is not None and not snapshot.dirty:
+                return self._get_snapshot_page(snapshot, limit, offset, max_cell_size, filters, order_by, since_version)
+            
+            # Read the version first so a write racing the page read shows up on the next refresh
+            version = self._table_version(db_conn, table_name, change_column)
+            if since_version is not None:
+                if since_version == version:
+                    return {"success": True, "unchanged": True, "version": version, "limit": limit, "offset": offset}
+                delta = self._get_table_delta(db_conn, table_name, since_version, version, limit, offset, filters,
+                                              order_by, change_column)
+                if delta is not None:
+                    delta.update(version=version, limit=limit, offset=offset)
+                    return self._cap_result_cells(delta, max_cell_size)
+            
+            result = self._get_table_page(db_conn, table_name, limit, offset, filters, order_by)
+            result['version'] = version
+            if snapshot is not None:
+                # Writes made through the app aren't in the copy, so the source is read until the next refresh
+                result['snapshot'] = dict(snapshot.status(), bypassed=True)
+            return self._cap_result_cells(result, max_cell_size)
                 
+        except MemoryBudgetError:
+            raise
         except Exception as e:
             logger.error(f"Get table data error: {str(e)}")
             return {"success": False, "error": str(e)}
 
 # Global database manager instance
 db_manager = DatabaseManager()
+metrics = MetricsRegistry()
+drivers = DriverRegistry(OPTIONAL_MODULES)
+tracer = Tracer(ChromeTraceExporter(TRACE_FILE) if TRACE_FILE else None)
+memory_budget = MemoryBudget()
+if MEMORY_TRACKING:
+    tracemalloc.start()
+
+class TracedJSONProvider(DefaultJSONProvider):
+    """jsonify() with a serialization span, adding the phase breakdown when the request asked for it"""
+    def response(self, *args, **kwargs):
+        trace = tracer.current
+        if trace is None:
+            return super().response(*args, **kwargs)
+        if trace.breakdown and len(args) == 1 and isinstance(args[0], dict) and not kwargs:
+            args = ({**args[0], "trace": {"trace_id": trace.trace_id, "phases_ms": trace.phases()}},)
+        with tracer.span('serialize', format='json'):
+            response = super().response(*args, **kwargs)
+        memory_budget.charge(response.content_length or 0, enforce=False)
+        return response
+
+app.json = TracedJSONProvider(app)
+app.wsgi_app = TracingMiddleware(app.wsgi_app, tracer)
+
+@app.before_request
+def start_request_trace():
+    trace = tracer.current
+    if trace is not None and request.path.startswith('/api/'):
+        body = request.get_json(silent=True) if request.is_json else None
+        flag = request.args.get('trace') or (body.get('trace') if isinstance(body, dict) else None)
+        trace.breakdown = flag in (True, 1, '1', 'true')
+
+@app.before_request
+def start_memory_lease():
+    if request.path.startswith('/api/'):
+        memory_budget.begin()
+
+@app.teardown_request
+def end_memory_lease(exc):
+    lease = memory_budget.end()
+    if lease is not None:
+        retained = lease.retained()
+        metrics.add('memory', requests=1, charged_bytes=lease.charged, wait_ms=lease.wait_ms,
+                    **({'retained_bytes': retained} if retained is not None else {}))
+
+@app.errorhandler(MemoryBudgetError)
+def memory_budget_exceeded(e):
+    # What the request had charged is gone with the exception; the error body must not wait
+    memory_budget.end()
+    metrics.add('memory', rejected=1)
+    response = jsonify({"success": False, "error": str(e), "retry_after": e.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+def _choose_encoding(accept_encoding):
+    """Pick zstd or gzip from an Accept-Encoding header, honouring q-values"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    
+    # zstandard is only imported once a client has asked for zstd
+    candidates = ['gzip']
+    if ('zstd' in accepted or '*' in accepted) and drivers.available('zstandard'):
+        candidates.insert(0, 'zstd')
+    candidates = [name for name in candidates if accepted.get(name, accepted.get('*', 0)) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda name: accepted.get(name, accepted.get('*', 0)))
+
+def _compressor(encoding):
+    """Incremental compressor with compress() and flush() for the chosen encoding"""
+    if encoding == 'zstd':
+        return drivers.get('zstandard').ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+    # wbits=31 writes a gzip header and trailer
+    return zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+def _compress_stream(chunks, encoding):
+    """Compress a streamed body chunk by chunk, flushing so clients see data progressively"""
+    compressor = _compressor(encoding)
+    sync_flush = drivers.get('zstandard').COMPRESSOBJ_FLUSH_BLOCK if encoding == 'zstd' else zlib.Z_SYNC_FLUSH
+    bytes_in = bytes_out = 0
+    start_time = time.perf_counter()
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            bytes_in += len(chunk)
+            data = compressor.compress(chunk) + compressor.flush(sync_flush)
+            bytes_out += len(data)
+            if data:
+                yield data
+        data = compressor.flush()
+        bytes_out += len(data)
+        yield data
+    finally:
+        metrics.add(f"compression_{encoding}", responses=1, bytes_in=bytes_in, bytes_out=bytes_out,
+                    time_ms=(time.perf_counter() - start_time) * 1000)
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+# Registered before compress_response so it runs after it and sees the compression span
+@app.after_request
+def trace_response(response):
+    trace = tracer.current
+    if trace is not None and request.path.startswith('/api/'):
+        response.headers[TRACE_HEADER] = trace.trace_id
+        response.headers['Server-Timing'] = ', '.join(
+            f"{name};dur={ms}" for name, ms in trace.phases().items() if name != 'flask.dispatch')
+    lease = memory_budget.current
+    if lease is not None and lease.charged:
+        response.headers['X-Memory-Bytes'] = str(lease.charged)
+        retained = lease.retained()
+        if retained is not None:
+            response.headers['X-Memory-Retained'] = str(retained)
+    return response
+
+@app.after_request
+def compress_response(response):
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    if 'Content-Encoding' in response.headers or request.method == 'HEAD':
+        return response
+    if not (response.mimetype or '').startswith(COMPRESSIBLE_MIMETYPES):
+        return response
+    
+    encoding = _choose_encoding(request.headers.get('Accept-Encoding', ''))
+    response.vary.add('Accept-Encoding')
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = encoding
+        return response
+    
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_SIZE:
+        metrics.add("compression_skipped", responses=1, bytes=len(body))
+        return response
+    
+    start_time = time.perf_counter()
+    with tracer.span('compress', encoding=encoding, bytes_in=len(body)):
+        compressor = _compressor(encoding)
+        compressed = compressor.compress(body) + compressor.flush()
+    elapsed = (time.perf_counter() - start_time) * 1000
+    metrics.add(f"compression_{encoding}", responses=1, bytes_in=len(body), bytes_out=len(compressed), time_ms=elapsed)
+    
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def _msgpack_default(value):
+    """Encode driver types msgpack has no native form for"""
+    if isinstance(value, datetime):
+        # Naive timestamps are sent as UTC so they keep their wall-clock value
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return drivers.get('msgpack').Timestamp.from_datetime(value)
+    if isinstance(value, (date, Decimal, uuid.UUID, timedelta)) or hasattr(value, 'isoformat'):
+        return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+    if isinstance(value, (bytearray, memoryview)):
+        return bytes(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _encode_msgpack(result):
+    """Row data as positional arrays so column names are not repeated per row"""
+    msgpack = drivers.get('msgpack')
+    payload = {key: value for key, value in result.items() if key != 'data'}
+    columns = result.get('columns') or []
+    payload['rows'] = [[row.get(col) for col in columns] for row in result.get('data', [])]
+    return msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+
+def _encode_arrow(result):
+    """Columnar record batch with the non-row fields carried in schema metadata"""
+    pyarrow = drivers.get('pyarrow')
+    columns = result.get('columns') or []
+    arrays = {}
+    for col in columns:
+        values = [row.get(col) for row in result.get('data', [])]
+        # Truncation markers become their JSON text so the column keeps one type
+        values = [json.dumps(value) if isinstance(value, dict) else value for value in values]
+        try:
+            arrays[col] = pyarrow.array(values)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+            # Mixed-type columns (SQLite allows them) fall back to text
+            arrays[col] = pyarrow.array([value if value is None else str(value) for value in values], pyarrow.string())
+    table = pyarrow.table(arrays)
+    
+    metadata = {key: value for key, value in result.items() if key != 'data'}
+    table = table.replace_schema_metadata({'dbonly': json.dumps(metadata, default=str)})
+    
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def data_response(result):
+    """Serialize a result set as JSON, MessagePack or Arrow IPC according to Accept"""
+    # Encoders are only imported for clients that name their format, not for */*
+    requested = {value for value, quality in request.accept_mimetypes if quality > 0}
+    formats = ['application/json']
+    if MSGPACK_MIMETYPE in requested and drivers.available('msgpack'):
+        formats.append(MSGPACK_MIMETYPE)
+    if ARROW_MIMETYPE in requested and drivers.available('pyarrow'):
+        formats.append(ARROW_MIMETYPE)
+    
+    mimetype = request.accept_mimetypes.best_match(formats, default='application/json')
+    if not result.get('success') or mimetype == 'application/json':
+        return jsonify(result)
+    with tracer.span('serialize', format=mimetype):
+        if mimetype == MSGPACK_MIMETYPE:
+            body = _encode_msgpack(result)
+        else:
+            body = _encode_arrow(result)
+    memory_budget.charge(len(body), enforce=False)
+    return Response(body, mimetype=mimetype)
+
+def scheduled(priority, side_handle=False):
+    """Run a route through the schedulers of the connections it names
+    
+    The class can be lowered per request with a "priority" argument; a full queue
+    answers 429 with a Retry-After hint instead of waiting. Streamed bodies keep
+    the slot until the response is closed, since they still use the driver handle.
+    With side_handle (sidebar metadata), a request that finds the connection busy
+    runs on a second handle instead of queueing behind the running query.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            body = request.get_json(silent=True) if request.is_json else None
+            body = body if isinstance(body, dict) else {}
+            rank = SCHEDULER_PRIORITIES[priority]
+            requested = request.args.get('priority') or body.get('priority')
+            if requested in SCHEDULER_PRIORITIES:
+                rank = max(rank, SCHEDULER_PRIORITIES[requested])
+            
+            # Acquired in id order so two multi-connection requests cannot deadlock
+            connection_ids = set()
+            for key in ('connection_id', 'source_connection_id', 'target_connection_id'):
+                connection_id = request.args.get(key) or body.get(key)
+                if isinstance(connection_id, str):
+                    connection_ids.add(connection_id)
+            if isinstance(body.get('connection_ids'), list):
+                connection_ids.update(cid for cid in body['connection_ids'] if isinstance(cid, str))
+            db_conns = []
+            for connection_id in sorted(connection_ids):
+                db_conn = db_manager._get_connection(connection_id)
+                if db_conn is not None:
+                    db_conns.append(db_conn)
+            
+            side = db_manager._claim_side_handle(db_conns[0]) if side_handle and len(db_conns) == 1 else None
+            if side is not None:
+                try:
+                    with db_conns[0].using_handle(side):
+                        response = app.make_response(view(*args, **kwargs))
+                finally:
+                    if db_conns[0].db_type.lower() in ('mysql', 'postgresql'):
+                        # The handle is ours alone, so ending its read transaction discards nothing
+                        side.rollback()
+                    db_conns[0].scheduler.release_side_lane()
+                metrics.add('scheduler', requests=1, side_handle=1)
+                response.headers['X-Queue-Wait-Ms'] = "0.0"
+                return response
+            
+            acquired = []
+            queue_wait_ms = 0.0
+            try:
+                with tracer.span('scheduler.wait', priority=rank):
+                    for db_conn in db_conns:
+                        queue_wait_ms += db_conn.scheduler.acquire(rank)
+                        acquired.append(db_conn.scheduler)
+            except QueueFullError as e:
+                for scheduler in acquired:
+                    scheduler.release(0)
+                metrics.add('scheduler', rejected=1)
+                response = jsonify({"success": False, "error": str(e), "retry_after": e.retry_after,
+                                    "queue_depth": e.queue_depth})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+            
+            start_time = time.perf_counter()
+            
+            def release():
+                service_ms = (time.perf_counter() - start_time) * 1000
+                for scheduler in acquired:
+                    scheduler.release(service_ms)
+            
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except BaseException:
+                release()
+                raise
+            if response.is_streamed:
+                response.call_on_close(release)
+            else:
+                release()
+            
+            metrics.add('scheduler', requests=1, queue_wait_ms=queue_wait_ms)
+            response.headers['X-Queue-Wait-Ms'] = f"{queue_wait_ms:.1f}"
+            return response
+        return wrapper
+    return decorator
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
+    if startup_report['first_health_ms'] is None:
+        startup_report['first_health_ms'] = (time.perf_counter() - STARTUP_STARTED) * 1000
+        logger.info(f"Startup: imports {startup_report['imports_ms']:.0f} ms, module load "
+                    f"{startup_report['module_load_ms']:.0f} ms, first health check {startup_report['first_health_ms']:.0f} ms")
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "active_connections": len(db_manager.connections),
+        "active_connections": db_manager.connection_count(),
+        "workers": BACKEND_WORKERS,
+        "worker_pid": os.getpid(),
         "version": "1.0.0"
     })
 
+@app.route('/api/startup', methods=['GET'])
+def get_startup_report():
+    try:
+        return jsonify({
+            "success": True,
+            **startup_report,
+            "debug": BACKEND_DEBUG,
+            "drivers": drivers.status()
+        })
+    
+    except Exception as e:
+        logger.error(f"Startup report error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    try:
+        snapshot = metrics.snapshot()
+        for section, counters in snapshot.items():
+            if section.startswith('compression_') and counters.get('bytes_in'):
+                counters['ratio'] = round(counters['bytes_out'] / counters['bytes_in'], 4)
+        return jsonify({"success": True, "metrics": snapshot, "memory": memory_budget.status()})
+    
+    except Exception as e:
+        logger.error(f"Metrics error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
 @app.route('/api/test-connection', methods=['POST'])
 def test_connection():
     try:
-        profile = request.json
-        logger.info(f"Testing connection for profile: {profile.get('name', 'Unknown')}")
+        profile = request.json
+        logger.info(f"Testing connection for profile: {profile.get('name', 'Unknown')}")
+        
+        result = db_manager.test_connection(profile)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Test connection error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/create-connection', methods=['POST'])
+def create_connection():
+    try:
+        profile = request.json
+        logger.info(f"Creating connection for profile: {profile.get('name', 'Unknown')}")
+        
+        result = db_manager.create_connection(profile)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Create connection error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/execute-query', methods=['POST'])
+@scheduled('normal')
+def execute_query():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        query = data['query']
+        query_type = data.get('query_type', 'auto')
+        use_primary = data.get('use_primary', False)
+        max_cell_size = data.get('max_cell_size', MAX_CELL_SIZE)
+        max_rows = data.get('max_rows', QUERY_MAX_ROWS)
+        max_bytes = data.get('max_bytes', QUERY_MAX_BYTES)
+        auto_limit = data.get('auto_limit', True)
+        cache_result = data.get('cache_result', False)
+        
+        logger.info(f"Executing query: {query[:100]}...")
+        
+        result = db_manager.execute_query(connection_id, query, query_type, use_primary, max_cell_size,
+                                          max_rows, max_bytes, auto_limit, cache_result)
+        return data_response(result)
+    
+    except MemoryBudgetError:
+        raise
+    except Exception as e:
+        logger.error(f"Execute query error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/query-count', methods=['POST'])
+@scheduled('normal')
+def query_count():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        query = data['query']
         
-        result = db_manager.test_connection(profile)
+        result = db_manager.count_query_rows(connection_id, query)
         return jsonify(result)
     
     except Exception as e:
-        logger.error(f"Test connection error: {str(e)}")
+        logger.error(f"Query count error: {str(e)}")
         return jsonify({"success": False, "error": str(e)})
 
-@app.route('/api/create-connection', methods=['POST'])
-def create_connection():
+@app.route('/api/result/analyze', methods=['POST'])
+def analyze_result():
     try:
-        profile = request.json
-        logger.info(f"Creating connection for profile: {profile.get('name', 'Unknown')}")
+        data = request.json
+        result_id = data['result_id']
+        group_by = data.get('group_by')
+        aggregates = data.get('aggregates')
+        pivot = data.get('pivot')
+        order_by = data.get('order_by')
+        top = data.get('top')
         
-        result = db_manager.create_connection(profile)
-        return jsonify(result)
+        result = db_manager.analyze_result(result_id, group_by, aggregates, pivot, order_by, top)
+        return data_response(result)
     
     except Exception as e:
-        logger.error(f"Create connection error: {str(e)}")
+        logger.error(f"Result analysis error: {str(e)}")
         return jsonify({"success": False, "error": str(e)})
 
-@app.route('/api/execute-query', methods=['POST'])
-def execute_query():
+@app.route('/api/result/drop', methods=['POST'])
+def drop_result():
     try:
         data = request.json
-        connection_id = data['connection_id']
-        query = data['query']
-        query_type = data.get('query_type', 'auto')
+        result_id = data['result_id']
         
-        logger.info(f"Executing query: {query[:100]}...")
-        
-        result = db_manager.execute_query(connection_id, query, query_type)
-        return jsonify(result)
+        dropped = db_manager.result_cache.drop(result_id=result_id)
+        return jsonify({"success": True, "dropped": dropped})
     
     except Exception as e:
-        logger.error(f"Execute query error: {str(e)}")
+        logger.error(f"Drop result error: {str(e)}")
         return jsonify({"success": False, "error": str(e)})
 
 @app.route('/api/database-info', methods=['GET'])
+@scheduled('interactive', side_handle=True)
 def get_database_info():
     try:
         connection_id = request.args.get('connection_id')
@@ -912,23 +6543,98 @@ def get_database_info():
         return jsonify({"success": False, "error": str(e)})
 
 @app.route('/api/table-schema', methods=['GET'])
+@scheduled('interactive', side_handle=True)
 def get_table_schema():
     try:
         connection_id = request.args.get('connection_id')
         table_name = request.args.get('table_name')
+        include_sample = request.args.get('include_sample', 'false').lower() in ('1', 'true', 'yes')
+        sample_columns = request.args.get('sample_columns')
+        sample_limit = int(request.args.get('sample_limit', SAMPLE_DEFAULT_ROWS))
+        max_cell_size = int(request.args.get('max_cell_size', SAMPLE_MAX_CELL_SIZE))
         
         if not connection_id:
             return jsonify({"success": False, "error": "Connection ID required"})
         if not table_name:
             return jsonify({"success": False, "error": "Table name required"})
         
-        result = db_manager.get_table_schema(connection_id, table_name)
+        sample_columns = sample_columns.split(',') if sample_columns else None
+        result = db_manager.get_table_schema(connection_id, table_name, include_sample, sample_columns,
+                                             sample_limit, max_cell_size)
         return jsonify(result)
     
     except Exception as e:
         logger.error(f"Table schema error: {str(e)}")
         return jsonify({"success": False, "error": str(e)})
 
+@app.route('/api/table-sample', methods=['GET'])
+@scheduled('interactive', side_handle=True)
+def get_table_sample():
+    try:
+        connection_id = request.args.get('connection_id')
+        table_name = request.args.get('table_name')
+        columns = request.args.get('columns')
+        limit = int(request.args.get('limit', SAMPLE_DEFAULT_ROWS))
+        max_cell_size = int(request.args.get('max_cell_size', SAMPLE_MAX_CELL_SIZE))
+        
+        if not connection_id:
+            return jsonify({"success": False, "error": "Connection ID required"})
+        if not table_name:
+            return jsonify({"success": False, "error": "Table name required"})
+        
+        columns = columns.split(',') if columns else None
+        result = db_manager.get_table_sample(connection_id, table_name, columns, limit, max_cell_size)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Table sample error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/table-profile', methods=['GET'])
+@scheduled('normal')
+def get_table_profile():
+    try:
+        connection_id = request.args.get('connection_id')
+        table_name = request.args.get('table_name')
+        columns = request.args.get('columns')
+        sample_size = int(request.args.get('sample_size', PROFILE_DEFAULT_SAMPLE))
+        bins = int(request.args.get('bins', PROFILE_HISTOGRAM_BINS))
+        top_n = int(request.args.get('top_n', PROFILE_TOP_VALUES))
+        exact = request.args.get('exact', 'false').lower() in ('1', 'true', 'yes')
+        workers = int(request.args.get('workers', 4))
+        refresh = request.args.get('refresh', 'false').lower() in ('1', 'true', 'yes')
+        
+        if not connection_id:
+            return jsonify({"success": False, "error": "Connection ID required"})
+        if not table_name:
+            return jsonify({"success": False, "error": "Table name required"})
+        
+        columns = columns.split(',') if columns else None
+        result = db_manager.get_table_profile(connection_id, table_name, columns, sample_size,
+                                              bins, top_n, exact, workers, refresh)
+        return jsonify(result)
+    
+    except MemoryBudgetError:
+        raise
+    except Exception as e:
+        logger.error(f"Table profile error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/catalog', methods=['GET'])
+@scheduled('interactive', side_handle=True)
+def get_catalog():
+    try:
+        connection_id = request.args.get('connection_id')
+        if not connection_id:
+            return jsonify({"success": False, "error": "Connection ID required"})
+        
+        result = db_manager.get_catalog(connection_id)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Catalog error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
 @app.route('/api/close-connection', methods=['POST'])
 def close_connection():
     try:
@@ -942,8 +6648,69 @@ def close_connection():
         logger.error(f"Close connection error: {str(e)}")
         return jsonify({"success": False, "error": str(e)})
 
+@app.route('/api/replica-status', methods=['GET'])
+def get_replica_status():
+    try:
+        connection_id = request.args.get('connection_id')
+        if not connection_id:
+            return jsonify({"success": False, "error": "Connection ID required"})
+        
+        result = db_manager.get_replica_status(connection_id)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Replica status error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/copy-table', methods=['POST'])
+@scheduled('bulk')
+def copy_table():
+    try:
+        data = request.json
+        source_connection_id = data['source_connection_id']
+        source_table = data['source_table']
+        target_connection_id = data['target_connection_id']
+        target_table = data.get('target_table')
+        batch_size = data.get('batch_size', COPY_BATCH_SIZE)
+        workers = data.get('workers', 1)
+        if_exists = data.get('if_exists', 'fail')
+        
+        logger.info(f"Copying table {source_table} to {target_table or source_table}")
+        
+        result = db_manager.copy_table(source_connection_id, source_table, target_connection_id,
+                                       target_table, batch_size, workers, if_exists)
+        return jsonify(result)
+    
+    except MemoryBudgetError:
+        raise
+    except Exception as e:
+        logger.error(f"Copy table error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/fan-out-query', methods=['POST'])
+@scheduled('normal')
+def fan_out_query():
+    try:
+        data = request.json
+        connection_ids = data['connection_ids']
+        query = data['query']
+        timeout = data.get('timeout', FAN_OUT_DEFAULT_TIMEOUT)
+        merge = data.get('merge', False)
+        source_column = data.get('source_column', '_source')
+        allow_writes = data.get('allow_writes', False)
+        
+        logger.info(f"Fan-out query to {len(connection_ids)} connections: {query[:100]}...")
+        
+        result = db_manager.fan_out_query(connection_ids, query, timeout, merge, source_column, allow_writes)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Fan-out query error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
 # CRUD Operations
 @app.route('/api/crud/insert', methods=['POST'])
+@scheduled('interactive')
 def insert_record():
     try:
         data = request.json
@@ -959,6 +6726,7 @@ def insert_record():
         return jsonify({"success": False, "error": str(e)})
 
 @app.route('/api/crud/update', methods=['POST'])
+@scheduled('interactive')
 def update_record():
     try:
         data = request.json
@@ -975,6 +6743,7 @@ def update_record():
         return jsonify({"success": False, "error": str(e)})
 
 @app.route('/api/crud/delete', methods=['POST'])
+@scheduled('interactive')
 def delete_record():
     try:
         data = request.json
@@ -990,6 +6759,7 @@ def delete_record():
         return jsonify({"success": False, "error": str(e)})
 
 @app.route('/api/crud/select', methods=['POST'])
+@scheduled('interactive')
 def select_records():
     try:
         data = request.json
@@ -999,34 +6769,329 @@ def select_records():
         where_conditions = data.get('where_conditions', {})
         limit = data.get('limit', 100)
         offset = data.get('offset', 0)
+        max_cell_size = data.get('max_cell_size', MAX_CELL_SIZE)
+        filters = data.get('filters')
+        order_by = data.get('order_by')
+        use_snapshot = data.get('use_snapshot', True)
         
-        result = db_manager.select_records(connection_id, table_name, columns, where_conditions, limit, offset)
-        return jsonify(result)
+        result = db_manager.select_records(connection_id, table_name, columns, where_conditions, limit, offset, max_cell_size,
+                                           filters, order_by, use_snapshot)
+        return data_response(result)
     
+    except MemoryBudgetError:
+        raise
     except Exception as e:
         logger.error(f"Select records error: {str(e)}")
         return jsonify({"success": False, "error": str(e)})
 
 @app.route('/api/crud/table-data', methods=['GET'])
+@scheduled('interactive')
 def get_table_data():
     try:
         connection_id = request.args.get('connection_id')
         table_name = request.args.get('table_name')
         limit = int(request.args.get('limit', 100))
         offset = int(request.args.get('offset', 0))
+        max_cell_size = int(request.args.get('max_cell_size', MAX_CELL_SIZE))
+        # filters and order_by are JSON-encoded in the query string
+        filters = json.loads(request.args.get('filters', 'null'))
+        order_by = json.loads(request.args.get('order_by', 'null'))
+        # since_version is the JSON "version" object of an earlier response
+        since_version = json.loads(request.args.get('since_version', 'null'))
+        change_column = request.args.get('change_column')
+        use_snapshot = request.args.get('use_snapshot', 'true').lower() != 'false'
         
         if not connection_id:
             return jsonify({"success": False, "error": "Connection ID required"})
         if not table_name:
             return jsonify({"success": False, "error": "Table name required"})
         
-        result = db_manager.get_table_data(connection_id, table_name, limit, offset)
-        return jsonify(result)
+        result = db_manager.get_table_data(connection_id, table_name, limit, offset, max_cell_size, filters, order_by,
+                                           since_version, change_column, use_snapshot)
+        return data_response(result)
     
+    except MemoryBudgetError:
+        raise
     except Exception as e:
         logger.error(f"Get table data error: {str(e)}")
         return jsonify({"success": False, "error": str(e)})
 
+@app.route('/api/crud/table-scan', methods=['POST'])
+@scheduled('bulk')
+def scan_table():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        table_name = data['table_name']
+        columns = data.get('columns')
+        workers = data.get('workers', 4)
+        chunk_size = data.get('chunk_size')
+        max_cell_size = data.get('max_cell_size', MAX_CELL_SIZE)
+        
+        result = db_manager.scan_table(connection_id, table_name, columns, workers, chunk_size, max_cell_size)
+        return data_response(result)
+    
+    except MemoryBudgetError:
+        raise
+    except Exception as e:
+        logger.error(f"Table scan error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/cell-value', methods=['GET'])
+@scheduled('interactive')
+def get_cell_value():
+    try:
+        connection_id = request.args.get('connection_id')
+        table_name = request.args.get('table_name')
+        column = request.args.get('column')
+        key = request.args.get('key')
+        
+        if not connection_id:
+            return jsonify({"success": False, "error": "Connection ID required"})
+        if not table_name or not column:
+            return jsonify({"success": False, "error": "Table name and column required"})
+        if not key:
+            return jsonify({"success": False, "error": "Primary key required"})
+        
+        result = db_manager.get_cell_value(connection_id, table_name, column, json.loads(key))
+        if not result['success']:
+            return jsonify(result)
+        
+        mimetype = 'application/octet-stream' if result['type'] == 'blob' else 'text/plain; charset=utf-8'
+        response = Response(stream_with_context(result['chunks']), mimetype=mimetype)
+        response.headers['X-Cell-Type'] = result['type']
+        if result['length'] is not None:
+            response.headers['X-Cell-Length'] = str(result['length'])
+        return response
+    
+    except Exception as e:
+        logger.error(f"Cell value error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/mongo/stream', methods=['POST'])
+@scheduled('bulk')
+def stream_mongodb_query():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        spec = data['query']
+        
+        chunks = db_manager.stream_mongodb_query(connection_id, spec)
+        return Response(stream_with_context(chunks), mimetype=NDJSON_MIMETYPE)
+    
+    except Exception as e:
+        logger.error(f"MongoDB stream error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/snapshot/create', methods=['POST'])
+@scheduled('bulk')
+def create_snapshot():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        table_name = data.get('table_name')
+        query = data.get('query')
+        name = data.get('name')
+        key_columns = data.get('key_columns')
+        change_column = data.get('change_column')
+        
+        logger.info(f"Creating snapshot of {table_name or name}")
+        
+        result = db_manager.create_snapshot(connection_id, table_name, query, name, key_columns, change_column)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Create snapshot error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/snapshot/refresh', methods=['POST'])
+@scheduled('bulk')
+def refresh_snapshot():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        name = data['name']
+        full = data.get('full', False)
+        detect_deletes = data.get('detect_deletes', False)
+        
+        result = db_manager.refresh_snapshot(connection_id, name, full, detect_deletes)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Refresh snapshot error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/snapshot/drop', methods=['POST'])
+@scheduled('normal')
+def drop_snapshot():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        name = data['name']
+        
+        result = db_manager.drop_snapshot(connection_id, name)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Drop snapshot error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/snapshot/list', methods=['GET'])
+@scheduled('interactive')
+def list_snapshots():
+    try:
+        connection_id = request.args.get('connection_id')
+        
+        if not connection_id:
+            return jsonify({"success": False, "error": "Connection ID required"})
+        
+        result = db_manager.list_snapshots(connection_id)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"List snapshots error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/change-log/enable', methods=['POST'])
+@scheduled('normal')
+def enable_change_log():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        table_name = data['table_name']
+        
+        result = db_manager.enable_change_log(connection_id, table_name)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Enable change log error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/change-log/disable', methods=['POST'])
+@scheduled('normal')
+def disable_change_log():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        table_name = data['table_name']
+        
+        result = db_manager.disable_change_log(connection_id, table_name)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Disable change log error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/fts/build', methods=['POST'])
+@scheduled('normal')
+def build_fts_index():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        table_name = data['table_name']
+        columns = data['columns']
+        tokenizer = data.get('tokenizer', 'unicode61')
+        
+        logger.info(f"Building full-text index on {table_name}({', '.join(columns)})")
+        
+        result = db_manager.build_fts_index(connection_id, table_name, columns, tokenizer)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Build FTS index error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/fts/drop', methods=['POST'])
+@scheduled('normal')
+def drop_fts_index():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        table_name = data['table_name']
+        
+        result = db_manager.drop_fts_index(connection_id, table_name)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Drop FTS index error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/fts/search', methods=['GET'])
+@scheduled('interactive')
+def search_fts_index():
+    try:
+        connection_id = request.args.get('connection_id')
+        table_name = request.args.get('table_name')
+        search = request.args.get('q', '')
+        limit = int(request.args.get('limit', FTS_DEFAULT_LIMIT))
+        offset = int(request.args.get('offset', 0))
+        raw = request.args.get('raw', 'false').lower() in ('1', 'true', 'yes')
+        max_cell_size = int(request.args.get('max_cell_size', MAX_CELL_SIZE))
+        
+        if not connection_id:
+            return jsonify({"success": False, "error": "Connection ID required"})
+        if not table_name:
+            return jsonify({"success": False, "error": "Table name required"})
+        
+        result = db_manager.search_fts_index(connection_id, table_name, search, limit, offset, raw)
+        return data_response(db_manager._cap_result_cells(result, max_cell_size))
+    
+    except Exception as e:
+        logger.error(f"FTS search error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/index-advisor', methods=['POST'])
+@scheduled('bulk')
+def advise_indexes():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        table_name = data.get('table_name')
+        min_executions = int(data.get('min_executions', ADVISOR_MIN_EXECUTIONS))
+        limit = int(data.get('limit', ADVISOR_MAX_RECOMMENDATIONS))
+        explain = data.get('explain', True)
+        create = data.get('create', False)
+        dry_run = data.get('dry_run', True)
+        
+        result = db_manager.advise_indexes(connection_id, table_name, min_executions, limit, explain, create, dry_run)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Index advisor error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/index-advisor/workload', methods=['GET'])
+@scheduled('interactive')
+def get_workload():
+    try:
+        connection_id = request.args.get('connection_id')
+        table_name = request.args.get('table_name')
+        
+        if not connection_id:
+            return jsonify({"success": False, "error": "Connection ID required"})
+        
+        result = db_manager.get_workload(connection_id, table_name)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Get workload error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/index-advisor/reset', methods=['POST'])
+@scheduled('normal')
+def reset_workload():
+    try:
+        data = request.json
+        connection_id = data['connection_id']
+        table_name = data.get('table_name')
+        
+        result = db_manager.reset_workload(connection_id, table_name)
+        return jsonify(result)
+    
+    except Exception as e:
+        logger.error(f"Reset workload error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
 @app.route('/')
 def index():
     return jsonify({
@@ -1043,7 +7108,70 @@ def index():
         ]
     })
 
+# Times are milliseconds since this module started importing
+startup_report = {
+    "imports_ms": STARTUP_IMPORTS_MS,
+    "module_load_ms": (time.perf_counter() - STARTUP_STARTED) * 1000,
+    "first_health_ms": None
+}
+
+def serve_workers(host, port, workers):
+    """Pre-fork workers that accept from one shared listening socket"""
+    from werkzeug.serving import make_server
+    
+    # Stale profiles from an earlier run must not be re-opened under old ids. Without an explicit
+    # path the registry goes in a fresh owner-only directory rather than under a guessable name in /tmp
+    registry_dir = None if REGISTRY_PATH else tempfile.mkdtemp(prefix=f"dbonly-registry-{port}-")
+    registry_path = REGISTRY_PATH or os.path.join(registry_dir, "registry.db")
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(registry_path + suffix):
+            os.remove(registry_path + suffix)
+    db_manager.registry = ConnectionRegistry(registry_path)
+    # Budgets are per process, so each worker gets its share of the configured total
+    memory_budget.budget = MEMORY_BUDGET // workers
+    
+    listener = socket.create_server((host, port), backlog=128)
+    listener.set_inheritable(True)
+    
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            os._exit(0)
+        children.append(pid)
+    logger.info(f"Started {workers} workers: {', '.join(str(pid) for pid in children)}")
+    
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    finally:
+        listener.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(registry_path + suffix):
+                os.remove(registry_path + suffix)
+        if registry_dir is not None:
+            os.rmdir(registry_dir)
+
 if __name__ == '__main__':
     logger.info("Starting DATABASE ONLY Backend...")
     logger.info("Backend will be available at http://localhost:5001")
-    app.run(host='0.0.0.0', port=5001, debug=True, threaded=True)
+    if BACKEND_WORKERS > 1 and hasattr(os, 'fork'):
+        serve_workers('0.0.0.0', 5001, BACKEND_WORKERS)
+    else:
+        if BACKEND_WORKERS > 1:
+            logger.warning("Multiple workers need os.fork(); serving from a single process")
+        app.run(host='0.0.0.0', port=5001, debug=BACKEND_DEBUG, use_reloader=BACKEND_DEBUG, threaded=True)
@@ -0,0 +1,42 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as backend  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    backend.app.config['TESTING'] = True
+    return backend.app.test_client()
+
+
+@pytest.fixture
+def sales_connection(client, tmp_path):
+    """A SQLite connection to a small sales table"""
+    path = str(tmp_path / "sales.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, region TEXT, product TEXT, amount REAL)")
+    conn.executemany(
+        "INSERT INTO sales (region, product, amount) VALUES (?, ?, ?)",
+        [
+            ("north", "apple", 10.0),
+            ("north", "apple", 5.0),
+            ("north", "pear", 7.0),
+            ("south", "apple", 3.0),
+            ("south", "plum", 20.0),
+            ("east", "pear", 1.0),
+            ("east", None, 4.0),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    response = client.post('/api/create-connection', json={"name": "sales", "type": "sqlite", "database": path})
+    connection_id = response.get_json()['connection_id']
+    yield connection_id
+    client.post('/api/close-connection', json={"connection_id": connection_id})
@@ -0,0 +1,137 @@
+import json
+import sqlite3
+import types
+
+import pytest
+
+import app as backend
+
+
+@pytest.fixture
+def logged_connection(client, sales_connection):
+    result = client.post('/api/change-log/enable', json={"connection_id": sales_connection, "table_name": "sales"}).get_json()
+    assert result['success'], result
+    assert result['key'] == 'id'
+    return sales_connection
+
+
+def table_data(client, connection_id, since=None, **options):
+    query = dict(connection_id=connection_id, table_name='sales', use_snapshot='false', **options)
+    if since is not None:
+        query['since_version'] = json.dumps(since)
+    result = client.get('/api/crud/table-data', query_string=query).get_json()
+    assert result['success'], result
+    return result
+
+
+def execute(client, connection_id, query):
+    result = client.post('/api/execute-query', json={"connection_id": connection_id, "query": query}).get_json()
+    assert result['success'], result
+
+
+def database_path(connection_id):
+    return backend.db_manager.connections[connection_id].profile['database']
+
+
+def test_unchanged_table_keeps_its_version(client, logged_connection):
+    first = table_data(client, logged_connection)
+    assert first['version']['log_seq'] == 0
+
+    again = table_data(client, logged_connection, since=first['version'])
+    assert again['unchanged'] is True
+    assert 'data' not in again
+    assert again['version'] == first['version']
+
+
+def test_changed_rows_come_back_as_a_delta(client, logged_connection):
+    version = table_data(client, logged_connection)['version']
+    execute(client, logged_connection, "UPDATE sales SET amount = 99 WHERE id = 2")
+    execute(client, logged_connection, "INSERT INTO sales (region, product, amount) VALUES ('west', 'fig', 2)")
+
+    delta = table_data(client, logged_connection, since=version)
+    assert delta['delta'] is True
+    assert delta['unchanged'] is False
+    assert sorted((row['id'], row['amount']) for row in delta['data']) == [(2, 99.0), (8, 2.0)]
+    assert delta['removed_keys'] == []
+    assert delta['total_count'] == 8
+    assert delta['version']['log_seq'] > version['log_seq']
+
+
+def test_deleted_and_filtered_out_rows_are_removed_keys(client, logged_connection):
+    filters = json.dumps([{"column": "region", "value": "north"}])
+    version = table_data(client, logged_connection, filters=filters)['version']
+    execute(client, logged_connection, "DELETE FROM sales WHERE id = 1")
+    execute(client, logged_connection, "UPDATE sales SET region = 'south' WHERE id = 3")
+
+    delta = table_data(client, logged_connection, since=version, filters=filters)
+    assert delta['data'] == []
+    assert sorted(delta['removed_keys']) == [1, 3]
+    assert delta['unchanged'] is False
+    assert delta['total_count'] == 1
+
+
+def test_writes_from_other_clients_change_the_version(client, logged_connection):
+    db_conn = backend.db_manager.connections[logged_connection]
+    before = backend.db_manager._table_version(db_conn, 'sales')
+    assert backend.db_manager._table_version(db_conn, 'sales') == before
+
+    other = sqlite3.connect(database_path(logged_connection))
+    other.execute("UPDATE sales SET amount = amount + 1 WHERE id = 4")
+    other.commit()
+    other.close()
+
+    after = backend.db_manager._table_version(db_conn, 'sales')
+    assert after['source'] != before['source']
+    assert after['log_seq'] == before['log_seq'] + 1
+    delta = table_data(client, logged_connection, since=before)
+    assert [(row['id'], row['amount']) for row in delta['data']] == [(4, 4.0)]
+
+
+def test_delta_falls_back_to_a_full_page(client, logged_connection):
+    version = table_data(client, logged_connection)['version']
+    execute(client, logged_connection, "UPDATE sales SET amount = amount + 1")
+
+    # More changed rows than the page holds
+    page = table_data(client, logged_connection, since=version, limit=3)
+    assert 'delta' not in page
+    assert len(page['data']) == 3
+
+    # Later pages and sorted pages can't be patched
+    version = page['version']
+    execute(client, logged_connection, "UPDATE sales SET amount = 0 WHERE id = 7")
+    assert 'delta' not in table_data(client, logged_connection, since=version, offset=2)
+    assert 'delta' not in table_data(client, logged_connection, since=version, order_by='["-id"]')
+
+
+def test_change_column_marks_inserts_and_updates(client, sales_connection):
+    version = table_data(client, sales_connection, change_column='id')['version']
+    assert (version['marker'], version['rows']) == (7, 7)
+    execute(client, sales_connection, "INSERT INTO sales (region, product, amount) VALUES ('west', 'fig', 2)")
+
+    delta = table_data(client, sales_connection, since=version, change_column='id')
+    assert [row['id'] for row in delta['data']] == [8]
+
+    # A delete shrinks the table, which the marker can't explain
+    version = delta['version']
+    execute(client, sales_connection, "DELETE FROM sales WHERE id = 8")
+    assert 'delta' not in table_data(client, sales_connection, since=version, change_column='id')
+
+
+def test_disabling_the_log_drops_it(client, logged_connection):
+    result = client.post('/api/change-log/disable', json={"connection_id": logged_connection, "table_name": "sales"})
+    assert result.get_json()['success']
+    assert 'log_seq' not in table_data(client, logged_connection)['version']
+    db_conn = backend.db_manager.connections[logged_connection]
+    assert not backend.db_manager._has_change_log(db_conn.connection_obj, 'sales')
+
+
+def test_other_databases_get_a_change_log_error(client, monkeypatch):
+    fake = types.SimpleNamespace(db_type='mysql')
+    monkeypatch.setattr(backend.db_manager, '_get_connection', lambda connection_id: fake)
+
+    result = backend.db_manager.enable_change_log('mysql-id', 'sales')
+    assert result == {"success": False, "error": "Change logs are only available for SQLite"}
+    result = backend.db_manager.disable_change_log('mysql-id', 'sales')
+    assert result['error'] == "Change logs are only available for SQLite"
+    result = backend.db_manager.drop_fts_index('mysql-id', 'sales')
+    assert result['error'] == "Full-text search indexes are only available for SQLite"
@@ -0,0 +1,151 @@
+import sqlite3
+
+import pytest
+
+import app as backend
+
+
+@pytest.fixture
+def copy_connections(client, tmp_path):
+    """Source with a 1,000-row items table and an empty target, both SQLite"""
+    source_path = str(tmp_path / "source.db")
+    conn = sqlite3.connect(source_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, price REAL)")
+    conn.executemany("INSERT INTO items VALUES (?, ?, ?)", [(i, f"item {i}", i * 1.5) for i in range(1, 1001)])
+    conn.commit()
+    conn.close()
+
+    target_path = str(tmp_path / "target.db")
+    sqlite3.connect(target_path).close()
+
+    ids = []
+    for name, path in (("source", source_path), ("target", target_path)):
+        response = client.post('/api/create-connection', json={"name": name, "type": "sqlite", "database": path})
+        ids.append(response.get_json()['connection_id'])
+    yield ids[0], ids[1], target_path
+    for connection_id in ids:
+        client.post('/api/close-connection', json={"connection_id": connection_id})
+
+
+def copy(client, source_id, target_id, **options):
+    return client.post('/api/copy-table', json=dict(
+        source_connection_id=source_id, source_table="items", target_connection_id=target_id, **options)).get_json()
+
+
+def target_rows(path, table="items"):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(f"SELECT id, name, price FROM {table} ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def target_tables(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+    finally:
+        conn.close()
+
+
+def test_copy_into_new_table(client, copy_connections):
+    source_id, target_id, target_path = copy_connections
+    result = copy(client, source_id, target_id, batch_size=100)
+    assert result['success'], result
+    assert result['rows_copied'] == 1000
+    assert result['batches'] == 10
+    assert target_rows(target_path)[:2] == [(1, "item 1", 1.5), (2, "item 2", 3.0)]
+
+
+def test_if_exists_fail_keeps_existing_table(client, copy_connections):
+    source_id, target_id, target_path = copy_connections
+    assert copy(client, source_id, target_id)['success']
+    result = copy(client, source_id, target_id, if_exists='fail')
+    assert not result['success']
+    assert len(target_rows(target_path)) == 1000
+
+
+def test_if_exists_append_adds_rows(client, copy_connections):
+    source_id, target_id, target_path = copy_connections
+    conn = sqlite3.connect(target_path)
+    conn.execute("CREATE TABLE items (id INTEGER, name TEXT, price REAL)")
+    conn.execute("INSERT INTO items VALUES (0, 'existing', 0)")
+    conn.commit()
+    conn.close()
+    result = copy(client, source_id, target_id, if_exists='append')
+    assert result['success'], result
+    rows = target_rows(target_path)
+    assert len(rows) == 1001
+    assert rows[0] == (0, "existing", 0.0)
+
+
+def test_if_exists_replace_swaps_table(client, copy_connections):
+    source_id, target_id, target_path = copy_connections
+    conn = sqlite3.connect(target_path)
+    conn.execute("CREATE TABLE items (id INTEGER, name TEXT, price REAL)")
+    conn.execute("INSERT INTO items VALUES (0, 'old', 0)")
+    conn.commit()
+    conn.close()
+
+    result = copy(client, source_id, target_id, if_exists='replace')
+    assert result['success'], result
+    rows = target_rows(target_path)
+    assert len(rows) == 1000
+    assert rows[0] == (1, "item 1", 1.5)
+    assert target_tables(target_path) == ['items']
+
+
+class FailingRename:
+    """Driver handle whose cursors fail on ALTER TABLE ... RENAME"""
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        cursor = self._conn.cursor()
+        handle = self
+
+        class Cursor:
+            def __getattr__(self, name):
+                return getattr(cursor, name)
+
+            def execute(self, sql, *args):
+                if 'RENAME' in sql.upper() and handle.fail:
+                    raise sqlite3.OperationalError("rename failed")
+                return cursor.execute(sql, *args)
+
+        return Cursor()
+
+    fail = True
+
+
+def test_failed_replace_keeps_original_table(client, copy_connections):
+    source_id, target_id, target_path = copy_connections
+    conn = sqlite3.connect(target_path)
+    conn.execute("CREATE TABLE items (id INTEGER, name TEXT, price REAL)")
+    conn.execute("INSERT INTO items VALUES (0, 'old', 0)")
+    conn.commit()
+    conn.close()
+
+    target = backend.db_manager.connections[target_id]
+    real = target.connection_obj
+    target.connection_obj = FailingRename(real)
+    try:
+        result = copy(client, source_id, target_id, if_exists='replace')
+    finally:
+        target.connection_obj = real
+    assert not result['success']
+    assert target_rows(target_path) == [(0, "old", 0.0)]
+    assert target_tables(target_path) == ['items']
+
+
+def test_parallel_readers_split_the_key_range(client, copy_connections):
+    source_id, target_id, target_path = copy_connections
+    result = copy(client, source_id, target_id, workers=4, batch_size=50)
+    assert result['success'], result
+    assert result['workers'] == 4
+    assert result['split_key'] == 'id'
+    rows = target_rows(target_path)
+    assert [row[0] for row in rows] == list(range(1, 1001))
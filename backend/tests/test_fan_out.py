@@ -0,0 +1,42 @@
+import time
+
+import app as backend
+
+SLOW_QUERY = ("WITH RECURSIVE r(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM r WHERE x < 50000000) "
+              "SELECT COUNT(*) AS n FROM r")
+
+
+def fan_out(client, connection_ids, query, **options):
+    return client.post('/api/fan-out-query', json=dict(connection_ids=connection_ids, query=query, **options)).get_json()
+
+
+def test_merged_select(client, sales_connection):
+    result = fan_out(client, [sales_connection], "SELECT COUNT(*) AS n FROM sales", merge=True)
+    assert result['success']
+    assert result['data'] == [{"_source": sales_connection, "n": 7}]
+
+
+def test_writes_are_rejected_unless_allowed(client, sales_connection):
+    result = fan_out(client, [sales_connection], "DELETE FROM sales WHERE id = 1")
+    assert not result['success']
+    assert 'SELECT' in result['error']
+    count = fan_out(client, [sales_connection], "SELECT COUNT(*) AS n FROM sales", merge=True)['data'][0]['n']
+    assert count == 7
+
+    result = fan_out(client, [sales_connection], "DELETE FROM sales WHERE id = 1", allow_writes=True)
+    assert result['results'][0]['affected_rows'] == 1
+
+
+def test_timed_out_statement_is_cancelled_before_the_slot_is_released(client, sales_connection):
+    start = time.perf_counter()
+    result = fan_out(client, [sales_connection], SLOW_QUERY, timeout=0.2)
+    elapsed = time.perf_counter() - start
+
+    assert result['results'][0]['timed_out']
+    assert elapsed < 5
+    db_conn = backend.db_manager.connections[sales_connection]
+    assert db_conn.scheduler.status()['running'] == 0
+    # The handle is free again: nothing is still running on it
+    rows = client.post('/api/execute-query', json={
+        "connection_id": sales_connection, "query": "SELECT COUNT(*) AS n FROM sales"}).get_json()
+    assert rows['data'] == [{"n": 7}]
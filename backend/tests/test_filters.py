@@ -0,0 +1,166 @@
+import pytest
+
+import app as backend
+
+COLUMNS = ['id', 'region', 'product', 'amount']
+
+
+def compile_filters(filters, db_type='sqlite', columns=COLUMNS):
+    return backend.db_manager._compile_filters(db_type, columns, filters)
+
+
+def select(client, connection_id, table_name='sales', **options):
+    return client.post('/api/crud/select', json=dict(connection_id=connection_id, table_name=table_name,
+                                                     **options)).get_json()
+
+
+def ids(result):
+    return sorted(row['id'] for row in result['data'])
+
+
+@pytest.mark.parametrize("node, expected_sql, expected_params", [
+    ({"column": "amount", "op": "ge", "value": 5}, '("amount" >= ?)', [5]),
+    ({"column": "amount", "op": "<", "value": 5}, '("amount" < ?)', [5]),
+    ({"column": "amount", "op": "between", "value": [3, 7]}, '("amount" BETWEEN ? AND ?)', [3, 7]),
+    ({"column": "region", "op": "in", "value": ["north", "east"]}, '("region" IN (?, ?))', ["north", "east"]),
+    ({"column": "region", "op": "not_in", "value": ["south"]}, '("region" NOT IN (?))', ["south"]),
+    ({"column": "product", "op": "like", "value": "p%"}, '("product" LIKE ?)', ["p%"]),
+    ({"column": "product", "op": "is_null"}, '("product" IS NULL)', []),
+    ({"column": "product", "op": "not_null"}, '("product" IS NOT NULL)', []),
+    ({"column": "region", "value": "north"}, '("region" = ?)', ["north"]),
+])
+def test_each_operator_compiles_to_a_parameterized_predicate(node, expected_sql, expected_params):
+    assert compile_filters([node]) == (expected_sql, expected_params)
+
+
+def test_nested_or_groups():
+    sql, params = compile_filters([
+        {"column": "amount", "op": "gt", "value": 2},
+        {"or": [
+            {"column": "region", "op": "eq", "value": "north"},
+            {"and": [{"column": "region", "op": "eq", "value": "east"},
+                     {"column": "product", "op": "is_null"}]},
+        ]},
+    ])
+    assert sql == '("amount" > ? AND ("region" = ? OR ("region" = ? AND "product" IS NULL)))'
+    assert params == [2, "north", "east"]
+
+
+def test_empty_filters_compile_to_nothing():
+    assert compile_filters(None) == ('', [])
+    assert compile_filters([{"or": []}]) == ('', [])
+
+
+@pytest.mark.parametrize("filters, message", [
+    ([{"column": "price", "op": "eq", "value": 1}], "Unknown column: price"),
+    ([{"column": "amount", "op": "regexp", "value": "1"}], "Unsupported filter operator: regexp"),
+    ([{"column": "amount", "op": "gt; DROP TABLE sales", "value": 1}], "Unsupported filter operator"),
+    ([{"column": "region", "op": "in", "value": []}], "needs a non-empty list value"),
+    ([{"column": "amount", "op": "between", "value": [1]}], "needs a [low, high] value"),
+])
+def test_invalid_filters_are_rejected(filters, message):
+    with pytest.raises(ValueError) as error:
+        compile_filters(filters)
+    assert message in str(error.value)
+
+
+def test_predicate_cap():
+    at_cap = [{"column": "id", "op": "ne", "value": n} for n in range(backend.FILTER_MAX_PREDICATES)]
+    sql, params = compile_filters(at_cap)
+    assert len(params) == backend.FILTER_MAX_PREDICATES
+
+    nested = {"or": [{"and": at_cap}, {"column": "id", "op": "eq", "value": -1}]}
+    with pytest.raises(ValueError, match="Too many filter predicates"):
+        compile_filters([nested])
+
+
+@pytest.mark.parametrize("db_type, expected_sql, placeholder", [
+    ('sqlite', '"we""ird col"', '?'),
+    ('postgresql', '"we""ird col"', '%s'),
+    ('mysql', '`we"ird col`', '%s'),
+    ('mssql', '[we"ird col]', '?'),
+])
+def test_identifiers_are_quoted_per_dialect(db_type, expected_sql, placeholder):
+    sql, _ = compile_filters([{"column": 'we"ird col', "op": "eq", "value": 1}], db_type, ['we"ird col'])
+    assert sql == f"({expected_sql} = {placeholder})"
+
+
+def test_closing_quote_characters_are_doubled():
+    manager = backend.db_manager
+    assert manager._compile_filters('mysql', ['a`b'], [{"column": "a`b", "op": "is_null"}])[0] == '(`a``b` IS NULL)'
+    assert manager._compile_filters('mssql', ['a]b'], [{"column": "a]b", "op": "is_null"}])[0] == '([a]]b] IS NULL)'
+
+
+def test_order_by_terms():
+    compile_order = backend.db_manager._compile_order_by
+    assert compile_order('sqlite', COLUMNS, ["region", "-amount", {"column": "id", "direction": "desc"}]) == \
+        '"region" ASC, "amount" DESC, "id" DESC'
+    assert compile_order('mysql', COLUMNS, ["-id"]) == '`id` DESC'
+    assert compile_order('sqlite', COLUMNS, None) == ''
+
+
+@pytest.mark.parametrize("order_by, message", [
+    (["price"], "Unknown column: price"),
+    (["-price"], "Unknown column: price"),
+    ([{"column": "amount", "direction": "sideways"}], "Invalid sort direction"),
+])
+def test_invalid_order_by_is_rejected(order_by, message):
+    with pytest.raises(ValueError, match=message):
+        backend.db_manager._compile_order_by('sqlite', COLUMNS, order_by)
+
+
+def test_select_applies_filters_and_order(client, sales_connection):
+    result = select(client, sales_connection, filters=[
+        {"column": "amount", "op": "between", "value": [3, 10]},
+        {"or": [{"column": "product", "op": "like", "value": "ap%"},
+                {"column": "product", "op": "is_null"}]},
+    ], order_by=["-amount"])
+    assert result['success']
+    assert [row['amount'] for row in result['data']] == [10.0, 5.0, 4.0, 3.0]
+
+    result = select(client, sales_connection, filters=[{"column": "region", "op": "in", "value": ["east", "south"]}])
+    assert ids(result) == [4, 5, 6, 7]
+
+
+def test_select_combines_where_conditions_with_filters(client, sales_connection):
+    result = select(client, sales_connection, where_conditions={"region": "north"},
+                    filters=[{"column": "amount", "op": "lt", "value": 8}])
+    assert ids(result) == [2, 3]
+
+
+def test_select_rejects_unknown_columns_and_operators(client, sales_connection):
+    result = select(client, sales_connection, filters=[{"column": "amount) OR (1=1", "op": "eq", "value": 1}])
+    assert not result['success']
+    assert 'Unknown column' in result['error']
+
+    result = select(client, sales_connection, filters=[{"column": "amount", "op": "~", "value": 1}])
+    assert not result['success']
+    assert 'Unsupported filter operator' in result['error']
+
+    result = select(client, sales_connection, order_by=["nonexistent"])
+    assert not result['success']
+
+
+def test_table_data_filters_from_the_query_string(client, sales_connection):
+    response = client.get('/api/crud/table-data', query_string={
+        "connection_id": sales_connection, "table_name": "sales", "use_snapshot": "false",
+        "filters": '[{"column": "product", "op": "not_null"}, {"column": "region", "value": "east"}]',
+        "order_by": '["-id"]',
+    })
+    result = response.get_json()
+    assert result['success']
+    assert [row['id'] for row in result['data']] == [6]
+
+
+def test_quoted_identifiers_against_sqlite(client, sales_connection):
+    client.post('/api/execute-query', json={
+        "connection_id": sales_connection,
+        "query": 'CREATE TABLE "odd table" (id INTEGER PRIMARY KEY, "we""ird col" TEXT)'})
+    client.post('/api/execute-query', json={
+        "connection_id": sales_connection,
+        "query": "INSERT INTO \"odd table\" (\"we\"\"ird col\") VALUES ('a'), ('b')"})
+
+    result = select(client, sales_connection, table_name='odd table',
+                    filters=[{"column": 'we"ird col', "op": "eq", "value": "b"}], order_by=['-we"ird col'])
+    assert result['success']
+    assert result['data'] == [{"id": 2, 'we"ird col': "b"}]
@@ -0,0 +1,154 @@
+import pytest
+
+import app as backend
+
+
+def execute(client, connection_id, query, **options):
+    return client.post('/api/execute-query', json=dict(connection_id=connection_id, query=query, **options)).get_json()
+
+
+def count(client, connection_id, query):
+    return client.post('/api/query-count', json={"connection_id": connection_id, "query": query}).get_json()
+
+
+@pytest.mark.parametrize("query, expected, rewritten", [
+    ("SELECT * FROM sales",
+     "SELECT COUNT(*) FROM (\nSELECT 1 AS _c\nFROM sales\n) AS _dbonly_count", True),
+    ("SELECT id, id FROM sales WHERE amount > 2;",
+     "SELECT COUNT(*) FROM (\nSELECT 1 AS _c\nFROM sales WHERE amount > 2\n) AS _dbonly_count", True),
+    ("SELECT * FROM sales ORDER BY amount DESC; -- biggest first",
+     "SELECT COUNT(*) FROM (\nSELECT 1 AS _c\nFROM sales\n) AS _dbonly_count", True),
+    ("SELECT * FROM sales /* all */ ;;\n",
+     "SELECT COUNT(*) FROM (\nSELECT 1 AS _c\nFROM sales\n) AS _dbonly_count", True),
+    ("SELECT 'a;b' AS label, region FROM sales",
+     "SELECT COUNT(*) FROM (\nSELECT 1 AS _c\nFROM sales\n) AS _dbonly_count", True),
+    ("WITH big AS (SELECT * FROM sales WHERE amount > 4) SELECT region FROM big",
+     "WITH big AS (SELECT * FROM sales WHERE amount > 4) SELECT COUNT(*) FROM (\nSELECT 1 AS _c\nFROM big\n) AS _dbonly_count",
+     True),
+    ("SELECT TOP 5 * FROM sales",
+     "SELECT COUNT(*) FROM (\nSELECT TOP 5 1 AS _c\nFROM sales\n) AS _dbonly_count", True),
+    ("SELECT DISTINCT region FROM sales",
+     "SELECT COUNT(*) FROM (\nSELECT DISTINCT region FROM sales\n) AS _dbonly_count", False),
+    ("SELECT region, SUM(amount) AS total FROM sales GROUP BY region",
+     "SELECT COUNT(*) FROM (\nSELECT region, SUM(amount) AS total FROM sales GROUP BY region\n) AS _dbonly_count", False),
+    ("SELECT COUNT(*) AS n FROM sales",
+     "SELECT COUNT(*) FROM (\nSELECT COUNT(*) AS n FROM sales\n) AS _dbonly_count", False),
+    ("SELECT region FROM sales UNION SELECT product FROM sales",
+     "SELECT COUNT(*) FROM (\nSELECT region FROM sales UNION SELECT product FROM sales\n) AS _dbonly_count", False),
+    ("SELECT * FROM sales ORDER BY id LIMIT 3",
+     "SELECT COUNT(*) FROM (\nSELECT * FROM sales ORDER BY id LIMIT 3\n) AS _dbonly_count", False),
+])
+def test_count_query(query, expected, rewritten):
+    assert backend.db_manager._count_query(query) == (expected, rewritten)
+
+
+@pytest.mark.parametrize("query, expected_count", [
+    ("SELECT * FROM sales", 7),
+    ("SELECT id, id FROM sales WHERE amount > 2;", 6),
+    ("SELECT * FROM sales ORDER BY amount DESC; -- biggest first", 7),
+    ("SELECT 'a;b' AS label, region FROM sales", 7),
+    ("WITH big AS (SELECT * FROM sales WHERE amount > 4) SELECT region FROM big", 4),
+    ("WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 50) SELECT x FROM n", 50),
+    ("SELECT DISTINCT region FROM sales", 3),
+    ("SELECT region, SUM(amount) AS total FROM sales GROUP BY region", 3),
+    ("SELECT region FROM sales UNION SELECT product FROM sales", 7),
+    ("SELECT region FROM sales UNION ALL SELECT product FROM sales -- both", 14),
+    ("SELECT * FROM sales ORDER BY id LIMIT 3", 3),
+])
+def test_counts_run_against_sqlite(client, sales_connection, query, expected_count):
+    result = count(client, sales_connection, query)
+    assert result['success'], result
+    assert result['total_count'] == expected_count
+
+
+def test_only_selects_are_counted(client, sales_connection):
+    result = count(client, sales_connection, "DELETE FROM sales")
+    assert result == {"success": False, "error": "Only SELECT queries can be counted"}
+
+
+@pytest.mark.parametrize("db_type, query, expected, applied", [
+    ('sqlite', "SELECT * FROM sales", "SELECT * FROM sales\nLIMIT 11", True),
+    ('mysql', "SELECT * FROM sales;  ", "SELECT * FROM sales\nLIMIT 11", True),
+    ('sqlite', "SELECT * FROM sales; -- note", "SELECT * FROM sales\nLIMIT 11", True),
+    ('sqlite', "SELECT * FROM sales -- note\n", "SELECT * FROM sales\nLIMIT 11", True),
+    ('sqlite', "SELECT ';' AS x FROM sales /* done */", "SELECT ';' AS x FROM sales\nLIMIT 11", True),
+    ('postgresql', "SELECT * FROM sales ORDER BY id", "SELECT * FROM sales ORDER BY id\nFETCH FIRST 11 ROWS ONLY", True),
+    ('mssql', "SELECT * FROM sales", "SELECT TOP (11) * FROM sales", True),
+    ('mssql', "SELECT DISTINCT region FROM sales;", "SELECT DISTINCT TOP (11) region FROM sales", True),
+    ('mssql', "SELECT 'x' AS label FROM sales", "SELECT TOP (11) 'x' AS label FROM sales", True),
+    ('sqlite', "WITH s AS (SELECT * FROM sales) SELECT * FROM s",
+     "WITH s AS (SELECT * FROM sales) SELECT * FROM s\nLIMIT 11", True),
+    ('sqlite', "SELECT region FROM sales UNION SELECT product FROM sales",
+     "SELECT region FROM sales UNION SELECT product FROM sales\nLIMIT 11", True),
+    ('mssql', "SELECT region FROM sales UNION SELECT product FROM sales",
+     "SELECT region FROM sales UNION SELECT product FROM sales", False),
+    ('sqlite', "SELECT * FROM sales LIMIT 3", "SELECT * FROM sales LIMIT 3", False),
+    ('sqlite', "SELECT * FROM sales LIMIT 3 OFFSET 2;", "SELECT * FROM sales LIMIT 3 OFFSET 2", False),
+    ('postgresql', "SELECT * FROM sales FETCH FIRST 2 ROWS ONLY", "SELECT * FROM sales FETCH FIRST 2 ROWS ONLY", False),
+    ('mssql', "SELECT TOP 5 * FROM sales", "SELECT TOP 5 * FROM sales", False),
+    ('postgresql', "SELECT * FROM sales FOR UPDATE", "SELECT * FROM sales FOR UPDATE", False),
+    ('mssql', "SELECT * INTO backup FROM sales", "SELECT * INTO backup FROM sales", False),
+    # Only the outer query counts: a limit inside a subquery doesn't bound the result
+    ('sqlite', "SELECT * FROM sales WHERE id IN (SELECT id FROM sales LIMIT 2)",
+     "SELECT * FROM sales WHERE id IN (SELECT id FROM sales LIMIT 2)\nLIMIT 11", True),
+    ('sqlite', "SELECT 'LIMIT 3' AS note FROM sales", "SELECT 'LIMIT 3' AS note FROM sales\nLIMIT 11", True),
+])
+def test_apply_row_limit(db_type, query, expected, applied):
+    assert backend.db_manager._apply_row_limit(db_type, query, 11) == (expected, applied)
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM sales ORDER BY id; -- all of it",
+    "WITH s AS (SELECT * FROM sales) SELECT * FROM s ORDER BY id",
+    "SELECT id FROM sales UNION SELECT id + 100 FROM sales ORDER BY 1",
+])
+def test_max_rows_truncates(client, sales_connection, query):
+    result = execute(client, sales_connection, query, max_rows=3)
+    assert result['success'], result
+    assert result['row_count'] == 3
+    assert result['truncated'] is True
+    assert result['truncated_by'] == 'rows'
+    assert result['row_limit_applied'] is True
+    assert result['total_count'] is None
+
+
+def test_result_within_max_rows_is_complete(client, sales_connection):
+    result = execute(client, sales_connection, "SELECT * FROM sales", max_rows=7)
+    assert (result['row_count'], result['truncated'], result['total_count']) == (7, False, 7)
+    assert 'truncated_by' not in result
+
+
+def test_existing_limit_is_kept_and_still_capped(client, sales_connection):
+    result = execute(client, sales_connection, "SELECT * FROM sales LIMIT 5", max_rows=3)
+    assert result['row_limit_applied'] is False
+    assert (result['row_count'], result['truncated'], result['truncated_by']) == (3, True, 'rows')
+
+    result = execute(client, sales_connection, "SELECT * FROM sales LIMIT 2", max_rows=3)
+    assert (result['row_count'], result['truncated']) == (2, False)
+
+
+def test_auto_limit_off_still_caps_the_fetch(client, sales_connection):
+    result = execute(client, sales_connection, "SELECT * FROM sales", max_rows=3, auto_limit=False)
+    assert result['row_limit_applied'] is False
+    assert (result['row_count'], result['truncated_by']) == (3, 'rows')
+
+
+def test_max_bytes_truncates(client, sales_connection):
+    result = execute(client, sales_connection, "SELECT * FROM sales", max_bytes=1)
+    # At least one row always comes back
+    assert (result['row_count'], result['truncated'], result['truncated_by']) == (1, True, 'bytes')
+
+    one_row = backend.db_manager._row_size((1, 'north', 'apple', 10.0))
+    result = execute(client, sales_connection, "SELECT * FROM sales ORDER BY id", max_bytes=one_row * 3)
+    assert result['truncated_by'] == 'bytes'
+    assert 1 < result['row_count'] < 7
+
+    result = execute(client, sales_connection, "SELECT * FROM sales", max_bytes=10 ** 6)
+    assert (result['row_count'], result['truncated']) == (7, False)
+
+
+def test_truncated_result_can_be_counted(client, sales_connection):
+    query = "SELECT * FROM sales WHERE amount > 2 ORDER BY amount; -- sorted"
+    result = execute(client, sales_connection, query, max_rows=2)
+    assert result['truncated'] is True
+    assert count(client, sales_connection, query)['total_count'] == 6
@@ -0,0 +1,112 @@
+import pymysql
+import pytest
+
+import app as backend
+
+
+class FakeHandle:
+    def close(self):
+        pass
+
+
+def attach_replicas(connection_id, count=2):
+    db_conn = backend.db_manager.connections[connection_id]
+    db_conn.replicas = [
+        backend.ReplicaConnection({"host": f"replica{i}", "port": 3306}, FakeHandle()) for i in range(count)
+    ]
+    db_conn.last_write_at = None
+    return db_conn
+
+
+@pytest.fixture
+def replica_queries(monkeypatch):
+    """Queries sent to fake replica handles are answered here instead of by a driver"""
+    calls = []
+    down = set()
+    execute_on = backend.db_manager._execute_on
+
+    def fake_execute_on(conn, db_type, query, query_type, max_rows=None, max_bytes=None):
+        if not isinstance(conn, FakeHandle):
+            return execute_on(conn, db_type, query, query_type, max_rows, max_bytes)
+        calls.append(conn)
+        if conn in down:
+            raise pymysql.err.OperationalError(2003, "Can't connect")
+        return {"success": True, "data": [{"n": 1}], "columns": ["n"], "row_count": 1, "truncated": False}
+
+    monkeypatch.setattr(backend.db_manager, '_execute_on', fake_execute_on)
+    return calls, down
+
+
+def test_reads_never_run_health_checks(sales_connection, monkeypatch):
+    db_conn = attach_replicas(sales_connection)
+    db_conn.replicas[0].healthy = False
+
+    def fail(*args, **kwargs):
+        raise AssertionError("health check on the query path")
+
+    monkeypatch.setattr(backend.db_manager, '_check_replica', fail)
+    monkeypatch.setattr(backend.db_manager, '_connect_profile', fail)
+    candidates = backend.db_manager._read_candidates(db_conn, 'select')
+    assert candidates == [db_conn.replicas[1]]
+
+
+def test_failover_to_next_replica_then_primary(client, sales_connection, replica_queries):
+    calls, down = replica_queries
+    db_conn = attach_replicas(sales_connection)
+    down.update(replica.connection_obj for replica in db_conn.replicas)
+
+    result = client.post('/api/execute-query', json={
+        "connection_id": sales_connection, "query": "SELECT COUNT(*) AS n FROM sales"}).get_json()
+    assert result['success']
+    assert result['served_by'] == 'primary'
+    assert result['data'] == [{"n": 7}]
+    assert len(calls) == 2
+    assert not any(replica.healthy for replica in db_conn.replicas)
+    assert all(replica.connection_obj is None for replica in db_conn.replicas)
+
+
+def test_healthy_replica_serves_reads(client, sales_connection, replica_queries):
+    calls, down = replica_queries
+    db_conn = attach_replicas(sales_connection)
+    down.add(db_conn.replicas[0].connection_obj)
+    db_conn._replica_cursor = 0
+
+    result = client.post('/api/execute-query', json={
+        "connection_id": sales_connection, "query": "SELECT 1 AS n"}).get_json()
+    assert result['served_by'] == 'replica1:3306'
+    assert db_conn.replicas[1].healthy
+
+
+def test_background_check_reconnects_a_failed_replica(sales_connection, monkeypatch):
+    db_conn = attach_replicas(sales_connection, count=1)
+    replica = db_conn.replicas[0]
+    backend.db_manager._mark_replica_failed(replica, RuntimeError("gone"))
+
+    class PingHandle(FakeHandle):
+        def cursor(self):
+            return backend.sqlite3.connect(':memory:').cursor()
+
+    monkeypatch.setattr(backend.db_manager, '_connect_profile',
+                        lambda profile: {"success": True, "connection": PingHandle()})
+    monkeypatch.setattr(backend.db_manager, '_schedule_replica_checks', lambda db_conn: None)
+    backend.db_manager._run_replica_checks(db_conn)
+    assert replica.healthy
+    assert replica.latency_ms is not None
+
+
+def test_read_your_writes_window(client, sales_connection, replica_queries, monkeypatch):
+    calls, down = replica_queries
+    attach_replicas(sales_connection)
+
+    client.post('/api/execute-query', json={
+        "connection_id": sales_connection, "query": "UPDATE sales SET amount = amount + 1 WHERE id = 1"})
+    result = client.post('/api/execute-query', json={
+        "connection_id": sales_connection, "query": "SELECT amount FROM sales WHERE id = 1"}).get_json()
+    assert result['served_by'] == 'primary'
+    assert result['data'] == [{"amount": 11.0}]
+    assert calls == []
+
+    monkeypatch.setattr(backend, 'REPLICA_READ_YOUR_WRITES_WINDOW', 0)
+    result = client.post('/api/execute-query', json={
+        "connection_id": sales_connection, "query": "SELECT amount FROM sales WHERE id = 1"}).get_json()
+    assert result['served_by'].startswith('replica')
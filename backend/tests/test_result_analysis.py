@@ -0,0 +1,95 @@
+import pytest
+
+import app as backend
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def engine(request, monkeypatch):
+    """Runs a test on the numpy path and again with numpy treated as missing"""
+    if request.param == 'numpy':
+        if not backend.drivers.available('numpy'):
+            pytest.skip("numpy is not installed")
+    else:
+        monkeypatch.setitem(backend.drivers._loaded, 'numpy', None)
+    return request.param
+
+
+def cache(client, connection_id, query="SELECT region, product, amount FROM sales", **options):
+    result = client.post('/api/execute-query', json=dict(
+        connection_id=connection_id, query=query, cache_result=True, **options)).get_json()
+    assert result['success'], result
+    assert result['result_id']
+    return result
+
+
+def analyze(client, result_id, **spec):
+    result = client.post('/api/result/analyze', json=dict(result_id=result_id, **spec)).get_json()
+    assert result['success'], result
+    return result
+
+
+def test_group_by_aggregates(client, sales_connection, engine):
+    result_id = cache(client, sales_connection)['result_id']
+    result = analyze(client, result_id, group_by=['region'], aggregates=[
+        {"op": "count"},
+        {"op": "sum", "column": "amount"},
+        {"op": "avg", "column": "amount"},
+        {"op": "min", "column": "amount"},
+        {"op": "max", "column": "amount"},
+        {"op": "count_distinct", "column": "product"},
+    ], order_by=['region'])
+
+    assert result['engine'] == engine
+    assert result['source_rows'] == 7
+    assert result['source_truncated'] is False
+    rows = {row['region']: row for row in result['data']}
+    assert [row['region'] for row in result['data']] == ['east', 'north', 'south']
+    assert rows['north']['count'] == 3
+    assert rows['north']['sum_amount'] == pytest.approx(22.0)
+    assert rows['north']['avg_amount'] == pytest.approx(22.0 / 3)
+    assert rows['south']['min_amount'] == pytest.approx(3.0)
+    assert rows['south']['max_amount'] == pytest.approx(20.0)
+    assert rows['east']['count_distinct_product'] == 1
+
+
+def test_pivot(client, sales_connection, engine):
+    result_id = cache(client, sales_connection)['result_id']
+    result = analyze(client, result_id, group_by=['region'], aggregates=[{"op": "sum", "column": "amount"}],
+                     pivot={"column": "product", "values": ["apple", "pear"]}, order_by=['region'])
+
+    assert result['engine'] == engine
+    assert result['columns'] == ['region', 'apple', 'pear']
+    rows = {row['region']: row for row in result['data']}
+    assert rows['north']['apple'] == pytest.approx(15.0)
+    assert rows['north']['pear'] == pytest.approx(7.0)
+    assert rows['south']['apple'] == pytest.approx(3.0)
+    assert rows['east']['pear'] == pytest.approx(1.0)
+
+
+def test_top_n_ranks_by_first_aggregate(client, sales_connection, engine):
+    result_id = cache(client, sales_connection)['result_id']
+    result = analyze(client, result_id, group_by=['product'], aggregates=[{"op": "sum", "column": "amount"}], top=2)
+
+    assert result['engine'] == engine
+    assert [row['product'] for row in result['data']] == ['plum', 'apple']
+    assert result['group_count'] == 4
+    assert result['truncated'] is False
+
+
+def test_truncated_source_is_reported(client, sales_connection, engine):
+    cached = cache(client, sales_connection, max_rows=4)
+    assert cached['truncated']
+
+    result = analyze(client, cached['result_id'], aggregates=[{"op": "count"}])
+    assert result['data'] == [{"count": 4}]
+    assert result['source_truncated'] is True
+    assert result['source_truncated_by'] == 'rows'
+
+
+def test_cached_results_are_reserved_against_the_memory_budget(client, sales_connection):
+    reserved = backend.memory_budget.reserved
+    result_id = cache(client, sales_connection)['result_id']
+    assert backend.memory_budget.reserved > reserved
+
+    client.post('/api/result/drop', json={"result_id": result_id})
+    assert backend.memory_budget.reserved == reserved
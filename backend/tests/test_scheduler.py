@@ -0,0 +1,157 @@
+import threading
+import time
+
+import pytest
+
+import app as backend
+
+INTERACTIVE = backend.SCHEDULER_PRIORITIES['interactive']
+BULK = backend.SCHEDULER_PRIORITIES['bulk']
+
+
+@pytest.fixture
+def scheduler(sales_connection):
+    return backend.db_manager.connections[sales_connection].scheduler
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def queue_in_background(scheduler, priority, started):
+    """Acquire on a thread, recording the order slots are granted; the slot is released right away"""
+    def run():
+        scheduler.acquire(priority)
+        started.append(priority)
+        scheduler.release(0)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_full_queue_answers_429_with_retry_after(client, sales_connection, scheduler):
+    scheduler.max_depth = 1
+    scheduler.avg_service_ms = 2500
+    scheduler.acquire(INTERACTIVE)
+    started = []
+    waiting = queue_in_background(scheduler, BULK, started)
+    try:
+        wait_for(lambda: scheduler.status()['queued'] == 1)
+
+        response = client.post('/api/execute-query', json={"connection_id": sales_connection,
+                                                            "query": "SELECT 1"})
+        assert response.status_code == 429
+        # One running and one queued, at 2.5 s each
+        assert response.headers['Retry-After'] == '5'
+        body = response.get_json()
+        assert (body['success'], body['retry_after'], body['queue_depth']) == (False, 5, 1)
+    finally:
+        scheduler.release(0)
+        waiting.join()
+    assert started == [BULK]
+
+    response = client.post('/api/execute-query', json={"connection_id": sales_connection, "query": "SELECT 1"})
+    assert response.status_code == 200
+    assert 'X-Queue-Wait-Ms' in response.headers
+
+
+def test_queue_wait_times_out_with_retry_after(scheduler):
+    scheduler.acquire(INTERACTIVE)
+    try:
+        with pytest.raises(backend.QueueFullError) as error:
+            scheduler.acquire(BULK, timeout=0.05)
+        assert error.value.retry_after >= 1
+        assert scheduler.status()['queued'] == 0
+    finally:
+        scheduler.release(0)
+
+
+def test_interactive_requests_overtake_bulk_ones(scheduler):
+    scheduler.acquire(INTERACTIVE)
+    started = []
+    threads = []
+    for priority in (BULK, BULK, INTERACTIVE):
+        threads.append(queue_in_background(scheduler, priority, started))
+        wait_for(lambda: scheduler.status()['queued'] == len(threads))
+    scheduler.release(0)
+    for thread in threads:
+        thread.join()
+    assert started == [INTERACTIVE, BULK, BULK]
+
+
+def test_requested_priority_can_only_lower_the_class(client, sales_connection, scheduler, monkeypatch):
+    ranks = []
+    acquire = scheduler.acquire
+    monkeypatch.setattr(scheduler, 'acquire', lambda rank, **kwargs: ranks.append(rank) or acquire(rank, **kwargs))
+
+    client.post('/api/crud/select', json={"connection_id": sales_connection, "table_name": "sales", "priority": "bulk"})
+    client.post('/api/crud/select', json={"connection_id": sales_connection, "table_name": "sales"})
+    client.post('/api/execute-query', json={"connection_id": sales_connection, "query": "SELECT 1",
+                                            "priority": "interactive"})
+    assert ranks == [BULK, INTERACTIVE, backend.SCHEDULER_PRIORITIES['normal']]
+
+
+def test_streamed_response_keeps_its_slot_until_closed(client, sales_connection, scheduler):
+    response = client.get('/api/cell-value', buffered=False, query_string={
+        "connection_id": sales_connection, "table_name": "sales", "column": "region", "key": '{"id": 1}'})
+    assert response.status_code == 200
+    assert scheduler.status()['running'] == 1
+
+    assert b''.join(response.response) == b'north'
+    response.close()
+    assert scheduler.status()['running'] == 0
+
+
+def test_failed_view_releases_its_slot(client, sales_connection, scheduler, monkeypatch):
+    def boom(*args, **kwargs):
+        raise backend.MemoryBudgetError(1, 1, 1)
+    monkeypatch.setattr(backend.db_manager, 'execute_query', boom)
+
+    response = client.post('/api/execute-query', json={"connection_id": sales_connection, "query": "SELECT 1"})
+    assert response.status_code == 503
+    assert scheduler.status()['running'] == 0
+
+
+def test_sidebar_requests_use_the_side_lane_while_the_handle_is_busy(client, sales_connection, scheduler):
+    db_conn = backend.db_manager.connections[sales_connection]
+
+    # Idle connection: the request queues as usual and runs on the driver handle
+    assert client.get('/api/database-info', query_string={"connection_id": sales_connection}).get_json()['success']
+    assert db_conn.side_handle is None
+
+    scheduler.acquire(INTERACTIVE)
+    try:
+        response = client.get('/api/database-info', query_string={"connection_id": sales_connection})
+        assert response.get_json()['success']
+        assert response.headers['X-Queue-Wait-Ms'] == '0.0'
+        assert db_conn.side_handle is not None and db_conn.side_handle is not db_conn.connection_obj
+        status = scheduler.status()
+        assert (status['running'], status['queued'], status['side_lane_busy']) == (1, 0, False)
+
+        # One side request at a time: a second one finds the lane taken and queues
+        assert scheduler.claim_side_lane()
+        assert backend.db_manager._claim_side_handle(db_conn) is None
+        scheduler.release_side_lane()
+    finally:
+        scheduler.release(0)
+    assert not scheduler.claim_side_lane()
+
+
+def test_routes_without_the_side_lane_wait_for_the_handle(client, sales_connection, scheduler):
+    scheduler.acquire(INTERACTIVE)
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(response=client.post(
+        '/api/execute-query', json={"connection_id": sales_connection, "query": "SELECT 1"})))
+    thread.start()
+    try:
+        wait_for(lambda: scheduler.status()['queued'] == 1)
+        time.sleep(0.05)
+        assert 'response' not in result
+    finally:
+        scheduler.release(0)
+        thread.join()
+    assert result['response'].status_code == 200
+    assert float(result['response'].headers['X-Queue-Wait-Ms']) >= 50
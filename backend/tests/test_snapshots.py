@@ -0,0 +1,211 @@
+import os
+import sqlite3
+
+import pytest
+
+import app as backend
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / "snapshots")
+    monkeypatch.setattr(backend, 'SNAPSHOT_DIR', path)
+    return path
+
+
+@pytest.fixture
+def source(sales_connection):
+    """Writes straight to the source database, like another client would"""
+    conn = sqlite3.connect(backend.db_manager.connections[sales_connection].profile['database'])
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, note TEXT, updated_at INTEGER)")
+    conn.executemany("INSERT INTO events VALUES (?, ?, ?)", [(i, f"event {i}", 100 + i) for i in range(1, 6)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def post(client, path, **body):
+    return client.post(path, json=body).get_json()
+
+
+def create(client, connection_id, **options):
+    result = post(client, '/api/snapshot/create', connection_id=connection_id, **options)
+    assert result['success'], result
+    return result['snapshot']
+
+
+def refresh(client, connection_id, name, **options):
+    result = post(client, '/api/snapshot/refresh', connection_id=connection_id, name=name, **options)
+    assert result['success'], result
+    return result
+
+
+def table_data(client, connection_id, table_name):
+    result = client.get('/api/crud/table-data', query_string={
+        "connection_id": connection_id, "table_name": table_name, "limit": 100}).get_json()
+    assert result['success'], result
+    return result
+
+
+def snapshot_rows(connection_id, name):
+    snapshot = backend.db_manager.connections[connection_id].snapshots[name]
+    return snapshot.db_conn.connection_obj.execute(
+        f"SELECT * FROM {backend.db_manager._quote_identifier('sqlite', name)} ORDER BY 1").fetchall()
+
+
+def test_reads_come_from_the_snapshot(client, sales_connection, source):
+    status = create(client, sales_connection, table_name='sales')
+    assert (status['rows'], status['key_columns'], status['written_since_refresh']) == (7, ['id'], False)
+
+    source.execute("DELETE FROM sales")
+    source.commit()
+    page = table_data(client, sales_connection, 'sales')
+    assert len(page['data']) == 7
+    assert page['snapshot']['name'] == 'sales'
+    assert 'bypassed' not in page['snapshot']
+
+
+def test_key_mode_copies_new_keys(client, sales_connection, source):
+    create(client, sales_connection, table_name='sales')
+    source.execute("INSERT INTO sales (region, product, amount) VALUES ('west', 'fig', 2)")
+    source.execute("INSERT INTO sales (region, product, amount) VALUES ('west', 'kiwi', 6)")
+    source.commit()
+
+    result = refresh(client, sales_connection, 'sales')
+    assert (result['mode'], result['rows_upserted'], result['rows_deleted']) == ('key', 2, None)
+    assert result['snapshot']['rows'] == 9
+    assert [row[2] for row in snapshot_rows(sales_connection, 'sales')[-2:]] == ['fig', 'kiwi']
+
+    # Nothing new: nothing copied
+    assert refresh(client, sales_connection, 'sales')['rows_upserted'] == 0
+
+
+def test_watermark_mode_copies_changed_rows(client, sales_connection, source):
+    status = create(client, sales_connection, table_name='events', change_column='updated_at')
+    assert status['watermark'] == 105
+
+    source.execute("UPDATE events SET note = 'edited', updated_at = 200 WHERE id = 2")
+    source.execute("INSERT INTO events VALUES (6, 'new', 201)")
+    source.commit()
+
+    result = refresh(client, sales_connection, 'events')
+    assert result['mode'] == 'watermark'
+    # >= the watermark, so the row that set it comes again
+    assert result['rows_upserted'] == 3
+    assert result['snapshot']['watermark'] == 201
+    rows = snapshot_rows(sales_connection, 'events')
+    assert rows[1] == (2, 'edited', 200)
+    assert rows[-1] == (6, 'new', 201)
+    assert len(rows) == 6
+
+
+def test_deletes_are_only_found_when_asked(client, sales_connection, source):
+    create(client, sales_connection, table_name='events', change_column='updated_at')
+    source.execute("DELETE FROM events WHERE id IN (1, 3)")
+    source.commit()
+
+    result = refresh(client, sales_connection, 'events')
+    assert result['rows_deleted'] is None
+    assert result['snapshot']['rows'] == 5
+
+    result = refresh(client, sales_connection, 'events', detect_deletes=True)
+    assert result['rows_deleted'] == 2
+    assert [row[0] for row in snapshot_rows(sales_connection, 'events')] == [2, 4, 5]
+
+
+def test_app_writes_send_reads_to_the_source_until_refreshed(client, sales_connection, source):
+    create(client, sales_connection, table_name='sales')
+    result = post(client, '/api/crud/update', connection_id=sales_connection, table_name='sales',
+                  values={"amount": 99}, where_conditions={"id": 1})
+    assert result['success'], result
+
+    page = table_data(client, sales_connection, 'sales')
+    assert page['snapshot']['bypassed'] is True
+    assert page['snapshot']['written_since_refresh'] is True
+    assert page['data'][0]['amount'] == 99.0
+    selected = post(client, '/api/crud/select', connection_id=sales_connection, table_name='sales',
+                    where_conditions={"id": 1})
+    assert selected['data'][0]['amount'] == 99.0
+    assert selected['snapshot']['bypassed'] is True
+
+    # New keys alone can't pick up the update, so a dirty key-mode snapshot is rebuilt
+    result = refresh(client, sales_connection, 'sales')
+    assert result['snapshot']['last_refresh_mode'] == 'full'
+    assert result['snapshot']['written_since_refresh'] is False
+    page = table_data(client, sales_connection, 'sales')
+    assert 'bypassed' not in page['snapshot']
+    assert page['data'][0]['amount'] == 99.0
+
+
+def test_app_deletes_force_delete_detection_in_watermark_mode(client, sales_connection, source):
+    create(client, sales_connection, table_name='events', change_column='updated_at')
+    result = post(client, '/api/crud/delete', connection_id=sales_connection, table_name='events',
+                  where_conditions={"id": 4})
+    assert result['success'], result
+
+    result = refresh(client, sales_connection, 'events')
+    assert (result['mode'], result['rows_deleted']) == ('watermark', 1)
+    assert result['snapshot']['written_since_refresh'] is False
+    assert [row[0] for row in snapshot_rows(sales_connection, 'events')] == [1, 2, 3, 5]
+
+
+def test_dirty_flag_is_shared_through_the_file(client, sales_connection, source):
+    create(client, sales_connection, table_name='sales')
+    db_conn = backend.db_manager.connections[sales_connection]
+    path = db_conn.snapshots['sales'].path
+
+    # Another worker's handle on the same file records a write
+    other = backend.db_manager._open_snapshot_file(path)
+    try:
+        other.mark_dirty()
+    finally:
+        other.db_conn.connection_obj.close()
+
+    assert backend.db_manager._find_snapshot(db_conn, 'sales').dirty
+    assert table_data(client, sales_connection, 'sales')['snapshot']['bypassed'] is True
+
+
+def test_rebuilt_file_is_reopened(client, sales_connection, source):
+    create(client, sales_connection, table_name='sales')
+    db_conn = backend.db_manager.connections[sales_connection]
+    snapshot = db_conn.snapshots['sales']
+
+    # Another worker rebuilds the snapshot and swaps the new file in
+    source.execute("DELETE FROM sales WHERE id > 2")
+    source.commit()
+    meta = dict(snapshot.meta, columns=list(snapshot.meta['columns']))
+    building = f"{snapshot.path}.other.building"
+    backend.db_manager._build_snapshot(db_conn, meta, building)
+    os.replace(building, snapshot.path)
+
+    found = backend.db_manager._find_snapshot(db_conn, 'sales')
+    assert found is not snapshot
+    assert found.inode == os.stat(snapshot.path).st_ino
+    assert len(table_data(client, sales_connection, 'sales')['data']) == 2
+
+
+def test_evicted_file_is_forgotten(client, sales_connection, source):
+    create(client, sales_connection, table_name='sales')
+    db_conn = backend.db_manager.connections[sales_connection]
+    os.remove(db_conn.snapshots['sales'].path)
+
+    assert backend.db_manager._find_snapshot(db_conn, 'sales') is None
+    assert 'sales' not in db_conn.snapshots
+    page = table_data(client, sales_connection, 'sales')
+    assert 'snapshot' not in page
+    assert len(page['data']) == 7
+
+
+def test_query_snapshot_with_trailing_comment(client, sales_connection, source):
+    status = create(client, sales_connection, name='north', key_columns=['id'],
+                    query="SELECT id, amount FROM sales WHERE region = 'north'; -- mine")
+    assert status['rows'] == 3
+    source.execute("INSERT INTO sales (region, product, amount) VALUES ('north', 'fig', 2)")
+    source.commit()
+
+    result = refresh(client, sales_connection, 'north')
+    assert result['snapshot']['rows'] == 4
+    listed = client.get('/api/snapshot/list', query_string={"connection_id": sales_connection}).get_json()
+    assert [snapshot['name'] for snapshot in listed['snapshots']] == ['north']
+    assert post(client, '/api/snapshot/drop', connection_id=sales_connection, name='north')['success']
+    assert os.listdir(backend.SNAPSHOT_DIR) == []
@@ -0,0 +1,202 @@
+import sqlite3
+
+import pytest
+
+import app as backend
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def engine(request, monkeypatch):
+    """Runs a test on the numpy path and again with numpy treated as missing"""
+    if request.param == 'numpy':
+        if not backend.drivers.available('numpy'):
+            pytest.skip("numpy is not installed")
+    else:
+        monkeypatch.setitem(backend.drivers._loaded, 'numpy', None)
+    return request.param
+
+
+def make_table(client, tmp_path, ids, analyze=True):
+    """A SQLite connection to an events table with the given ids, each tagged with id % 7"""
+    path = str(tmp_path / "events.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, kind TEXT, size REAL)")
+    conn.executemany("INSERT INTO events VALUES (?, ?, ?)",
+                     ((i, f"kind{i % 7}", None if i % 10 == 0 else float(i % 100)) for i in ids))
+    if analyze:
+        conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    response = client.post('/api/create-connection', json={"name": "events", "type": "sqlite", "database": path})
+    return response.get_json()['connection_id']
+
+
+@pytest.fixture
+def events_connection(client, tmp_path):
+    connection_id = make_table(client, tmp_path, range(1, 20001))
+    yield connection_id
+    client.post('/api/close-connection', json={"connection_id": connection_id})
+
+
+def profile(client, connection_id, table_name, **options):
+    result = client.get('/api/table-profile', query_string=dict(
+        connection_id=connection_id, table_name=table_name, refresh='true', **options)).get_json()
+    assert result['success'], result
+    return result
+
+
+def traced(connection_id):
+    statements = []
+    backend.db_manager.connections[connection_id].connection_obj.set_trace_callback(statements.append)
+    return statements
+
+
+def by_name(result):
+    return {column['name']: column for column in result['columns']}
+
+
+def test_small_table_is_read_whole(client, sales_connection, engine):
+    result = profile(client, sales_connection, 'sales')
+    assert (result['total_rows'], result['sample_rows'], result['sampled']) == (7, 7, False)
+    assert result['vectorized'] == (engine == 'numpy')
+
+    columns = by_name(result)
+    assert columns['region']['null_fraction'] == 0.0
+    assert columns['region']['distinct_estimate'] == 3
+    assert columns['region']['top_values'][0] == {"value": "north", "count": 3}
+    assert sorted((top['value'], top['count']) for top in columns['region']['top_values']) == \
+        [("east", 2), ("north", 3), ("south", 2)]
+    assert (columns['region']['min'], columns['region']['max']) == ("east", "south")
+    assert (columns['region']['min_length'], columns['region']['max_length']) == (4, 5)
+
+    assert columns['product']['null_fraction'] == pytest.approx(1 / 7)
+    assert columns['product']['distinct_estimate'] == 3
+
+    amount = columns['amount']
+    assert (amount['min'], amount['max']) == (1.0, 20.0)
+    assert amount['mean'] == pytest.approx(50 / 7)
+    assert sum(amount['histogram']['counts']) == 7
+    assert amount['top_values'][0]['count'] == 1
+
+
+def test_numpy_and_python_paths_agree(client, sales_connection, monkeypatch):
+    if not backend.drivers.available('numpy'):
+        pytest.skip("numpy is not installed")
+    vectorized = by_name(profile(client, sales_connection, 'sales'))
+    monkeypatch.setitem(backend.drivers._loaded, 'numpy', None)
+    looped = by_name(profile(client, sales_connection, 'sales'))
+
+    for name, column in looped.items():
+        other = vectorized[name]
+        assert sorted(column) == sorted(other)
+        for key, value in column.items():
+            if key == 'top_values':
+                # Ties may be listed in a different order
+                assert sorted(value, key=str) == sorted(other[key], key=str)
+            elif isinstance(value, float):
+                assert other[key] == pytest.approx(value)
+            else:
+                assert other[key] == value, (name, key)
+
+
+def test_mixed_types_fall_back_to_the_python_loop(client, sales_connection):
+    client.post('/api/execute-query', json={"connection_id": sales_connection,
+                                            "query": "CREATE TABLE loose (v)"})
+    client.post('/api/execute-query', json={"connection_id": sales_connection,
+                                            "query": "INSERT INTO loose VALUES (1), ('a'), (2.5), (NULL), ('a')"})
+    column = profile(client, sales_connection, 'loose')['columns'][0]
+    assert column['null_fraction'] == 0.2
+    assert column['distinct_estimate'] == 3
+    assert column['top_values'][0] == {"value": "a", "count": 2}
+
+
+def test_large_table_uses_the_row_estimate_and_key_ranges(client, events_connection, engine):
+    statements = traced(events_connection)
+    result = profile(client, events_connection, 'events', sample_size=1000)
+
+    assert result['total_rows'] == 20000
+    assert result['total_rows_estimated'] is True
+    assert result['sample_rows'] == 1000
+    assert result['sampled'] is True
+    assert not any('COUNT(' in sql.upper() or 'RANDOM()' in sql.upper() for sql in statements)
+    assert any('rowid' in sql or '"id" >=' in sql for sql in statements)
+
+    columns = by_name(result)
+    assert columns['kind']['distinct_estimate'] == 7
+    assert columns['size']['null_fraction'] == pytest.approx(0.1, abs=0.05)
+    assert 0 <= columns['size']['min'] and columns['size']['max'] <= 99
+
+
+def test_sample_ranges_are_spread_over_the_key_space(client, events_connection):
+    manager = backend.db_manager
+    rows = manager._fetch_key_range_sample(manager.connections[events_connection].connection_obj,
+                                           'sqlite', 'events', 'id', '"id"', 640)
+    ids = [row[0] for row in rows]
+    assert len(ids) == len(set(ids)) == 640
+
+    ranges = manager._split_key_range(1, 20000, backend.PROFILE_SAMPLE_RANGES)
+    shares = [sum(1 for i in ids if start <= i < end) for start, end in ranges]
+    assert shares == [640 // len(ranges)] * len(ranges)
+
+
+def test_sparse_keys_still_fill_the_sample(client, tmp_path):
+    connection_id = make_table(client, tmp_path, [i * 1000003 for i in range(1, 3001)])
+    try:
+        result = profile(client, connection_id, 'events', sample_size=200)
+        assert result['sample_rows'] == 200
+        assert result['total_rows'] == 3000
+    finally:
+        client.post('/api/close-connection', json={"connection_id": connection_id})
+
+
+def test_missing_statistics_fall_back_to_an_exact_count(client, tmp_path):
+    connection_id = make_table(client, tmp_path, range(1, 5001), analyze=False)
+    try:
+        result = profile(client, connection_id, 'events', sample_size=100)
+        assert (result['total_rows'], result['total_rows_estimated'], result['sample_rows']) == (5000, False, 100)
+    finally:
+        client.post('/api/close-connection', json={"connection_id": connection_id})
+
+
+def test_stale_statistics_are_caught_by_the_capped_read(client, tmp_path):
+    connection_id = make_table(client, tmp_path, range(1, 11))
+    try:
+        client.post('/api/execute-query', json={
+            "connection_id": connection_id,
+            "query": "INSERT INTO events SELECT id + 10, kind, size FROM events"})
+        result = profile(client, connection_id, 'events', sample_size=15)
+        assert (result['total_rows'], result['total_rows_estimated']) == (20, False)
+        assert (result['sample_rows'], result['sampled']) == (15, True)
+    finally:
+        client.post('/api/close-connection', json={"connection_id": connection_id})
+
+
+@pytest.mark.parametrize("db_type, clause", [
+    ('postgresql', 'TABLESAMPLE SYSTEM (1.250000)'),
+    ('mssql', 'TABLESAMPLE (1.250000 PERCENT)'),
+])
+def test_server_databases_use_block_sampling(monkeypatch, db_type, clause):
+    manager = backend.db_manager
+    queries = []
+    monkeypatch.setattr(manager, '_row_estimates', lambda conn, kind: {"events": 1000000})
+    monkeypatch.setattr(manager, '_count_rows', lambda *args: pytest.fail("counted the table"))
+    monkeypatch.setattr(manager, '_fetch_tuples',
+                        lambda conn, query, params=(): queries.append(query) or [(n,) for n in range(12500)])
+    schema = {"columns": [{"name": "id", "type": "integer", "primary_key": True}]}
+
+    rows, total_rows, estimated = manager._fetch_profile_sample(None, db_type, 'events', schema, ['id'], 10000)
+    assert (len(rows), total_rows, estimated) == (10000, 1000000, True)
+    assert len(set(rows)) == 10000
+    assert len(queries) == 1 and clause in queries[0]
+    assert 'ORDER BY' not in queries[0]
+
+
+def test_mysql_without_an_integer_key_filters_instead_of_sorting(monkeypatch):
+    manager = backend.db_manager
+    queries = []
+    monkeypatch.setattr(manager, '_row_estimates', lambda conn, kind: {"tags": 100000})
+    monkeypatch.setattr(manager, '_fetch_tuples', lambda conn, query, params=(): queries.append(query) or [])
+    schema = {"columns": [{"name": "code", "type": "varchar(10)", "primary_key": True}]}
+
+    manager._fetch_profile_sample(None, 'mysql', 'tags', schema, ['code'], 1000)
+    assert queries == ["SELECT `code` FROM `tags` WHERE RAND() < 0.012500000"]
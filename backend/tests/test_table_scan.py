@@ -0,0 +1,65 @@
+import sqlite3
+
+import pytest
+
+import app as backend
+
+
+@pytest.fixture
+def scan_database(client, tmp_path):
+    path = str(tmp_path / "scan.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE dense (id INTEGER PRIMARY KEY, label TEXT)")
+    conn.executemany("INSERT INTO dense VALUES (?, ?)", [(i, f"row {i}") for i in range(1, 5001)])
+    conn.execute("CREATE TABLE sparse (id INTEGER PRIMARY KEY, label TEXT)")
+    conn.executemany("INSERT INTO sparse VALUES (?, ?)", [(1, "first"), (1000000000, "last")])
+    conn.execute("CREATE TABLE keyless (code TEXT, amount INTEGER)")
+    conn.executemany("INSERT INTO keyless VALUES (?, ?)", [(f"c{i}", i) for i in range(300)])
+    conn.commit()
+    conn.close()
+
+    response = client.post('/api/create-connection', json={"name": "scan", "type": "sqlite", "database": path})
+    connection_id = response.get_json()['connection_id']
+    yield connection_id
+    client.post('/api/close-connection', json={"connection_id": connection_id})
+
+
+def scan(client, connection_id, table_name, **options):
+    result = client.post('/api/crud/table-scan', json=dict(
+        connection_id=connection_id, table_name=table_name, **options)).get_json()
+    assert result['success'], result
+    return result
+
+
+def test_rows_come_back_in_key_order_across_workers(client, scan_database):
+    result = scan(client, scan_database, 'dense', workers=4)
+    assert result['workers'] == 4
+    assert result['chunks'] == 4 * backend.SCAN_CHUNKS_PER_WORKER
+    assert result['split_key'] == 'id'
+    assert [row['id'] for row in result['data']] == list(range(1, 5001))
+
+
+def test_chunk_size_sets_the_number_of_chunks(client, scan_database):
+    result = scan(client, scan_database, 'dense', workers=2, chunk_size=1000)
+    assert result['chunks'] == 5
+    assert result['row_count'] == 5000
+
+
+def test_sparse_key_with_small_chunk_size_is_capped(client, scan_database):
+    result = scan(client, scan_database, 'sparse', workers=4, chunk_size=1)
+    assert result['chunks'] == backend.SCAN_MAX_CHUNKS
+    assert [row['id'] for row in result['data']] == [1, 1000000000]
+
+
+def test_tables_without_integer_key_split_on_rowid(client, scan_database):
+    result = scan(client, scan_database, 'keyless', workers=3, columns=['code'])
+    assert result['split_key'] == 'rowid'
+    assert result['columns'] == ['code']
+    assert [row['code'] for row in result['data']] == [f"c{i}" for i in range(300)]
+
+
+def test_unknown_columns_are_rejected(client, scan_database):
+    result = client.post('/api/crud/table-scan', json={
+        "connection_id": scan_database, "table_name": "dense", "columns": ["nope"]}).get_json()
+    assert not result['success']
+    assert 'nope' in result['error']
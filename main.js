@@ -36,9 +36,6 @@ function createWindow() {
   // Show window when ready
   mainWindow.once('ready-to-show', () => {
     mainWindow.show();
-    
-    // Check if backend is running, if not start it
-    checkBackendStatus();
   });
 
   // Handle window closed
@@ -58,10 +55,18 @@ function startBackend() {
   // Check if Python is available
   const pythonCommand = process.platform === 'win32' ? 'python' : 'python3';
   
-  backendProcess = spawn(pythonCommand, ['backend/app.py'], {
+  // DBONLY_IMPORT_TIME=1 logs Python's per-module import times to the backend stderr
+  const pythonArgs = process.env.DBONLY_IMPORT_TIME ? ['-X', 'importtime', 'backend/app.py'] : ['backend/app.py'];
+  const spawnedAt = Date.now();
+  
+  backendProcess = spawn(pythonCommand, pythonArgs, {
     cwd: __dirname,
-    stdio: 'pipe'
+    stdio: 'pipe',
+    // No debug mode: the reloader would start a second process that imports everything again
+    env: { ...process.env, DBONLY_DEBUG: '0' }
   });
+  
+  waitForBackend(spawnedAt);
 
   backendProcess.stdout.on('data', (data) => {
     console.log(`Backend stdout: ${data}`);
@@ -81,6 +86,34 @@ function startBackend() {
   });
 }
 
+function waitForBackend(spawnedAt) {
+  // Poll the health endpoint until the backend answers, then log the startup timings
+  const http = require('http');
+  const req = http.get({ hostname: 'localhost', port: 5001, path: '/api/health', timeout: 500 }, (res) => {
+    res.resume();
+    if (res.statusCode !== 200) {
+      setTimeout(() => waitForBackend(spawnedAt), 100);
+      return;
+    }
+    console.log(`Backend ready ${Date.now() - spawnedAt} ms after spawn`);
+    http.get({ hostname: 'localhost', port: 5001, path: '/api/startup' }, (reportRes) => {
+      let body = '';
+      reportRes.on('data', (chunk) => { body += chunk; });
+      reportRes.on('end', () => console.log(`Backend startup report: ${body}`));
+    }).on('error', () => {});
+  });
+  
+  req.on('error', () => {
+    if (backendProcess && backendProcess.exitCode === null) {
+      setTimeout(() => waitForBackend(spawnedAt), 100);
+    }
+  });
+  
+  req.on('timeout', () => {
+    req.destroy();
+  });
+}
+
 function checkBackendStatus() {
   // Simple check to see if backend is responding
   const http = require('http');
@@ -114,6 +147,8 @@ function checkBackendStatus() {
 
 // App event handlers
 app.whenReady().then(() => {
+  // Start the backend alongside the window instead of after it has been shown
+  checkBackendStatus();
   createWindow();
 
   app.on('activate', () => {
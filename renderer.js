@@ -169,7 +169,8 @@ function getDatabaseIcon(type) {
         'mysql': 'fas fa-database',
         'postgresql': 'fas fa-database',
         'sqlite': 'fas fa-file-database',
-        'mssql': 'fas fa-database'
+        'mssql': 'fas fa-database',
+        'mongodb': 'fas fa-leaf'
     };
     return icons[type] || 'fas fa-database';
 }
@@ -335,6 +336,16 @@ async function loadTableSchema(tableName, container) {
         
         if (result.success) {
             renderTableSchema(result, container);
+            
+            // Sample rows are fetched separately so the column list shows immediately
+            const sample = await window.electronAPI.apiRequest(
+                `table-sample?connection_id=${currentConnection.connectionId}&table_name=${tableName}`,
+                'GET'
+            );
+            if (sample.success && sample.sample_data.length > 0) {
+                result.sample_data = sample.sample_data;
+                renderTableSchema(result, container);
+            }
         } else {
             container.innerHTML = `<div class="error-message">Failed to load schema: ${result.error}</div>`;
         }
@@ -344,6 +355,21 @@ async function loadTableSchema(tableName, container) {
     }
 }
 
+function formatCellValue(value) {
+    if (value === null || value === undefined) {
+        return '<em>NULL</em>';
+    }
+    // Large or binary values arrive as truncation markers from the backend
+    if (typeof value === 'object' && '__truncated__' in value) {
+        const size = value.length !== null ? ` ${value.length}` : '';
+        if (value.type === 'blob') {
+            return `<em>[BLOB${size}]</em>`;
+        }
+        return value.__truncated__ ? `${value.preview}&hellip; <em>[TEXT${size}]</em>` : value.preview;
+    }
+    return value;
+}
+
 function renderTableSchema(schemaInfo, container) {
     let html = '';
     
@@ -393,8 +419,7 @@ function renderTableSchema(schemaInfo, container) {
         schemaInfo.sample_data.forEach(row => {
             html += '<tr>';
             columns.forEach(col => {
-                const value = row[col];
-                html += `<td>${value !== null ? value : '<em>NULL</em>'}</td>`;
+                html += `<td>${formatCellValue(row[col])}</td>`;
             });
             html += '</tr>';
         });
@@ -455,7 +480,7 @@ async function executeQuery() {
         });
         
         if (result.success) {
-            displayResults(result);
+            displayResults(result, query);
             addToHistory(query, result);
             showNotification('Success', `Query executed successfully. ${result.row_count || result.affected_rows || 0} rows affected.`);
         } else {
@@ -469,10 +494,23 @@ async function executeQuery() {
     }
 }
 
-function displayResults(result) {
+function displayResults(result, query) {
     if (result.data && Array.isArray(result.data)) {
         displayDataTable(result.data, result.columns);
-        elements.resultsCount.textContent = `${result.row_count} rows`;
+        elements.resultsCount.textContent = result.truncated
+            ? `first ${result.row_count} rows (truncated)`
+            : `${result.row_count} rows`;
+        if (result.truncated && query) {
+            const countLink = document.createElement('a');
+            countLink.href = '#';
+            countLink.textContent = ' count all';
+            countLink.onclick = (event) => {
+                event.preventDefault();
+                countLink.remove();
+                loadQueryTotal(query);
+            };
+            elements.resultsCount.appendChild(countLink);
+        }
         elements.executionTime.textContent = `${Math.round(result.execution_time)}ms`;
         
         // Switch to results tab
@@ -490,6 +528,25 @@ function displayResults(result) {
     }
 }
 
+// Counting runs the whole query again, so it is only done when asked for
+async function loadQueryTotal(query) {
+    const connectionId = currentConnection.connectionId;
+    try {
+        const result = await window.electronAPI.apiRequest('query-count', 'POST', {
+            connection_id: connectionId,
+            query: query
+        });
+        if (!result.success) {
+            showNotification('Warning', `Couldn't count rows: ${result.error}`);
+        } else if (currentConnection && currentConnection.connectionId === connectionId) {
+            elements.resultsCount.textContent = elements.resultsCount.textContent.replace(
+                '(truncated)', `of ${result.total_count} (truncated)`);
+        }
+    } catch (error) {
+        console.error('Query count failed:', error);
+    }
+}
+
 function displayDataTable(data, columns) {
     if (!elements.resultsTable) return;
     
@@ -512,8 +569,7 @@ function displayDataTable(data, columns) {
     data.forEach(row => {
         html += '<tr>';
         columns.forEach(column => {
-            const value = row[column];
-            html += `<td>${value !== null && value !== undefined ? String(value) : '<em>NULL</em>'}</td>`;
+            html += `<td>${formatCellValue(row[column])}</td>`;
         });
         html += '</tr>';
     });
@@ -763,13 +819,15 @@ function getConnectionFormData() {
         const password = document.getElementById('password').value.trim();
         const database = document.getElementById('database').value.trim();
         
-        if (!host || !username || !database) {
+        // MongoDB servers often run without authentication
+        if (!host || (!username && type !== 'mongodb') || !database) {
             showNotification('Error', 'Please fill in all required fields');
             return null;
         }
         
         formData.host = host;
-        formData.port = parseInt(port) || (type === 'mysql' ? 3306 : type === 'postgresql' ? 5432 : 1433);
+        const defaultPorts = { mysql: 3306, postgresql: 5432, mssql: 1433, mongodb: 27017 };
+        formData.port = parseInt(port) || defaultPorts[type];
         formData.username = username;
         formData.password = password;
         formData.database = database;
@@ -995,7 +1053,10 @@ function handleCrudTableChange() {
     }
 }
 
-async function loadCrudTableData(tableName) {
+// Last page shown in the CRUD grid, kept so a refresh can ask for changes only
+let crudTableState = null;
+
+async function loadCrudTableData(tableName, sinceVersion = null) {
     if (!currentConnection) {
         showNotification('Error', 'Please connect to a database first');
         return;
@@ -1004,17 +1065,31 @@ async function loadCrudTableData(tableName) {
     try {
         showLoadingOverlay('Loading table data...');
         
-        const response = await window.electronAPI.apiRequest('crud/table-data', {
-            connection_id: currentConnection.id,
-            table_name: tableName,
-            limit: 100,
-            offset: 0
-        });
+        let endpoint = `crud/table-data?connection_id=${currentConnection.connectionId}&table_name=${tableName}&limit=100&offset=0`;
+        if (sinceVersion) {
+            endpoint += `&since_version=${encodeURIComponent(JSON.stringify(sinceVersion))}`;
+        }
+        const response = await window.electronAPI.apiRequest(endpoint, 'GET');
         
         hideLoadingOverlay();
         
         if (response.success) {
-            renderCrudTable(response.data, response.columns, tableName);
+            if (response.unchanged) {
+                crudTableState.version = response.version;
+                return;
+            }
+            if (response.delta && !crudTableState.columns.includes(response.key)) {
+                // Rows keyed by SQLite rowid cannot be matched against the page, so reload it
+                return loadCrudTableData(tableName);
+            }
+            if (response.delta && !applyCrudDelta(response)) {
+                return loadCrudTableData(tableName);
+            }
+            if (!response.delta) {
+                crudTableState = { tableName, data: response.data, columns: response.columns, version: response.version };
+            }
+            crudTableState.snapshot = response.snapshot || null;
+            renderCrudTable(crudTableState.data, crudTableState.columns, tableName, crudTableState.snapshot);
         } else {
             showNotification('Error', response.error || 'Failed to load table data');
             showCrudPlaceholder();
@@ -1027,7 +1102,18 @@ async function loadCrudTableData(tableName) {
     }
 }
 
-function renderCrudTable(data, columns, tableName) {
+// Where a page came from when the table has a local snapshot, and how old that copy is
+function describeSnapshot(snapshot) {
+    if (!snapshot) return '';
+    if (snapshot.bypassed) {
+        return ' · live (snapshot has unsynced edits, refresh it to use it again)';
+    }
+    const minutes = Math.round(snapshot.age_seconds / 60);
+    const age = minutes < 1 ? 'just now' : `${minutes} min ago`;
+    return ` · from snapshot, refreshed ${age}${snapshot.stale ? ' (stale)' : ''}`;
+}
+
+function renderCrudTable(data, columns, tableName, snapshot = null) {
     const container = document.getElementById('crudTableContainer');
     
     if (!data || data.length === 0) {
@@ -1055,8 +1141,7 @@ function renderCrudTable(data, columns, tableName) {
     data.forEach((row, index) => {
         html += '<tr>';
         columns.forEach(col => {
-            const value = row[col] !== null ? row[col] : '<em>NULL</em>';
-            html += `<td>${value}</td>`;
+            html += `<td>${formatCellValue(row[col])}</td>`;
         });
         html += `
             <td class="crud-actions-cell">
@@ -1075,7 +1160,7 @@ function renderCrudTable(data, columns, tableName) {
         </table>
         <div class="crud-pagination">
             <div class="crud-pagination-info">
-                Showing ${data.length} records
+                Showing ${data.length} records${describeSnapshot(snapshot)}
             </div>
             <div class="crud-pagination-controls">
                 <button class="crud-pagination-btn" disabled>Previous</button>
@@ -1098,10 +1183,39 @@ function showCrudPlaceholder() {
     `;
 }
 
+function applyCrudDelta(delta) {
+    // Changed rows replace their current copy; new rows are appended while the page has room.
+    // Returns false when the page can't be patched and has to be reloaded instead.
+    const key = delta.key;
+    const removed = new Set(delta.removed_keys);
+    const changed = new Map(delta.data.map(row => [row[key], row]));
+    const data = [];
+    crudTableState.data.forEach(row => {
+        if (removed.has(row[key])) {
+            return;
+        }
+        data.push(changed.has(row[key]) ? changed.get(row[key]) : row);
+        changed.delete(row[key]);
+    });
+    changed.forEach(row => {
+        if (data.length < delta.limit) {
+            data.push(row);
+        }
+    });
+    if (data.length < Math.min(delta.limit, delta.total_count)) {
+        // Deleted rows left a gap that rows from the next page would fill
+        return false;
+    }
+    crudTableState.data = data;
+    crudTableState.version = delta.version;
+    return true;
+}
+
 function refreshCrudTable() {
     const tableSelect = document.getElementById('crudTableSelect');
     if (tableSelect.value) {
-        loadCrudTableData(tableSelect.value);
+        const sameTable = crudTableState && crudTableState.tableName === tableSelect.value;
+        loadCrudTableData(tableSelect.value, sameTable ? crudTableState.version : null);
     }
 }
 